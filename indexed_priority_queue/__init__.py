@@ -1 +1,18 @@
-from .ipq import IndexedPriorityQueue  # noqa: F401
+from .aging import AgingIndexedPriorityQueue  # noqa: F401
+from .async_queue import AsyncIndexedPriorityQueue  # noqa: F401
+from .backend import DaryIndexedPriorityQueue, IndexedPriorityQueue  # noqa: F401
+from .bounded import BoundedIndexedPriorityQueue  # noqa: F401
+from .concurrent_queue import ConcurrentIndexedPriorityQueue  # noqa: F401
+from .dense import DenseIndexedPriorityQueue  # noqa: F401
+from .grouped import GroupedIndexedPriorityQueue  # noqa: F401
+from .journal import JournaledIndexedPriorityQueue  # noqa: F401
+from .lazy import LazyIndexedPriorityQueue  # noqa: F401
+from .minmax import MinMaxIndexedPriorityQueue  # noqa: F401
+from .pairing import IndexedPairingHeap  # noqa: F401
+from .radix import IndexedRadixHeap  # noqa: F401
+from .wheel import TimerWheel  # noqa: F401
+
+try:
+    from .shared import SharedIndexedPriorityQueue  # noqa: F401
+except ImportError:  # multiprocessing.shared_memory needs Python 3.8
+    pass
@@ -0,0 +1,394 @@
+/*
+ * C implementation of the sift core of IndexedPriorityQueue. The functions
+ * work on the same three containers as the pure Python class (the priority
+ * list, the index -> key list and the key -> index dict), and are used by
+ * indexed_priority_queue.native when this module can be built.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+/*
+ * Returns 1 if a < b, 0 if not, and -1 on error. Exact floats and ints that
+ * fit in a long long are compared natively, without going through __lt__.
+ */
+static inline int
+less_than(PyObject *a, PyObject *b)
+{
+    if (PyFloat_CheckExact(a) && PyFloat_CheckExact(b)) {
+        return PyFloat_AS_DOUBLE(a) < PyFloat_AS_DOUBLE(b);
+    }
+
+    if (PyLong_CheckExact(a) && PyLong_CheckExact(b)) {
+        int overflow_a, overflow_b;
+        long long value_a = PyLong_AsLongLongAndOverflow(a, &overflow_a);
+        long long value_b = PyLong_AsLongLongAndOverflow(b, &overflow_b);
+
+        if (!overflow_a && !overflow_b) {
+            return value_a < value_b;
+        }
+    }
+
+    return PyObject_RichCompareBool(a, b, Py_LT);
+}
+
+/* Stores a new reference to "item" at list[index], releasing the old one. */
+static inline void
+list_assign(PyObject *list, Py_ssize_t index, PyObject *item)
+{
+    PyObject *old = PyList_GET_ITEM(list, index);
+    Py_INCREF(item);
+    PyList_SET_ITEM(list, index, item);
+    Py_DECREF(old);
+}
+
+static inline int
+set_index(PyObject *key_index, PyObject *key, Py_ssize_t index)
+{
+    PyObject *value = PyLong_FromSsize_t(index);
+    int result;
+
+    if (value == NULL) {
+        return -1;
+    }
+
+    result = PyDict_SetItem(key_index, key, value);
+    Py_DECREF(value);
+
+    return result;
+}
+
+static int
+check_containers(PyObject *queue, PyObject *index_key, Py_ssize_t index)
+{
+    if (PyList_GET_SIZE(queue) != PyList_GET_SIZE(index_key)) {
+        PyErr_SetString(PyExc_ValueError,
+                        "queue and index_key must have the same size");
+        return -1;
+    }
+
+    if (index < 0 || index >= PyList_GET_SIZE(queue)) {
+        PyErr_SetString(PyExc_IndexError, "index out of range");
+        return -1;
+    }
+
+    return 0;
+}
+
+static int
+check_size(PyObject *queue, PyObject *index_key, Py_ssize_t size)
+{
+    /* A custom __lt__ could have resized the lists */
+    if (PyList_GET_SIZE(queue) != size || PyList_GET_SIZE(index_key) != size) {
+        PyErr_SetString(PyExc_RuntimeError, "queue changed size during sift");
+        return -1;
+    }
+
+    return 0;
+}
+
+/*
+ * Puts the sifted element back at "index", where its hole is. If a custom
+ * __lt__ or __hash__ shrank the lists, the hole may be gone: the element is
+ * dropped then, and the RuntimeError of check_size is left set.
+ */
+static int
+fill_hole(PyObject *queue, PyObject *index_key, PyObject *key_index,
+          Py_ssize_t index, PyObject *priority, PyObject *key)
+{
+    if (index >= PyList_GET_SIZE(queue) || index >= PyList_GET_SIZE(index_key)) {
+        if (!PyErr_Occurred()) {
+            PyErr_SetString(PyExc_RuntimeError,
+                            "queue changed size during sift");
+        }
+        return -1;
+    }
+
+    list_assign(queue, index, priority);
+    list_assign(index_key, index, key);
+
+    return set_index(key_index, key, index);
+}
+
+static Py_ssize_t
+sift_up(PyObject *queue, PyObject *index_key, PyObject *key_index,
+        Py_ssize_t index, Py_ssize_t arity)
+{
+    Py_ssize_t size = PyList_GET_SIZE(queue);
+    PyObject *priority = PyList_GET_ITEM(queue, index);
+    PyObject *key = PyList_GET_ITEM(index_key, index);
+    Py_ssize_t result = -1;
+
+    Py_INCREF(priority);
+    Py_INCREF(key);
+
+    while (index > 0) {
+        Py_ssize_t parent_index = (index - 1) / arity;
+        PyObject *parent_priority = PyList_GET_ITEM(queue, parent_index);
+        PyObject *parent_key;
+        int is_less, failed;
+
+        Py_INCREF(parent_priority);
+        is_less = less_than(priority, parent_priority);
+        Py_DECREF(parent_priority);
+
+        if (is_less < 0 || check_size(queue, index_key, size) < 0) {
+            goto done;
+        }
+
+        if (!is_less) {
+            break;
+        }
+
+        parent_key = PyList_GET_ITEM(index_key, parent_index);
+
+        list_assign(queue, index, PyList_GET_ITEM(queue, parent_index));
+        list_assign(index_key, index, parent_key);
+
+        failed = set_index(key_index, parent_key, index) < 0;
+
+        /* The hole has moved either way */
+        index = parent_index;
+
+        /* __hash__ and __eq__ of the keys could have resized the lists too */
+        if (failed || check_size(queue, index_key, size) < 0) {
+            goto done;
+        }
+    }
+
+    result = index;
+
+done:
+    /* The element always lands somewhere, even after an error, unless the
+     * lists shrank under it */
+    if (fill_hole(queue, index_key, key_index, index, priority, key) < 0) {
+        result = -1;
+    }
+
+    Py_DECREF(priority);
+    Py_DECREF(key);
+
+    return result;
+}
+
+static Py_ssize_t
+sift_down(PyObject *queue, PyObject *index_key, PyObject *key_index,
+          Py_ssize_t index, Py_ssize_t arity)
+{
+    Py_ssize_t size = PyList_GET_SIZE(queue);
+    PyObject *priority = PyList_GET_ITEM(queue, index);
+    PyObject *key = PyList_GET_ITEM(index_key, index);
+    Py_ssize_t result = -1;
+
+    Py_INCREF(priority);
+    Py_INCREF(key);
+
+    for (;;) {
+        Py_ssize_t first_child_index = arity * index + 1;
+        Py_ssize_t last_child_index, child_index, sibling_index;
+        PyObject *child_priority, *child_key;
+        int is_less, failed;
+
+        if (first_child_index >= size) {
+            break;
+        }
+
+        last_child_index = first_child_index + arity;
+
+        if (last_child_index > size) {
+            last_child_index = size;
+        }
+
+        /* Finds the smallest child */
+        child_index = first_child_index;
+
+        for (sibling_index = first_child_index + 1;
+             sibling_index < last_child_index; sibling_index++) {
+            PyObject *sibling_priority = PyList_GET_ITEM(queue, sibling_index);
+
+            child_priority = PyList_GET_ITEM(queue, child_index);
+
+            Py_INCREF(sibling_priority);
+            Py_INCREF(child_priority);
+            is_less = less_than(sibling_priority, child_priority);
+            Py_DECREF(sibling_priority);
+            Py_DECREF(child_priority);
+
+            if (is_less < 0 || check_size(queue, index_key, size) < 0) {
+                goto done;
+            }
+
+            if (is_less) {
+                child_index = sibling_index;
+            }
+        }
+
+        child_priority = PyList_GET_ITEM(queue, child_index);
+
+        Py_INCREF(child_priority);
+        is_less = less_than(child_priority, priority);
+        Py_DECREF(child_priority);
+
+        if (is_less < 0 || check_size(queue, index_key, size) < 0) {
+            goto done;
+        }
+
+        if (!is_less) {
+            break;
+        }
+
+        child_key = PyList_GET_ITEM(index_key, child_index);
+
+        list_assign(queue, index, PyList_GET_ITEM(queue, child_index));
+        list_assign(index_key, index, child_key);
+
+        failed = set_index(key_index, child_key, index) < 0;
+
+        /* The hole has moved either way */
+        index = child_index;
+
+        /* __hash__ and __eq__ of the keys could have resized the lists too */
+        if (failed || check_size(queue, index_key, size) < 0) {
+            goto done;
+        }
+    }
+
+    result = index;
+
+done:
+    if (fill_hole(queue, index_key, key_index, index, priority, key) < 0) {
+        result = -1;
+    }
+
+    Py_DECREF(priority);
+    Py_DECREF(key);
+
+    return result;
+}
+
+PyDoc_STRVAR(move_up_doc,
+"move_up(queue, index_key, key_index, index, arity=2) -> int\n\n"
+"Sifts the element at \"index\" towards the root and returns its final index.");
+
+static PyObject *
+move_up(PyObject *self, PyObject *args)
+{
+    PyObject *queue, *index_key, *key_index;
+    Py_ssize_t index, arity = 2, result;
+
+    if (!PyArg_ParseTuple(args, "O!O!O!n|n:move_up", &PyList_Type, &queue,
+                          &PyList_Type, &index_key, &PyDict_Type, &key_index,
+                          &index, &arity)) {
+        return NULL;
+    }
+
+    if (arity < 2) {
+        PyErr_SetString(PyExc_ValueError, "The arity must be at least 2");
+        return NULL;
+    }
+
+    if (check_containers(queue, index_key, index) < 0) {
+        return NULL;
+    }
+
+    result = sift_up(queue, index_key, key_index, index, arity);
+
+    if (result < 0) {
+        return NULL;
+    }
+
+    return PyLong_FromSsize_t(result);
+}
+
+PyDoc_STRVAR(move_down_doc,
+"move_down(queue, index_key, key_index, index, arity=2) -> int\n\n"
+"Sifts the element at \"index\" towards the leaves and returns its final index.");
+
+static PyObject *
+move_down(PyObject *self, PyObject *args)
+{
+    PyObject *queue, *index_key, *key_index;
+    Py_ssize_t index, arity = 2, result;
+
+    if (!PyArg_ParseTuple(args, "O!O!O!n|n:move_down", &PyList_Type, &queue,
+                          &PyList_Type, &index_key, &PyDict_Type, &key_index,
+                          &index, &arity)) {
+        return NULL;
+    }
+
+    if (arity < 2) {
+        PyErr_SetString(PyExc_ValueError, "The arity must be at least 2");
+        return NULL;
+    }
+
+    if (check_containers(queue, index_key, index) < 0) {
+        return NULL;
+    }
+
+    result = sift_down(queue, index_key, key_index, index, arity);
+
+    if (result < 0) {
+        return NULL;
+    }
+
+    return PyLong_FromSsize_t(result);
+}
+
+PyDoc_STRVAR(heapify_doc,
+"heapify(queue, index_key, key_index, arity=2) -> None\n\n"
+"Restores the heap invariant bottom-up, in linear time.");
+
+static PyObject *
+heapify(PyObject *self, PyObject *args)
+{
+    PyObject *queue, *index_key, *key_index;
+    Py_ssize_t arity = 2, size, index;
+
+    if (!PyArg_ParseTuple(args, "O!O!O!|n:heapify", &PyList_Type, &queue,
+                          &PyList_Type, &index_key, &PyDict_Type, &key_index,
+                          &arity)) {
+        return NULL;
+    }
+
+    if (arity < 2) {
+        PyErr_SetString(PyExc_ValueError, "The arity must be at least 2");
+        return NULL;
+    }
+
+    size = PyList_GET_SIZE(queue);
+
+    if (size != PyList_GET_SIZE(index_key)) {
+        PyErr_SetString(PyExc_ValueError,
+                        "queue and index_key must have the same size");
+        return NULL;
+    }
+
+    for (index = (size + arity - 2) / arity - 1; index >= 0; index--) {
+        if (sift_down(queue, index_key, key_index, index, arity) < 0) {
+            return NULL;
+        }
+    }
+
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef speedups_methods[] = {
+    {"move_up", move_up, METH_VARARGS, move_up_doc},
+    {"move_down", move_down, METH_VARARGS, move_down_doc},
+    {"heapify", heapify, METH_VARARGS, heapify_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef speedups_module = {
+    PyModuleDef_HEAD_INIT,
+    "indexed_priority_queue._speedups",
+    "C implementation of the IndexedPriorityQueue sift core.",
+    -1,
+    speedups_methods
+};
+
+PyMODINIT_FUNC
+PyInit__speedups(void)
+{
+    return PyModule_Create(&speedups_module);
+}
@@ -0,0 +1,254 @@
+from math import inf
+from numbers import Number
+from operator import ge, gt, le, lt, neg
+from typing import Callable, Hashable, Iterable, Iterator, List, Tuple
+
+from indexed_priority_queue.ipq import (
+    MAX,
+    MIN,
+    UPDATE_MANY_HEAPIFY_RATIO,
+    IndexedPriorityQueue,
+)
+
+# The offset is folded into the heap once it is this many times bigger than
+# the distance of the priorities to it, before floats lose too much precision
+MAX_OFFSET_DRIFT = 2**20
+
+# And the scale, once it gets out of this range
+MIN_SCALE = 2.0**-64
+MAX_SCALE = 2.0**64
+
+
+class AgingIndexedPriorityQueue(IndexedPriorityQueue):
+    """
+    An indexed priority queue whose priorities can all be shifted or scaled
+    at once, in O(1), such as to age every waiting item. A uniform shift, or
+    scaling by a positive factor, never changes the order of the heap, so
+    the heap holds priorities relative to a global transform instead:
+    priority() and the rest apply it as they return them, and push and update
+    undo it as they store them.
+
+    Integer priorities shifted by integers stay exact. Otherwise, once the
+    offset drifts too far from the stored priorities (or the scale out of
+    range), the transform is folded into the heap in O(n) (without sifting
+    anything), and it is reset whenever the queue gets empty.
+
+    It takes "order" and "stable", but not "key": shifting the priorities
+    wouldn't keep the order of what a key function returns.
+    """
+
+    __slots__ = ("offset", "scale", "sign", "stored_max", "integers")
+
+    def __init__(self, order: str = MIN, stable: bool = False):
+        if order not in (MIN, MAX):
+            raise ValueError(f"'order' must be '{MIN}' or '{MAX}'")
+
+        # The heap is always a min-heap: with order="max", it holds the
+        # negated priorities, so that stable=False needs no key_priority
+        super().__init__(stable=stable)
+
+        # priority = sign * (stored priority) * scale + offset
+        self.offset: Number = 0
+        self.scale: Number = 1
+        self.sign = -1 if order == MAX else 1
+
+        # An upper bound of the stored priorities (the root is the lowest),
+        # and whether they are all ints, for the drift check
+        self.stored_max: Number = -inf
+        self.integers = True
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "AgingIndexedPriorityQueue":
+        # The snapshot holds the priorities themselves
+        queue = super().load(path, **kwargs)
+
+        if queue.sign < 0:
+            queue._map_stored(neg)
+            queue._heapify()
+
+        queue._track_stored()
+
+        return queue
+
+    def shift_all(self, delta: Number) -> None:
+        # Adds "delta" to every priority
+        self.offset += delta
+        self._renormalize_if_drifted()
+
+    def scale_all(self, factor: Number) -> None:
+        # Multiplies every priority by "factor"
+        if factor <= 0:
+            raise ValueError("The factor must be positive")
+
+        self.scale *= factor
+        self.offset *= factor
+        self._renormalize_if_drifted()
+
+    def renormalize(self) -> None:
+        """
+        Folds the transform into the stored priorities, in O(n). It keeps
+        their order, so the heap isn't touched.
+        """
+        scale = self.scale
+        offset = self.sign * self.offset
+
+        if scale != 1:
+            self._map_stored(lambda stored: stored * scale + offset)
+        elif offset != 0:
+            self._map_stored(lambda stored: stored + offset)
+
+        self.offset = 0
+        self.scale = 1
+
+        self._track_stored()
+
+    def push(self, key: Hashable, priority: Number) -> None:
+        super().push(key, self._to_stored(priority))
+
+    def pop(self) -> Tuple[Hashable, Number]:
+        key, stored = super().pop()
+        return key, self._from_stored(stored)
+
+    def delete(self, key: Hashable) -> Tuple[Hashable, Number]:
+        # With a single item, it pops, which already restores the priority
+        if len(self.queue) == 1:
+            return super().delete(key)
+
+        key, stored = super().delete(key)
+        return key, self._from_stored(stored)
+
+    def update(self, key: Hashable, new_priority: Number) -> None:
+        super().update(key, self._to_stored(new_priority))
+
+    def update_many(self, items: Iterable[Tuple[Hashable, Number]]) -> None:
+        items = list(items)
+
+        # Unless it heapifies, it calls update for every item, which converts
+        # them itself
+        if self._prefers_heapify(len(items), UPDATE_MANY_HEAPIFY_RATIO):
+            to_stored = self._to_stored
+            items = [(key, to_stored(priority)) for key, priority in items]
+
+        super().update_many(items)
+
+    def _priority(self, index: int) -> Number:
+        return self._from_stored(super()._priority(index))
+
+    def _iter_items(self) -> Iterator[Tuple[Hashable, Number]]:
+        from_stored = self._from_stored
+
+        for key, stored in super()._iter_items():
+            yield key, from_stored(stored)
+
+    def _is_below(self, threshold: Number, inclusive: bool) -> Callable:
+        # Compares the priorities as returned, rather than the threshold as
+        # stored: undoing the transform doesn't round trip with floats
+        from_stored = self._from_stored
+
+        if self.sign > 0:
+            compare = le if inclusive else lt
+        else:
+            compare = ge if inclusive else gt
+
+        if self.key_priority is None:
+            return lambda stored: compare(from_stored(stored), threshold)
+
+        # Stable: the heap compares (stored priority, sequence) pairs
+        return lambda pair: compare(from_stored(pair[0]), threshold)
+
+    def _priorities(self) -> List[Number]:
+        return list(map(self._from_stored, super()._priorities()))
+
+    def _restore_priorities(
+        self, items: List[Tuple[Hashable, Number]]
+    ) -> List[Tuple[Hashable, Number]]:
+        from_stored = self._from_stored
+        return [
+            (key, from_stored(stored))
+            for key, stored in super()._restore_priorities(items)
+        ]
+
+    def _append(self, items: Iterable[Tuple[Hashable, Number]]) -> None:
+        to_stored = self._to_stored
+        super()._append((key, to_stored(priority)) for key, priority in items)
+
+    def _copy_heap(self, other) -> bool:
+        # The transform is copied along with the heap
+        if type(other) is type(self) and other.sign != self.sign:
+            return False
+
+        if not super()._copy_heap(other):
+            return False
+
+        self.offset = other.offset
+        self.scale = other.scale
+        self.stored_max = other.stored_max
+        self.integers = other.integers
+
+        return True
+
+    def _to_stored(self, priority: Number) -> Number:
+        stored = priority - self.offset
+
+        if self.scale != 1:
+            stored /= self.scale
+
+        if self.sign < 0:
+            stored = -stored
+
+        if stored > self.stored_max:
+            self.stored_max = stored
+
+        if type(stored) is not int:
+            self.integers = False
+
+        return stored
+
+    def _from_stored(self, stored: Number) -> Number:
+        return self.sign * stored * self.scale + self.offset
+
+    def _map_stored(self, function: Callable[[Number], Number]) -> None:
+        # Applies "function" to every stored priority, in place
+        key_priority = self.key_priority
+
+        if key_priority is None:
+            self.queue[:] = map(function, self.queue)
+            return
+
+        # Stable: the heap compares (stored priority, sequence) pairs
+        for key, stored in key_priority.items():
+            key_priority[key] = function(stored)
+
+        self.queue[:] = [
+            (function(stored), sequence) for stored, sequence in self.queue
+        ]
+
+    def _track_stored(self) -> None:
+        # Recomputes what _to_stored keeps track of, in O(n)
+        stored = super()._priorities()
+
+        self.stored_max = max(stored, default=-inf)
+        self.integers = all(type(priority) is int for priority in stored)
+
+    def _renormalize_if_drifted(self) -> None:
+        if not self.queue:
+            self.offset = 0
+            self.scale = 1
+            self.stored_max = -inf
+            self.integers = True
+            return
+
+        # Integers don't lose precision
+        if self.integers and self.scale == 1 and isinstance(self.offset, int):
+            return
+
+        # How far the priorities are from the offset: the stored ones are
+        # between the root and stored_max
+        spread = self.scale * max(abs(super()._priority(0)), abs(self.stored_max))
+
+        # Stored priorities that are all 0 are exactly the offset however far
+        # it goes, so they never drift
+        drifted = spread and abs(self.offset) > MAX_OFFSET_DRIFT * spread
+
+        if drifted or not MIN_SCALE <= self.scale <= MAX_SCALE:
+            self.renormalize()
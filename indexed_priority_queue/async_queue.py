@@ -0,0 +1,197 @@
+import asyncio
+from collections import deque
+from contextlib import suppress
+from numbers import Number
+from typing import Callable, Deque, Hashable, Optional, Tuple
+
+from indexed_priority_queue.backend import IndexedPriorityQueue
+
+
+class AsyncIndexedPriorityQueue:
+    """
+    An indexed priority queue for asyncio code. Consumers await pop() (or
+    pop_until()), and producers await push() when the queue has a maxsize.
+
+    Consumers only wait on the head of the queue, so they are only woken up
+    when it changes: pushing an item that becomes the head, or updating or
+    deleting the head itself. Updates and deletions of other items wake
+    nobody. Each change wakes, in FIFO order, the first consumer that can
+    take the new head.
+
+    Like asyncio.Queue, it is not thread-safe.
+    """
+
+    def __init__(
+        self, maxsize: int = 0, queue_factory: Callable = IndexedPriorityQueue
+    ):
+        self.maxsize = maxsize
+        self.queue = queue_factory()
+
+        # (highest accepted priority, or None for any, future)
+        self._getters: Deque[Tuple[Optional[Number], asyncio.Future]] = deque()
+        self._putters: Deque[asyncio.Future] = deque()
+
+    def __bool__(self) -> bool:
+        return bool(self.queue)
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.queue
+
+    def empty(self) -> bool:
+        return not self.queue
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= len(self.queue)
+
+    def priority(self, key: Hashable) -> Number:
+        return self.queue.priority(key)
+
+    def peek(self) -> Tuple[Hashable, Number]:
+        return self.queue.peek()
+
+    def push_nowait(self, key: Hashable, priority: Number) -> None:
+        if self.full():
+            raise asyncio.QueueFull()
+
+        head = self._head()
+        self.queue.push(key, priority)
+        self._head_may_have_changed(head)
+
+    async def push(self, key: Hashable, priority: Number) -> None:
+        while self.full():
+            putter = asyncio.get_running_loop().create_future()
+            self._putters.append(putter)
+
+            try:
+                await putter
+            except BaseException:
+                putter.cancel()
+
+                with suppress(ValueError):
+                    self._putters.remove(putter)
+
+                # Hands the free slot over to the next producer
+                if not self.full() and not putter.cancelled():
+                    self._wake_next_putter()
+
+                raise
+
+        self.push_nowait(key, priority)
+
+    def pop_nowait(self) -> Tuple[Hashable, Number]:
+        if not self.queue:
+            raise asyncio.QueueEmpty()
+
+        item = self.queue.pop()
+
+        self._head_changed()
+        self._wake_next_putter()
+
+        return item
+
+    async def pop(self) -> Tuple[Hashable, Number]:
+        await self._wait_for_head(None)
+        return self.pop_nowait()
+
+    async def pop_until(
+        self, deadline: Number, timeout: Optional[float] = None
+    ) -> Tuple[Hashable, Number]:
+        """
+        Waits until the head of the queue has a priority lower than or equal
+        to "deadline", and pops it. For instance, when priorities are due
+        times, it pops the first job that is due by "deadline".
+
+        The priorities don't change by themselves, so it may wait forever:
+        after "timeout" seconds, if given, it raises asyncio.TimeoutError.
+        """
+        await self._wait_for_head(deadline, timeout)
+        return self.pop_nowait()
+
+    def update(self, key: Hashable, new_priority: Number) -> None:
+        head = self._head()
+        self.queue.update(key, new_priority)
+        self._head_may_have_changed(head)
+
+    def delete(self, key: Hashable) -> Tuple[Hashable, Number]:
+        head = self._head()
+        item = self.queue.delete(key)
+
+        self._head_may_have_changed(head)
+        self._wake_next_putter()
+
+        return item
+
+    def _head(self) -> Optional[Tuple[Hashable, Number]]:
+        return self.queue.peek() if self.queue else None
+
+    def _head_may_have_changed(self, previous_head) -> None:
+        if self._head() != previous_head:
+            self._head_changed()
+
+    def _accepts_head(self, deadline: Optional[Number]) -> bool:
+        if not self.queue:
+            return False
+
+        return deadline is None or not deadline < self.queue.peek()[1]
+
+    def _head_changed(self) -> None:
+        # Wakes up the first consumer that can take the new head
+        for getter in self._getters:
+            deadline, future = getter
+
+            if not future.done() and self._accepts_head(deadline):
+                self._getters.remove(getter)
+                future.set_result(None)
+                return
+
+    def _wake_next_putter(self) -> None:
+        while self._putters:
+            putter = self._putters.popleft()
+
+            if not putter.done():
+                putter.set_result(None)
+                return
+
+    async def _wait_for_head(
+        self, deadline: Optional[Number], timeout: Optional[float] = None
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        if timeout is not None:
+            end = loop.time() + timeout
+
+        while not self._accepts_head(deadline):
+            future = loop.create_future()
+            getter = (deadline, future)
+            self._getters.append(getter)
+
+            timer = None if timeout is None else loop.call_at(end, _time_out, future)
+
+            try:
+                await future
+            except BaseException:
+                future.cancel()
+
+                with suppress(ValueError):
+                    self._getters.remove(getter)
+
+                # It had been woken up to take the head: passes it on
+                if (
+                    future.done()
+                    and not future.cancelled()
+                    and future.exception() is None
+                ):
+                    self._head_changed()
+
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+
+def _time_out(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_exception(asyncio.TimeoutError())
@@ -0,0 +1,12 @@
+# The fastest available implementation of the array heaps: the C accelerated
+# ones when the extension has been built, the pure Python ones otherwise
+try:
+    from indexed_priority_queue.native import (  # noqa: F401
+        NativeDaryIndexedPriorityQueue as DaryIndexedPriorityQueue,
+    )
+    from indexed_priority_queue.native import (
+        NativeIndexedPriorityQueue as IndexedPriorityQueue,
+    )
+except ImportError:
+    from indexed_priority_queue.dary import DaryIndexedPriorityQueue  # noqa: F401
+    from indexed_priority_queue.ipq import IndexedPriorityQueue  # noqa: F401
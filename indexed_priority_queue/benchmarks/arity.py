@@ -0,0 +1,67 @@
+"""
+Compares heaps of different arities on push-heavy, pop-heavy and
+decrease-key-heavy traces.
+
+    python -m indexed_priority_queue.benchmarks.arity --size 100000
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from typing import Dict, Sequence
+
+from indexed_priority_queue.benchmarks.traces import TRACES, replay
+from indexed_priority_queue.dary import DaryIndexedPriorityQueue
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+
+DEFAULT_SIZE = 10**5
+DEFAULT_ARITIES = (2, 4, 8)
+DEFAULT_SEED = 0
+
+
+def create_queue(arity: int):
+    # The binary heap has its own specialised implementation
+    if arity == 2:
+        return IndexedPriorityQueue()
+
+    return DaryIndexedPriorityQueue(arity)
+
+
+def benchmark_arities(
+    size: int, arities: Sequence[int], seed: int = DEFAULT_SEED
+) -> Dict[str, Dict[int, float]]:
+    """
+    Returns, for each trace, the mean nanoseconds per operation of each arity.
+    """
+    results = {}
+
+    for name, generate_trace in TRACES.items():
+        trace = generate_trace(size, Random(seed))
+
+        results[name] = {
+            arity: replay(create_queue(arity), trace) / len(trace) * 1e9
+            for arity in arities
+        }
+
+    return results
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--arities", type=int, nargs="+", default=DEFAULT_ARITIES)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    results = benchmark_arities(args.size, args.arities, args.seed)
+
+    print(f"size = {args.size}, ns/op")
+    print(f"{'trace':>20}" + "".join(f"{f'd={arity}':>10}" for arity in args.arities))
+
+    for name, result in results.items():
+        print(
+            f"{name:>20}" + "".join(f"{result[arity]:>10.0f}" for arity in args.arities)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Compares the batch methods (push_many, update_many, delete_many, pop_many)
+against a loop of single operations, for batches of growing size.
+
+    python -m indexed_priority_queue.benchmarks.batch --size 100000
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+from typing import Callable, Dict, Sequence
+
+from indexed_priority_queue import ipq
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+
+DEFAULT_SIZE = 10**5
+DEFAULT_FRACTIONS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0)
+DEFAULT_SEED = 0
+DEFAULT_REPEAT = 3
+
+MODES = ("loop", "batch", "heapify")
+
+RATIOS = (
+    "PUSH_MANY_HEAPIFY_RATIO",
+    "UPDATE_MANY_HEAPIFY_RATIO",
+    "DELETE_MANY_HEAPIFY_RATIO",
+    "POP_MANY_SORT_RATIO",
+)
+
+
+def loop_push(queue, items, keys, count):
+    for key, priority in items:
+        queue.push(key, priority)
+
+
+def loop_update(queue, items, keys, count):
+    for key, priority in items:
+        queue.update(key, priority)
+
+
+def loop_delete(queue, items, keys, count):
+    for key in keys:
+        queue.delete(key)
+
+
+def loop_pop(queue, items, keys, count):
+    for _ in range(count):
+        queue.pop()
+
+
+def batch_push(queue, items, keys, count):
+    queue.push_many(items)
+
+
+def batch_update(queue, items, keys, count):
+    queue.update_many(items)
+
+
+def batch_delete(queue, items, keys, count):
+    queue.delete_many(keys)
+
+
+def batch_pop(queue, items, keys, count):
+    queue.pop_many(count)
+
+
+OPERATIONS = {
+    "push": (loop_push, batch_push),
+    "update": (loop_update, batch_update),
+    "delete": (loop_delete, batch_delete),
+    "pop": (loop_pop, batch_pop),
+}
+
+
+def time_operation(
+    operation: Callable, size: int, fraction: float, mode: str, seed: int
+) -> float:
+    random = Random(seed)
+
+    queue = IndexedPriorityQueue.from_items(
+        (key, random.random()) for key in range(size)
+    )
+
+    count = max(1, int(size * fraction))
+    keys = random.sample(range(size), count)
+
+    if operation in (loop_push, batch_push):
+        keys = range(size, size + count)
+
+    items = [(key, random.random()) for key in keys]
+
+    ratios = {name: getattr(ipq, name) for name in RATIOS}
+
+    if mode == "heapify":
+        for name in RATIOS:
+            setattr(ipq, name, 0)
+
+    try:
+        start = perf_counter()
+        operation(queue, items, keys, count)
+        return perf_counter() - start
+    finally:
+        for name, ratio in ratios.items():
+            setattr(ipq, name, ratio)
+
+
+def benchmark_batch(
+    size: int, fraction: float, seed: int = DEFAULT_SEED, repeat: int = DEFAULT_REPEAT
+) -> Dict[str, Dict[str, float]]:
+    """
+    Returns, for each operation, the best milliseconds out of "repeat" runs
+    taken by a loop of single operations ("loop"), by the batch method
+    ("batch") and by the batch method forced to re-heapify ("heapify").
+    """
+    results = {}
+
+    for name, operations in OPERATIONS.items():
+        results[name] = {}
+
+        for mode in MODES:
+            operation = operations[0] if mode == "loop" else operations[1]
+
+            results[name][mode] = 1e3 * min(
+                time_operation(operation, size, fraction, mode, seed)
+                for _ in range(repeat)
+            )
+
+    return results
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--fractions", type=float, nargs="+", default=DEFAULT_FRACTIONS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args(argv)
+
+    print(f"size = {args.size}, milliseconds per batch (loop / batch / heapify)")
+
+    for fraction in args.fractions:
+        results = benchmark_batch(args.size, fraction, args.seed, args.repeat)
+        row = "  ".join(
+            f"{name} {'/'.join(f'{result[mode]:.1f}' for mode in MODES):>20}"
+            for name, result in results.items()
+        )
+        print(f"{fraction:>6}  {row}")
+
+
+if __name__ == "__main__":
+    main()
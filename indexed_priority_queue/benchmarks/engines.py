@@ -0,0 +1,191 @@
+"""
+Replays an operation trace against every queue engine, so the fastest one
+for a given workload can be picked.
+
+    python -m indexed_priority_queue.benchmarks.engines --trace recorded.jsonl
+    python -m indexed_priority_queue.benchmarks.engines --generate decrease-key-heavy
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from indexed_priority_queue.aging import AgingIndexedPriorityQueue
+from indexed_priority_queue.benchmarks.traces import (
+    TRACES,
+    Trace,
+    load_trace,
+    replay,
+    save_trace,
+)
+from indexed_priority_queue.bounded import BoundedIndexedPriorityQueue
+from indexed_priority_queue.dary import DaryIndexedPriorityQueue
+from indexed_priority_queue.dense import DenseIndexedPriorityQueue
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+from indexed_priority_queue.lazy import LazyIndexedPriorityQueue
+from indexed_priority_queue.minmax import MinMaxIndexedPriorityQueue
+from indexed_priority_queue.pairing import IndexedPairingHeap
+from indexed_priority_queue.radix import IndexedRadixHeap
+
+try:
+    from indexed_priority_queue import native
+except ImportError:  # The C extension hasn't been built
+    native = None
+
+DEFAULT_SIZE = 10**5
+DEFAULT_SEED = 0
+
+
+class Engine(NamedTuple):
+    # Makes an empty queue for the trace, as some engines are sized for it
+    create: Callable[[Trace], Any]
+    # Why the engine can't replay the trace, or None if it can
+    unsupported: Callable[[Trace], Optional[str]]
+
+
+def _any_trace(trace: Trace) -> Optional[str]:
+    return None
+
+
+def _native(trace: Trace) -> Optional[str]:
+    return "the C extension isn't built" if native is None else None
+
+
+def _numbers(trace: Trace) -> Optional[str]:
+    if not all(type(priority) in (int, float) for priority in _priorities(trace)):
+        return "the priorities aren't all numbers"
+
+    return None
+
+
+def _dense_keys(trace: Trace) -> Optional[str]:
+    for _, *arguments in trace:
+        if arguments and not (type(arguments[0]) is int and arguments[0] >= 0):
+            return "the keys aren't all non-negative integers"
+
+    return _numbers(trace)
+
+
+def _monotone_integers(trace: Trace) -> Optional[str]:
+    if not all(type(priority) is int for priority in _priorities(trace)):
+        return "the priorities aren't all integers"
+
+    # Replays it on a heap to know the last popped priority at every step
+    queue = IndexedPriorityQueue()
+    last = 0
+
+    for name, *arguments in trace:
+        if name == "pop":
+            _, last = queue.pop()
+            continue
+
+        if name != "delete" and arguments[1] < last:
+            return "a priority goes below the last popped one"
+
+        getattr(queue, name)(*arguments)
+
+    return None
+
+
+def _priorities(trace: Trace):
+    return (operation[2] for operation in trace if len(operation) > 2)
+
+
+def _peak_size(trace: Trace) -> int:
+    size = peak = 0
+
+    for name, *_ in trace:
+        size += 1 if name == "push" else -1 if name in ("pop", "delete") else 0
+        peak = max(peak, size)
+
+    return peak
+
+
+def _max_key(trace: Trace) -> int:
+    return max((arguments[0] for _, *arguments in trace if arguments), default=-1)
+
+
+ENGINES = {
+    "binary": Engine(lambda trace: IndexedPriorityQueue(), _any_trace),
+    "binary-native": Engine(lambda trace: native.NativeIndexedPriorityQueue(), _native),
+    "4-ary": Engine(lambda trace: DaryIndexedPriorityQueue(), _any_trace),
+    "4-ary-native": Engine(
+        lambda trace: native.NativeDaryIndexedPriorityQueue(), _native
+    ),
+    "pairing": Engine(lambda trace: IndexedPairingHeap(), _any_trace),
+    "lazy": Engine(lambda trace: LazyIndexedPriorityQueue(), _any_trace),
+    "min-max": Engine(lambda trace: MinMaxIndexedPriorityQueue(), _any_trace),
+    # Big enough to never evict anything, or it wouldn't replay the trace
+    "bounded": Engine(
+        lambda trace: BoundedIndexedPriorityQueue(_peak_size(trace)), _any_trace
+    ),
+    "aging": Engine(lambda trace: AgingIndexedPriorityQueue(), _numbers),
+    "dense": Engine(
+        lambda trace: DenseIndexedPriorityQueue(_max_key(trace) + 1), _dense_keys
+    ),
+    "radix": Engine(lambda trace: IndexedRadixHeap(), _monotone_integers),
+}
+
+
+def split_engines(
+    trace: Trace, engines: Sequence[str] = tuple(ENGINES)
+) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Returns the engines that can replay the trace, and why each of the
+    others can't.
+    """
+    supported = []
+    skipped = {}
+
+    for name in engines:
+        reason = ENGINES[name].unsupported(trace)
+
+        if reason is None:
+            supported.append(name)
+        else:
+            skipped[name] = reason
+
+    return supported, skipped
+
+
+def benchmark_engines(trace: Trace, engines: Sequence[str]) -> Dict[str, float]:
+    """
+    Returns the mean nanoseconds per operation of each engine.
+    """
+    return {
+        name: replay(ENGINES[name].create(trace), trace) / len(trace) * 1e9
+        for name in engines
+    }
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--trace", help="JSON lines trace to replay")
+    source.add_argument("--generate", choices=sorted(TRACES))
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--record", help="Save the generated trace to this path")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        trace = load_trace(args.trace)
+    else:
+        trace = TRACES[args.generate](args.size, Random(args.seed))
+
+    if args.record:
+        save_trace(trace, args.record)
+
+    engines, skipped = split_engines(trace)
+
+    print(f"{len(trace)} operations, ns/op")
+
+    for name, result in benchmark_engines(trace, engines).items():
+        print(f"{name:>14} {result:>10.0f}")
+
+    for name, reason in skipped.items():
+        print(f"{name:>14} skipped: {reason}")
+
+
+if __name__ == "__main__":
+    main()
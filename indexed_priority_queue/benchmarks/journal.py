@@ -0,0 +1,76 @@
+"""
+Measures the throughput of JournaledIndexedPriorityQueue with each fsync
+policy, against a queue without a journal, replaying synthetic traces.
+
+    python -m indexed_priority_queue.benchmarks.journal --size 20000
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Sequence
+
+from indexed_priority_queue.backend import IndexedPriorityQueue
+from indexed_priority_queue.benchmarks.traces import TRACES, replay
+from indexed_priority_queue.journal import (
+    ALWAYS,
+    BATCH,
+    DEFAULT_BATCH_SIZE,
+    NEVER,
+    JournaledIndexedPriorityQueue,
+)
+
+DEFAULT_SIZE = 20000
+
+
+def benchmark_journal(trace, directory: str, **kwargs) -> float:
+    """
+    Returns the number of operations per second, including the final sync.
+    """
+    queue = JournaledIndexedPriorityQueue(directory, **kwargs)
+
+    elapsed = replay(queue, trace)
+
+    start = perf_counter()
+    queue.close()
+    elapsed += perf_counter() - start
+
+    return len(trace) / elapsed
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--trace", choices=TRACES, nargs="+", default=list(TRACES))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    policies = {
+        "no journal": None,
+        NEVER: {"fsync": NEVER},
+        f"{BATCH} ({args.batch_size})": {"fsync": BATCH, "batch_size": args.batch_size},
+        ALWAYS: {"fsync": ALWAYS},
+    }
+
+    print("ops/sec, per trace")
+    print(f"{'':>20}" + "".join(f"{name:>20}" for name in args.trace))
+
+    traces = [TRACES[name](args.size, Random(0)) for name in args.trace]
+
+    for policy, kwargs in policies.items():
+        results = []
+
+        for trace in traces:
+            if kwargs is None:
+                results.append(len(trace) / replay(IndexedPriorityQueue(), trace))
+                continue
+
+            with TemporaryDirectory() as directory:
+                results.append(benchmark_journal(trace, directory, **kwargs))
+
+        print(f"{policy:>20}" + "".join(f"{result:>20.0f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compares IndexedRadixHeap with the other queue engines on a discrete-event
+simulation trace, where integer priorities never go below the last popped one.
+
+    python -m indexed_priority_queue.benchmarks.monotone --size 100000 --pending 1000
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from typing import Sequence
+
+from indexed_priority_queue.benchmarks.engines import ENGINES
+from indexed_priority_queue.benchmarks.traces import discrete_event_trace, replay
+
+DEFAULT_SIZE = 10**5
+DEFAULT_PENDING = (100, 10000)
+DEFAULT_MAX_DELAY = 1000
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--pending", type=int, nargs="+", default=DEFAULT_PENDING)
+    parser.add_argument("--max-delay", type=int, default=DEFAULT_MAX_DELAY)
+    args = parser.parse_args(argv)
+
+    print("ns/op, per number of pending events")
+    print(f"{'':>14}" + "".join(f"{pending:>10}" for pending in args.pending))
+
+    traces = [
+        discrete_event_trace(args.size, Random(0), pending, args.max_delay)
+        for pending in args.pending
+    ]
+
+    # Only the native engines can be missing, if the extension isn't built
+    for name, engine in ENGINES.items():
+        if engine.unsupported(traces[0]) is not None:
+            continue
+
+        results = [
+            replay(engine.create(trace), trace) / len(trace) * 1e9 for trace in traces
+        ]
+        print(f"{name:>14}" + "".join(f"{result:>10.0f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
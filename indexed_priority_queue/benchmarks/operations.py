@@ -0,0 +1,91 @@
+"""
+Measures the per-operation cost of push, pop, update and delete on a queue
+that already holds "size" entries.
+
+    python -m indexed_priority_queue.benchmarks.operations --sizes 10000 1000000
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+from typing import Callable, Dict, Sequence
+
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+
+DEFAULT_SIZES = (10**4, 10**6, 10**7)
+DEFAULT_OPERATIONS = 10**5
+DEFAULT_SEED = 0
+
+
+def fill(queue, size: int, random: Random) -> None:
+    push = queue.push
+
+    for key in range(size):
+        push(key, random.random())
+
+
+def benchmark_operations(
+    queue_factory: Callable,
+    size: int,
+    operations: int = DEFAULT_OPERATIONS,
+    seed: int = DEFAULT_SEED,
+) -> Dict[str, float]:
+    """
+    Returns the mean cost, in nanoseconds, of each operation. Every timed
+    batch leaves the queue with "size" entries again, so all operations run
+    against a heap of the same depth.
+    """
+    random = Random(seed)
+
+    queue = queue_factory()
+    fill(queue, size, random)
+
+    operations = min(operations, size)
+    keys = random.sample(range(size), operations)
+    priorities = [random.random() for _ in range(operations)]
+    results = {}
+
+    start = perf_counter()
+    for key, priority in zip(keys, priorities):
+        queue.update(key, priority)
+    results["update"] = perf_counter() - start
+
+    start = perf_counter()
+    for key in keys:
+        queue.delete(key)
+    results["delete"] = perf_counter() - start
+
+    start = perf_counter()
+    for key, priority in zip(keys, priorities):
+        queue.push(key, priority)
+    results["push"] = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(operations):
+        queue.pop()
+    results["pop"] = perf_counter() - start
+
+    return {name: elapsed / operations * 1e9 for name, elapsed in results.items()}
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    print(f"{'size':>10} {'push':>9} {'pop':>9} {'update':>9} {'delete':>9}  (ns/op)")
+
+    for size in args.sizes:
+        result = benchmark_operations(
+            IndexedPriorityQueue, size, args.operations, args.seed
+        )
+        print(
+            f"{size:>10} {result['push']:>9.0f} {result['pop']:>9.0f} "
+            f"{result['update']:>9.0f} {result['delete']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Measures the throughput of several processes pushing, updating, deleting and
+popping at the same time: a queue owned by a server process that the others
+call through pipes (a multiprocessing manager), against
+SharedIndexedPriorityQueue.
+
+    python -m indexed_priority_queue.benchmarks.processes --processes 1 4 16
+"""
+
+from argparse import ArgumentParser
+from multiprocessing import Barrier, Process
+from multiprocessing.managers import BaseManager
+from random import Random
+from time import perf_counter
+from typing import Sequence
+
+from indexed_priority_queue.backend import IndexedPriorityQueue
+from indexed_priority_queue.shared import SharedIndexedPriorityQueue
+
+DEFAULT_PROCESSES = (1, 4, 16)
+DEFAULT_OPERATIONS = 20000
+
+
+class QueueManager(BaseManager):
+    pass
+
+
+QueueManager.register("IndexedPriorityQueue", IndexedPriorityQueue)
+
+
+def work(queue, process: int, operations: int, barrier: Barrier) -> None:
+    # Each process owns a range of keys: it pushes them, updates and deletes
+    # some of them, and then pops half as many items as it has pushed
+    random = Random(process)
+    keys = range(process * operations, (process + 1) * operations)
+
+    barrier.wait()
+
+    for key in keys:
+        queue.push(key, random.random())
+
+    # Other processes may have popped the key, or emptied the queue, already
+    for key in keys[::4]:
+        try:
+            queue.update(key, random.random())
+        except KeyError:
+            pass
+
+    for key in keys[1::4]:
+        try:
+            queue.delete(key)
+        except KeyError:
+            pass
+
+    for _ in range(len(keys) // 2):
+        try:
+            queue.pop()
+        except IndexError:
+            pass
+
+
+def benchmark_processes(queue, processes: int, operations: int) -> float:
+    """
+    Returns the number of operations per second of all the processes
+    together.
+    """
+    barrier = Barrier(processes + 1)
+
+    workers = [
+        Process(target=work, args=(queue, process, operations, barrier))
+        for process in range(processes)
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    start = perf_counter()
+
+    for worker in workers:
+        worker.join()
+
+    elapsed = perf_counter() - start
+
+    # Pushes, updates, deletes and pops
+    total = processes * (operations + operations // 4 * 2 + operations // 2)
+
+    return total / elapsed
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, nargs="+", default=DEFAULT_PROCESSES)
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS)
+    args = parser.parse_args(argv)
+
+    print("ops/sec, per number of processes")
+    print(f"{'':>10}" + "".join(f"{processes:>10}" for processes in args.processes))
+
+    with QueueManager() as manager:
+        results = [
+            benchmark_processes(
+                manager.IndexedPriorityQueue(), processes, args.operations
+            )
+            for processes in args.processes
+        ]
+        print(f"{'manager':>10}" + "".join(f"{result:>10.0f}" for result in results))
+
+    results = []
+
+    for processes in args.processes:
+        with SharedIndexedPriorityQueue(processes * args.operations) as queue:
+            results.append(benchmark_processes(queue, processes, args.operations))
+
+    print(f"{'shared':>10}" + "".join(f"{result:>10.0f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
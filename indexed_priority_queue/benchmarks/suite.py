@@ -0,0 +1,304 @@
+"""
+Replays generated or recorded operation traces against every queue engine, at
+several sizes, and reports throughput, latency percentiles and peak memory
+as JSON. Two reports can be compared to catch regressions.
+
+    ipq-benchmark run --sizes 1000 100000 --output before.json
+    ipq-benchmark run --sizes 1000 100000 --output after.json
+    ipq-benchmark compare before.json after.json
+
+    ipq-benchmark record dijkstra --size 100000 --output dijkstra.jsonl
+    ipq-benchmark run --traces --replay dijkstra.jsonl
+
+Every engine replays each trace in a fresh process, so the peak RSS of one
+doesn't hide the others. Latencies are timed one operation at a time (which
+adds the overhead of the timer to them), throughput over the whole replay.
+Engines that can't replay a trace, such as the radix heap on float
+priorities, are skipped, and listed in the report along with why.
+"""
+
+import json
+import platform
+import sys
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from random import Random
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from indexed_priority_queue.benchmarks.engines import ENGINES, split_engines
+from indexed_priority_queue.benchmarks.traces import (
+    OPERATIONS,
+    TRACES,
+    Trace,
+    load_trace,
+    replay,
+    save_trace,
+)
+
+try:
+    import resource
+except ImportError:  # Not on Windows
+    resource = None
+
+DEFAULT_TRACES = ("uniform", "dijkstra", "timer-churn", "top-k")
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_SEED = 0
+DEFAULT_REPEAT = 3
+
+# A result is a regression when it is this much worse than the baseline
+DEFAULT_THRESHOLD = 0.1
+
+
+def latencies(queue, trace: Trace) -> List[int]:
+    # The nanoseconds of every operation, in order
+    methods = {name: getattr(queue, name) for name in OPERATIONS}
+    timings = []
+
+    for name, *arguments in trace:
+        method = methods[name]
+        start = perf_counter()
+        method(*arguments)
+        timings.append(int((perf_counter() - start) * 1e9))
+
+    return timings
+
+
+def percentile(sorted_values: Sequence[int], fraction: float) -> int:
+    return sorted_values[
+        min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    ]
+
+
+def peak_rss() -> Optional[int]:
+    # In bytes. Linux reports kilobytes, macOS bytes
+    if resource is None:
+        return None
+
+    maximum = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximum if sys.platform == "darwin" else maximum * 1024
+
+
+def run_case(
+    engine: str,
+    trace_name: str,
+    size: int,
+    seed: int,
+    path: Optional[str],
+    repeat: int = DEFAULT_REPEAT,
+) -> Dict[str, Any]:
+    """
+    Replays a trace against an engine, once timing every operation, and
+    "repeat" times timing all of them together, keeping the fastest. If the
+    engine can't replay the trace, the result only has why, as "skipped".
+    """
+    if path is None:
+        trace = TRACES[trace_name](size, Random(seed))
+    else:
+        trace = load_trace(path)
+
+    case = {"trace": trace_name, "size": size, "engine": engine}
+
+    _, skipped = split_engines(trace, [engine])
+
+    if skipped:
+        return {**case, "skipped": skipped[engine]}
+
+    create = ENGINES[engine].create
+
+    timings = sorted(latencies(create(trace), trace))
+    seconds = min(replay(create(trace), trace) for _ in range(repeat))
+
+    return {
+        **case,
+        "operations": len(trace),
+        "ops_per_sec": len(trace) / seconds,
+        "p50_ns": percentile(timings, 0.5),
+        "p99_ns": percentile(timings, 0.99),
+        "peak_rss": peak_rss(),
+    }
+
+
+def run(
+    traces: Sequence[str],
+    sizes: Sequence[int],
+    engines: Sequence[str],
+    seed: int = DEFAULT_SEED,
+    paths: Sequence[str] = (),
+    repeat: int = DEFAULT_REPEAT,
+) -> Dict[str, Any]:
+    """
+    Runs every engine on every generated trace and size, and on every
+    recorded trace, each one in a new process. Returns the report.
+    """
+    cases = [
+        (engine, trace_name, size, seed, None, repeat)
+        for trace_name in traces
+        for size in sizes
+        for engine in engines
+    ]
+    cases.extend(
+        (engine, path, None, seed, path, repeat) for path in paths for engine in engines
+    )
+
+    results = []
+    skipped = []
+
+    # One process per case
+    with get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for case in cases:
+            result = pool.apply(run_case, case)
+            line = (
+                f"{result['trace']:>14} {str(result['size']):>8}"
+                f" {result['engine']:>14}"
+            )
+
+            if "skipped" in result:
+                skipped.append(result)
+                print(f"{line} skipped: {result['skipped']}", file=sys.stderr)
+                continue
+
+            results.append(result)
+            print(
+                f"{line} {result['ops_per_sec']:>12.0f} ops/s"
+                f" p50 {result['p50_ns']:>7} ns p99 {result['p99_ns']:>7} ns"
+                f" {(result['peak_rss'] or 0) / 2**20:>8.1f} MiB",
+                file=sys.stderr,
+            )
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """
+    Pairs the results of both reports by trace, size and engine, and returns
+    how much each metric changed, as a ratio of current to baseline. Results
+    only in one of them are left out.
+    """
+    baseline_results = {
+        (result["trace"], result["size"], result["engine"]): result
+        for result in baseline["results"]
+    }
+    changes = []
+
+    for result in current["results"]:
+        case = (result["trace"], result["size"], result["engine"])
+        old = baseline_results.get(case)
+
+        if old is None:
+            continue
+
+        ratios = {
+            metric: result[metric] / old[metric]
+            if result[metric] and old[metric]
+            else None
+            for metric in ("ops_per_sec", "p50_ns", "p99_ns", "peak_rss")
+        }
+
+        # Less throughput, or more latency or memory, is worse
+        regressed = [
+            metric
+            for metric, ratio in ratios.items()
+            if ratio is not None
+            and (
+                ratio < 1 - threshold
+                if metric == "ops_per_sec"
+                else ratio > 1 + threshold
+            )
+        ]
+
+        changes.append(
+            {
+                "trace": case[0],
+                "size": case[1],
+                "engine": case[2],
+                "ratios": ratios,
+                "regressed": regressed,
+            }
+        )
+
+    return changes
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    run_parser = commands.add_parser("run", help="Benchmark the engines")
+    run_parser.add_argument(
+        "--traces", nargs="*", choices=sorted(TRACES), default=DEFAULT_TRACES
+    )
+    run_parser.add_argument(
+        "--replay", nargs="+", default=[], help="Recorded JSON lines traces"
+    )
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument(
+        "--engines", nargs="+", choices=sorted(ENGINES), default=list(ENGINES)
+    )
+    run_parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument("--output", help="Where to write the JSON report")
+
+    record_parser = commands.add_parser("record", help="Generate and save a trace")
+    record_parser.add_argument("trace", choices=sorted(TRACES))
+    record_parser.add_argument("--size", type=int, default=DEFAULT_SIZES[-1])
+    record_parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    record_parser.add_argument("--output", required=True)
+
+    compare_parser = commands.add_parser("compare", help="Diff two JSON reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        save_trace(TRACES[args.trace](args.size, Random(args.seed)), args.output)
+
+    elif args.command == "run":
+        report = run(
+            args.traces,
+            args.sizes,
+            args.engines,
+            args.seed,
+            args.replay,
+            args.repeat,
+        )
+        output = json.dumps(report, indent=2)
+
+        if args.output:
+            with open(args.output, "w") as file:
+                file.write(output)
+        else:
+            print(output)
+
+    else:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        with open(args.current) as file:
+            current = json.load(file)
+
+        changes = compare(baseline, current, args.threshold)
+        print(json.dumps(changes, indent=2))
+
+        # Fails, so it can gate a CI job
+        if any(change["regressed"] for change in changes):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compares GroupedIndexedPriorityQueue with scanning the head of one queue per
+tenant on every pop, as a multi-tenant job scheduler.
+
+    python -m indexed_priority_queue.benchmarks.tenants --tenants 10 100 1000
+"""
+
+from argparse import ArgumentParser
+from numbers import Number
+from random import Random
+from time import perf_counter
+from typing import Hashable, Sequence, Tuple
+
+from indexed_priority_queue.backend import IndexedPriorityQueue
+from indexed_priority_queue.grouped import GroupedIndexedPriorityQueue
+
+DEFAULT_SIZE = 20000
+DEFAULT_TENANTS = (10, 100, 1000)
+
+
+class ScanningQueues:
+    """
+    One queue per tenant, and pop looks at the head of every one of them.
+    """
+
+    def __init__(self):
+        self.groups = {}
+
+    def push(self, group: Hashable, key: Hashable, priority: Number) -> None:
+        queue = self.groups.get(group)
+
+        if queue is None:
+            queue = self.groups[group] = IndexedPriorityQueue()
+
+        queue.push(key, priority)
+
+    def pop(self) -> Tuple[Hashable, Hashable, Number]:
+        group = min(self.groups, key=lambda group: self.groups[group].peek()[1])
+        queue = self.groups[group]
+        key, priority = queue.pop()
+
+        if not queue:
+            del self.groups[group]
+
+        return group, key, priority
+
+
+def scheduler_trace(size: int, random: Random, tenants: int):
+    # Every tenant starts with a few jobs, and then jobs are submitted and
+    # dispatched at the same rate
+    trace = [
+        ("push", group, (group, job), random.random())
+        for group in range(tenants)
+        for job in range(4)
+    ]
+
+    for job in range(size):
+        trace.append(("push", random.randrange(tenants), job, random.random()))
+        trace.append(("pop",))
+
+    return trace
+
+
+def replay(queue, trace) -> float:
+    push = queue.push
+    pop = queue.pop
+
+    start = perf_counter()
+
+    for name, *arguments in trace:
+        if name == "push":
+            push(*arguments)
+        else:
+            pop()
+
+    return perf_counter() - start
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--tenants", type=int, nargs="+", default=DEFAULT_TENANTS)
+    args = parser.parse_args(argv)
+
+    engines = {"scan": ScanningQueues, "grouped": GroupedIndexedPriorityQueue}
+
+    print("ns/op, per number of tenants")
+    print(f"{'':>10}" + "".join(f"{count:>10}" for count in args.tenants))
+
+    traces = [scheduler_trace(args.size, Random(0), count) for count in args.tenants]
+
+    for name, factory in engines.items():
+        results = [replay(factory(), trace) / len(trace) * 1e9 for trace in traces]
+        print(f"{name:>10}" + "".join(f"{result:>10.0f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
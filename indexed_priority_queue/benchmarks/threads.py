@@ -0,0 +1,135 @@
+"""
+Measures the throughput of several threads pushing, updating, deleting and
+popping at the same time: a plain queue behind one global lock, against
+ConcurrentIndexedPriorityQueue with different numbers of shards.
+
+    python -m indexed_priority_queue.benchmarks.threads --threads 1 4 16
+"""
+
+from argparse import ArgumentParser
+from queue import Empty
+from random import Random
+from threading import Barrier, Lock, Thread
+from time import perf_counter
+from typing import Sequence
+
+from indexed_priority_queue.backend import IndexedPriorityQueue
+from indexed_priority_queue.concurrent_queue import ConcurrentIndexedPriorityQueue
+
+DEFAULT_THREADS = (1, 4, 16)
+DEFAULT_SHARDS = (1, 4, 16)
+DEFAULT_OPERATIONS = 20000
+
+
+class GloballyLockedQueue:
+    # What the concurrent queue replaces: every call behind the same lock
+    def __init__(self):
+        self.queue = IndexedPriorityQueue()
+        self.lock = Lock()
+
+    def push(self, key, priority):
+        with self.lock:
+            self.queue.push(key, priority)
+
+    def update(self, key, priority):
+        with self.lock:
+            self.queue.update(key, priority)
+
+    def delete(self, key):
+        with self.lock:
+            return self.queue.delete(key)
+
+    def pop(self, block=False):
+        with self.lock:
+            return self.queue.pop()
+
+
+def work(queue, thread: int, operations: int, barrier: Barrier) -> None:
+    # Each thread owns a range of keys: it pushes them, updates and deletes
+    # some of them, and then pops half as many items as it has pushed
+    random = Random(thread)
+    keys = range(thread * operations, (thread + 1) * operations)
+
+    barrier.wait()
+
+    for key in keys:
+        queue.push(key, random.random())
+
+    # Other threads may have popped the key, or emptied the queue, already
+    for key in keys[::4]:
+        try:
+            queue.update(key, random.random())
+        except KeyError:
+            pass
+
+    for key in keys[1::4]:
+        try:
+            queue.delete(key)
+        except KeyError:
+            pass
+
+    for _ in range(len(keys) // 2):
+        try:
+            queue.pop(block=False)
+        except (Empty, IndexError):
+            pass
+
+
+def benchmark_threads(queue_factory, threads: int, operations: int) -> float:
+    """
+    Returns the number of operations per second of all the threads together.
+    """
+    queue = queue_factory()
+    barrier = Barrier(threads + 1)
+
+    workers = [
+        Thread(target=work, args=(queue, thread, operations, barrier))
+        for thread in range(threads)
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    start = perf_counter()
+
+    for worker in workers:
+        worker.join()
+
+    elapsed = perf_counter() - start
+
+    # Pushes, updates, deletes and pops
+    total = threads * (operations + operations // 4 * 2 + operations // 2)
+
+    return total / elapsed
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=DEFAULT_THREADS)
+    parser.add_argument("--shards", type=int, nargs="+", default=DEFAULT_SHARDS)
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS)
+    args = parser.parse_args(argv)
+
+    factories = {"global lock": GloballyLockedQueue}
+
+    for shards in args.shards:
+        for exact in (True, False):
+            name = f"{shards} shards, {'exact' if exact else 'approximate'}"
+            factories[name] = lambda shards=shards, exact=exact: (
+                ConcurrentIndexedPriorityQueue(shards, exact)
+            )
+
+    print("ops/sec, per number of threads")
+    print(f"{'':>28}" + "".join(f"{threads:>10}" for threads in args.threads))
+
+    for name, factory in factories.items():
+        results = [
+            benchmark_threads(factory, threads, args.operations)
+            for threads in args.threads
+        ]
+        print(f"{name:>28}" + "".join(f"{result:>10.0f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
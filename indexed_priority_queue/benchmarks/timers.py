@@ -0,0 +1,124 @@
+"""
+Compares TimerWheel with a plain IndexedPriorityQueue as a connection timeout
+manager, where nearly every deadline is rescheduled or cancelled before it
+fires.
+
+    python -m indexed_priority_queue.benchmarks.timers --connections 100000
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+from typing import Hashable, List, Sequence
+
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+from indexed_priority_queue.wheel import TimerWheel
+
+DEFAULT_SIZE = 10**6
+DEFAULT_CONNECTIONS = (1000, 100000)
+DEFAULT_TIMEOUT = 30000  # In ticks, such as milliseconds
+
+
+class HeapTimers:
+    """
+    The same interface as TimerWheel, on a plain indexed heap.
+    """
+
+    def __init__(self):
+        self.queue = IndexedPriorityQueue()
+        self.schedule = self.queue.push
+        self.reschedule = self.queue.update
+        self.cancel = self.queue.delete
+
+    def expire(self, now: int) -> List[Hashable]:
+        queue = self.queue
+        due = []
+
+        while queue and queue.peek()[1] <= now:
+            due.append(queue.pop()[0])
+
+        return due
+
+
+def timeout_trace(size: int, random: Random, connections: int, timeout: int):
+    # Each operation is activity on a connection, which pushes its deadline
+    # back, a connection closing and another one opening, or the clock
+    # moving one tick forward. Deadlines are integers, so both engines
+    # expire the same connections.
+    trace = [("schedule", key, timeout) for key in range(connections)]
+
+    # Simulates the trace to know the clock and the open connections
+    timers = HeapTimers()
+
+    for operation in trace:
+        timers.schedule(*operation[1:])
+
+    now = 0
+    next_key = connections
+
+    for _ in range(size):
+        operation = random.random()
+
+        if operation < 0.8:
+            key = timers.queue.key(random.randrange(len(timers.queue)))
+            timers.reschedule(key, now + timeout)
+            trace.append(("reschedule", key, now + timeout))
+        elif operation < 0.9:
+            key = timers.queue.key(random.randrange(len(timers.queue)))
+            timers.cancel(key)
+            trace.append(("cancel", key))
+        else:
+            now += 1
+            trace.append(("expire", now))
+
+            # Expired and closed connections are replaced with new ones
+            timers.expire(now)
+
+        while len(timers.queue) < connections:
+            timers.schedule(next_key, now + timeout)
+            trace.append(("schedule", next_key, now + timeout))
+            next_key += 1
+
+    return trace
+
+
+def replay(timers, trace) -> float:
+    methods = {
+        name: getattr(timers, name)
+        for name in ("schedule", "reschedule", "cancel", "expire")
+    }
+
+    start = perf_counter()
+
+    for name, *arguments in trace:
+        methods[name](*arguments)
+
+    return perf_counter() - start
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument(
+        "--connections", type=int, nargs="+", default=DEFAULT_CONNECTIONS
+    )
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    engines = {"heap": HeapTimers, "wheel": TimerWheel}
+
+    print("ns/op, per number of connections")
+    print(f"{'':>10}" + "".join(f"{count:>10}" for count in args.connections))
+
+    traces = [
+        timeout_trace(args.size, Random(0), connections, args.timeout)
+        for connections in args.connections
+    ]
+
+    for name, factory in engines.items():
+        results = [replay(factory(), trace) / len(trace) * 1e9 for trace in traces]
+        print(f"{name:>10}" + "".join(f"{result:>10.0f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Operation traces. A trace is a list of operations, each one a tuple whose
+first item is the name of a queue method and the rest its arguments:
+
+    ("push", key, priority), ("pop",), ("update", key, priority), ("delete", key)
+
+Traces are either generated synthetically or recorded from a real workload
+with TraceRecorder, and stored as JSON lines, so keys and priorities have to
+be JSON scalars (strings, numbers).
+"""
+
+import json
+from random import Random
+from time import perf_counter
+from typing import List, Tuple
+
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+
+Operation = Tuple
+Trace = List[Operation]
+
+
+def push_heavy_trace(size: int, random: Random) -> Trace:
+    # Three pushes for every pop
+    trace = []
+
+    for key in range(size):
+        trace.append(("push", key, random.random()))
+
+        if key % 3 == 2:
+            trace.append(("pop",))
+
+    return trace
+
+
+def pop_heavy_trace(size: int, random: Random) -> Trace:
+    # Fills the queue and then drains it
+    trace = [("push", key, random.random()) for key in range(size)]
+    trace.extend(("pop",) for _ in range(size))
+    return trace
+
+
+def decrease_key_heavy_trace(size: int, random: Random, updates: int = 8) -> Trace:
+    # Dijkstra-like relaxations: keys are pushed, then have their priority
+    # lowered several times, and are eventually popped
+    trace = [("push", key, random.random() + updates) for key in range(size)]
+
+    # Simulates the trace to know which keys are still in the queue
+    queue = IndexedPriorityQueue.from_items(operation[1:] for operation in trace)
+
+    for _ in range(updates * size):
+        key = random.randrange(size)
+
+        if key in queue:
+            priority = queue.priority(key) - random.random()
+            queue.update(key, priority)
+            trace.append(("update", key, priority))
+
+        if queue and random.random() < 1 / updates:
+            queue.pop()
+            trace.append(("pop",))
+
+    return trace
+
+
+def discrete_event_trace(
+    size: int, random: Random, pending: int = 1000, max_delay: int = 100
+) -> Trace:
+    # A discrete-event simulation ("hold" model): about "pending" events are
+    # scheduled at integer times; popping the next one advances the clock and
+    # schedules a new one. Some events are rescheduled or cancelled. Times
+    # never go below the last popped one.
+    trace = []
+
+    # Simulates the trace to know the clock and the scheduled events
+    queue = IndexedPriorityQueue()
+    now = 0
+
+    for key in range(size):
+        if len(queue) >= pending:
+            operation = random.random()
+            scheduled_key = queue.key(random.randrange(len(queue)))
+
+            # Events due now may have been popped already by engines that
+            # break ties differently: only later ones are changed
+            if operation < 0.15 and not queue.priority(scheduled_key) > now:
+                operation = 1
+
+            if operation < 0.1:
+                time = now + random.randint(1, max_delay)
+                queue.update(scheduled_key, time)
+                trace.append(("update", scheduled_key, time))
+            elif operation < 0.15:
+                queue.delete(scheduled_key)
+                trace.append(("delete", scheduled_key))
+            else:
+                _, now = queue.pop()
+                trace.append(("pop",))
+
+        time = now + random.randint(1, max_delay)
+        queue.push(key, time)
+        trace.append(("push", key, time))
+
+    return trace
+
+
+def uniform_trace(size: int, random: Random) -> Trace:
+    # A random mix of every operation on uniform random priorities
+    trace = []
+
+    # Simulates the trace to know which keys are in the queue
+    queue = IndexedPriorityQueue()
+
+    for key in range(size):
+        operation = random.random()
+
+        if operation < 0.4 or not queue:
+            priority = random.random()
+            queue.push(key, priority)
+            trace.append(("push", key, priority))
+        elif operation < 0.6:
+            queue.pop()
+            trace.append(("pop",))
+        elif operation < 0.85:
+            queued_key = queue.key(random.randrange(len(queue)))
+            priority = random.random()
+            queue.update(queued_key, priority)
+            trace.append(("update", queued_key, priority))
+        else:
+            queued_key = queue.key(random.randrange(len(queue)))
+            queue.delete(queued_key)
+            trace.append(("delete", queued_key))
+
+    return trace
+
+
+def dijkstra_trace(size: int, random: Random, degree: int = 4) -> Trace:
+    # Dijkstra's algorithm on a random directed graph of "size" nodes, each
+    # with "degree" edges of random weights, plus a ring that connects them
+    # all. Updates are decrease-key relaxations.
+    edges = [
+        [((node + 1) % size, random.random())]
+        + [(random.randrange(size), random.random()) for _ in range(degree - 1)]
+        for node in range(size)
+    ]
+
+    trace = [("push", 0, 0.0)]
+    queue = IndexedPriorityQueue.from_items([(0, 0.0)])
+    visited = set()
+
+    while queue:
+        node, distance = queue.pop()
+        trace.append(("pop",))
+        visited.add(node)
+
+        for neighbour, weight in edges[node]:
+            if neighbour in visited:
+                continue
+
+            new_distance = distance + weight
+
+            if neighbour not in queue:
+                queue.push(neighbour, new_distance)
+                trace.append(("push", neighbour, new_distance))
+            elif new_distance < queue.priority(neighbour):
+                queue.update(neighbour, new_distance)
+                trace.append(("update", neighbour, new_distance))
+
+    return trace
+
+
+def timer_churn_trace(
+    size: int, random: Random, timers: int = 1000, timeout: float = 30.0
+) -> Trace:
+    # Connection timeouts: about "timers" deadlines, nearly all of them
+    # pushed back by activity or cancelled before they expire. The clock
+    # moves forward, and the expired ones are popped.
+    trace = []
+
+    # Simulates the trace to know the clock and the pending deadlines
+    queue = IndexedPriorityQueue()
+    now = 0.0
+
+    for key in range(size):
+        operation = random.random()
+
+        if len(queue) < timers or operation < 0.1:
+            deadline = now + timeout + random.random()
+            queue.push(key, deadline)
+            trace.append(("push", key, deadline))
+        elif operation < 0.8:
+            queued_key = queue.key(random.randrange(len(queue)))
+            deadline = now + timeout + random.random()
+            queue.update(queued_key, deadline)
+            trace.append(("update", queued_key, deadline))
+        elif operation < 0.9:
+            queued_key = queue.key(random.randrange(len(queue)))
+            queue.delete(queued_key)
+            trace.append(("delete", queued_key))
+        else:
+            now += random.random() * timeout / timers * 10
+
+            while queue and queue.peek()[1] <= now:
+                queue.pop()
+                trace.append(("pop",))
+
+    return trace
+
+
+def top_k_trace(size: int, random: Random, k: int = 100) -> Trace:
+    # Keeps the "k" highest scores of a stream in a min-heap: every new
+    # score is pushed, and the lowest one popped once there are more than k
+    trace = []
+
+    for key in range(size):
+        trace.append(("push", key, random.random()))
+
+        if key >= k:
+            trace.append(("pop",))
+
+    return trace
+
+
+TRACES = {
+    "push-heavy": push_heavy_trace,
+    "pop-heavy": pop_heavy_trace,
+    "decrease-key-heavy": decrease_key_heavy_trace,
+    "discrete-event": discrete_event_trace,
+    "uniform": uniform_trace,
+    "dijkstra": dijkstra_trace,
+    "timer-churn": timer_churn_trace,
+    "top-k": top_k_trace,
+}
+
+
+OPERATIONS = ("push", "pop", "update", "delete")
+
+
+class TraceRecorder:
+    """
+    Wraps a queue and records every push, pop, update and delete made through
+    it. Everything else is forwarded to the queue untouched.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.trace: Trace = []
+
+    def __getattr__(self, name):
+        return getattr(self.queue, name)
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def __bool__(self) -> bool:
+        return bool(self.queue)
+
+    def __contains__(self, key) -> bool:
+        return key in self.queue
+
+    def push(self, key, priority):
+        self.trace.append(("push", key, priority))
+        return self.queue.push(key, priority)
+
+    def pop(self):
+        self.trace.append(("pop",))
+        return self.queue.pop()
+
+    def update(self, key, new_priority):
+        self.trace.append(("update", key, new_priority))
+        return self.queue.update(key, new_priority)
+
+    def delete(self, key):
+        self.trace.append(("delete", key))
+        return self.queue.delete(key)
+
+
+def save_trace(trace: Trace, path: str) -> None:
+    with open(path, "w") as file:
+        for operation in trace:
+            file.write(json.dumps(operation))
+            file.write("\n")
+
+
+def load_trace(path: str) -> Trace:
+    with open(path) as file:
+        return [tuple(json.loads(line)) for line in file if line.strip()]
+
+
+def replay(queue, trace: Trace) -> float:
+    """
+    Applies all the operations of the trace to the queue, and returns the
+    seconds it took.
+    """
+    methods = {name: getattr(queue, name) for name in OPERATIONS}
+
+    start = perf_counter()
+
+    for name, *arguments in trace:
+        methods[name](*arguments)
+
+    return perf_counter() - start
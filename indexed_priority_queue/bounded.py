@@ -0,0 +1,125 @@
+from numbers import Number
+from typing import Hashable, Iterable, List, Optional, Tuple
+
+from indexed_priority_queue.ipq import RAISE
+from indexed_priority_queue.minmax import MinMaxIndexedPriorityQueue
+
+
+class BoundedIndexedPriorityQueue(MinMaxIndexedPriorityQueue):
+    """
+    A MinMaxIndexedPriorityQueue that never holds more than "capacity" items:
+    the ones that come first (with the lowest priorities, or the highest with
+    order="max") among those seen so far, to keep the top K of a stream in
+    O(K) memory.
+
+    When it is full, push compares the new item with the worst one (the one
+    with the highest priority), which is always at hand: if the new item is
+    better, it takes the worst one's place and the worst one is returned;
+    otherwise the new item is rejected and returned itself. Either way it
+    costs O(log(K)) at most, and O(1) for rejected items.
+    """
+
+    __slots__ = ("capacity",)
+
+    def __init__(self, capacity: int, **kwargs):
+        if capacity < 0:
+            raise ValueError("The capacity can't be negative")
+
+        super().__init__(**kwargs)
+
+        self.capacity = capacity
+
+    @classmethod
+    def from_items(
+        cls, items: Iterable[Tuple[Hashable, Number]], **kwargs
+    ) -> "BoundedIndexedPriorityQueue":
+        queue = cls(**kwargs)
+        queue.push_many(items)
+        return queue
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "BoundedIndexedPriorityQueue":
+        queue = super().load(path, **kwargs)
+
+        if len(queue) > queue.capacity:
+            raise ValueError("The snapshot has more items than the capacity")
+
+        return queue
+
+    def full(self) -> bool:
+        return len(self.queue) >= self.capacity
+
+    def push(
+        self, key: Hashable, priority: Number
+    ) -> Optional[Tuple[Hashable, Number]]:
+        """
+        Returns the (key, priority) pair that was left out, if the queue was
+        full: either the evicted worst item or the new one.
+        """
+        if key in self.key_index:
+            raise KeyError("Key already exists")
+
+        if not self.full():
+            super().push(key, priority)
+            return None
+
+        if self.capacity == 0:
+            return key, priority
+
+        index = self._max_index()
+        worst_key = self.index_key[index]
+        sort_key = priority if self.sort_key is None else self.sort_key(priority)
+
+        if not sort_key < self.queue[index]:
+            return key, priority
+
+        worst_priority = self._priority(index)
+
+        del self.key_index[worst_key]
+
+        if self.key_priority is not None:
+            del self.key_priority[worst_key]
+            self.key_priority[key] = priority
+
+        self.queue[index] = sort_key
+        self.index_key[index] = key
+        self.key_index[key] = index
+
+        self._maintain_invariant(index)
+
+        return worst_key, worst_priority
+
+    def push_many(
+        self, items: Iterable[Tuple[Hashable, Number]]
+    ) -> List[Tuple[Hashable, Number]]:
+        # Returns all the pairs that were left out. Evictions can't be rolled
+        # back, so the keys are checked first.
+        items = list(items)
+        keys = {key for key, _ in items}
+
+        if len(keys) != len(items) or not self.key_index.keys().isdisjoint(keys):
+            raise KeyError("Key already exists")
+
+        push = self.push
+        left_out = []
+
+        for key, priority in items:
+            item = push(key, priority)
+
+            if item is not None:
+                left_out.append(item)
+
+        return left_out
+
+    def merge(self, other, conflict: str = RAISE) -> List[Tuple[Hashable, Number]]:
+        # Returns all the pairs that were left out, like push_many. Which can't
+        # roll back here, so the keys are checked first.
+        items = list(other.items())
+
+        if conflict == RAISE and any(key in self.key_index for key, _ in items):
+            raise KeyError("Key already exists")
+
+        return self._merge_items(items, conflict)
+
+    def _copy_heap(self, other) -> bool:
+        return len(other) <= self.capacity and super()._copy_heap(other)
@@ -0,0 +1,204 @@
+from contextlib import contextmanager
+from numbers import Number
+from queue import Empty
+from threading import Condition, Lock
+from time import monotonic
+from typing import Callable, Hashable, Iterator, Optional, Tuple
+
+from indexed_priority_queue.backend import IndexedPriorityQueue
+
+DEFAULT_SHARDS = 8
+
+
+class ConcurrentIndexedPriorityQueue:
+    """
+    A thread-safe indexed priority queue. Keys are spread across several
+    shards by hash, each one a regular queue with its own lock, so push,
+    update, delete and lookups of different keys rarely contend.
+
+    pop follows queue.PriorityQueue.get: it blocks until an item is available
+    (or the timeout expires, raising queue.Empty). When "exact" is True, pop
+    and peek lock every shard and return the global minimum. Otherwise pop
+    picks the shard whose head looked smallest without locking, and only
+    locks that one: cheaper, but the popped item may not be the global
+    minimum when other threads are changing the queue at the same time.
+    """
+
+    def __init__(
+        self,
+        shards: int = DEFAULT_SHARDS,
+        exact: bool = True,
+        queue_factory: Callable = IndexedPriorityQueue,
+    ):
+        if shards < 1:
+            raise ValueError("There must be at least one shard")
+
+        self.exact = exact
+        self.shards = [queue_factory() for _ in range(shards)]
+        self.locks = [Lock() for _ in range(shards)]
+
+        # Items in the queue minus the ones already claimed by a pop
+        self._available = 0
+        self._not_empty = Condition(Lock())
+
+    def __bool__(self) -> bool:
+        return any(self.shards)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def __contains__(self, key: Hashable) -> bool:
+        shard_index = self._shard_index(key)
+
+        with self.locks[shard_index]:
+            return key in self.shards[shard_index]
+
+    def priority(self, key: Hashable) -> Number:
+        shard_index = self._shard_index(key)
+
+        with self.locks[shard_index]:
+            return self.shards[shard_index].priority(key)
+
+    def peek(self) -> Tuple[Hashable, Number]:
+        with self._all_locks():
+            shard = self._smallest_shard()
+
+            if shard is None:
+                raise IndexError()
+
+            return shard.peek()
+
+    def push(self, key: Hashable, priority: Number) -> None:
+        shard_index = self._shard_index(key)
+
+        with self.locks[shard_index]:
+            self.shards[shard_index].push(key, priority)
+
+        with self._not_empty:
+            self._available += 1
+            self._not_empty.notify()
+
+    def pop(
+        self, block: bool = True, timeout: Optional[float] = None
+    ) -> Tuple[Hashable, Number]:
+        if timeout is not None and timeout < 0:
+            raise ValueError("'timeout' must be a non-negative number")
+
+        deadline = None if timeout is None else monotonic() + timeout
+
+        while True:
+            self._claim(block, deadline)
+
+            item = self._pop_exact() if self.exact else self._pop_approximate()
+
+            if item is not None:
+                return item
+
+            # The claimed item has been deleted in the meantime
+            with self._not_empty:
+                self._available += 1
+
+    def pop_nowait(self) -> Tuple[Hashable, Number]:
+        return self.pop(block=False)
+
+    # Same names as queue.PriorityQueue, for consumers written against it
+    get = pop
+    get_nowait = pop_nowait
+
+    def delete(self, key: Hashable) -> Tuple[Hashable, Number]:
+        shard_index = self._shard_index(key)
+
+        with self.locks[shard_index]:
+            item = self.shards[shard_index].delete(key)
+
+        with self._not_empty:
+            self._available -= 1
+
+        return item
+
+    def update(self, key: Hashable, new_priority: Number) -> None:
+        shard_index = self._shard_index(key)
+
+        with self.locks[shard_index]:
+            self.shards[shard_index].update(key, new_priority)
+
+    def _shard_index(self, key: Hashable) -> int:
+        return hash(key) % len(self.shards)
+
+    def _claim(self, block: bool, deadline: Optional[float]) -> None:
+        with self._not_empty:
+            while self._available <= 0:
+                if not block:
+                    raise Empty()
+
+                if deadline is None:
+                    self._not_empty.wait()
+                else:
+                    remaining = deadline - monotonic()
+
+                    if remaining <= 0:
+                        raise Empty()
+
+                    self._not_empty.wait(remaining)
+
+            self._available -= 1
+
+    def _smallest_shard(self):
+        smallest_shard = None
+        smallest_priority = None
+
+        for shard in self.shards:
+            if shard:
+                _, priority = shard.peek()
+
+                if smallest_shard is None or priority < smallest_priority:
+                    smallest_shard = shard
+                    smallest_priority = priority
+
+        return smallest_shard
+
+    def _pop_exact(self) -> Optional[Tuple[Hashable, Number]]:
+        with self._all_locks():
+            shard = self._smallest_shard()
+
+            return None if shard is None else shard.pop()
+
+    def _pop_approximate(self) -> Optional[Tuple[Hashable, Number]]:
+        heads = []
+
+        # Unlocked reads: the heads are only a hint of where to pop from
+        for shard_index, shard in enumerate(self.shards):
+            try:
+                _, priority = shard.peek()
+            except (IndexError, KeyError):
+                continue
+
+            heads.append((priority, shard_index))
+
+        heads.sort()
+
+        shard_indexes = [shard_index for _, shard_index in heads]
+
+        # Shards that looked empty may have been pushed to in the meantime
+        shard_indexes += [i for i in range(len(self.shards)) if i not in shard_indexes]
+
+        for shard_index in shard_indexes:
+            with self.locks[shard_index]:
+                shard = self.shards[shard_index]
+
+                if shard:
+                    return shard.pop()
+
+        return None
+
+    @contextmanager
+    def _all_locks(self) -> Iterator[None]:
+        # Always in the same order, to avoid deadlocks
+        for lock in self.locks:
+            lock.acquire()
+
+        try:
+            yield
+        finally:
+            for lock in reversed(self.locks):
+                lock.release()
@@ -0,0 +1,108 @@
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+
+DEFAULT_ARITY = 4
+
+
+class DaryIndexedPriorityQueue(IndexedPriorityQueue):
+    """
+    Same as IndexedPriorityQueue, but every node of the heap has up to "arity"
+    children instead of two. Wider nodes make the heap shallower, so pushes
+    and decrease-key updates move through fewer levels, while pops compare
+    more children per level.
+    """
+
+    __slots__ = ("arity",)
+
+    def __init__(self, arity: int = DEFAULT_ARITY, **kwargs):
+        if arity < 2:
+            raise ValueError("The arity must be at least 2")
+
+        super().__init__(**kwargs)
+
+        self.arity = arity
+
+    def _maintain_invariant(self, index: int) -> None:
+        if index > 0 and self.queue[index] < self.queue[(index - 1) // self.arity]:
+            self._move_up(index)
+        else:
+            self._move_down(index)
+
+    def _heapify(self) -> None:
+        move_down = self._move_down
+
+        for index in reversed(range((len(self.queue) + self.arity - 2) // self.arity)):
+            move_down(index)
+
+    def _move_up(self, index: int) -> int:
+        queue = self.queue
+        index_key = self.index_key
+        key_index = self.key_index
+        arity = self.arity
+
+        priority = queue[index]
+        key = index_key[index]
+
+        try:
+            while index > 0:
+                parent_index = (index - 1) // arity
+                parent_priority = queue[parent_index]
+
+                if not priority < parent_priority:
+                    break
+
+                parent_key = index_key[parent_index]
+                queue[index] = parent_priority
+                index_key[index] = parent_key
+                key_index[parent_key] = index
+
+                index = parent_index
+        finally:
+            queue[index] = priority
+            index_key[index] = key
+            key_index[key] = index
+
+        return index
+
+    def _move_down(self, index: int) -> int:
+        queue = self.queue
+        index_key = self.index_key
+        key_index = self.key_index
+        arity = self.arity
+
+        size = len(queue)
+        priority = queue[index]
+        key = index_key[index]
+
+        first_child_index = arity * index + 1
+
+        try:
+            while first_child_index < size:
+                # Finds the smallest child
+                child_index = first_child_index
+                child_priority = queue[child_index]
+
+                for sibling_index in range(
+                    first_child_index + 1, min(first_child_index + arity, size)
+                ):
+                    sibling_priority = queue[sibling_index]
+
+                    if sibling_priority < child_priority:
+                        child_index = sibling_index
+                        child_priority = sibling_priority
+
+                if not child_priority < priority:
+                    break
+
+                child_key = index_key[child_index]
+                queue[index] = child_priority
+                index_key[index] = child_key
+                key_index[child_key] = index
+
+                index = child_index
+                first_child_index = arity * index + 1
+        finally:
+            queue[index] = priority
+            index_key[index] = key
+            key_index[key] = index
+
+        return index
@@ -0,0 +1,513 @@
+import sys
+from array import array
+from heapq import heappop, heappush
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple
+
+from indexed_priority_queue import snapshot
+from indexed_priority_queue.ipq import (
+    DELETE_MANY_HEAPIFY_RATIO,
+    POP_MANY_SORT_RATIO,
+    UPDATE_MANY_HEAPIFY_RATIO,
+)
+from indexed_priority_queue.views import ItemsView
+
+# Position of the keys that are not in the queue
+ABSENT = -1
+
+
+class DenseIndexedPriorityQueue:
+    """
+    An indexed priority queue specialised for dense integer keys, in the range
+    0..capacity - 1, and float priorities. Instead of a dict and lists of
+    boxed objects, it keeps three preallocated typed arrays:
+
+    - heap: the key stored in each slot of the binary heap
+    - positions: the slot of each key in the heap, or -1
+    - priorities: the priority of each key, as a C double
+
+    which is 24 bytes per key of capacity. The priorities are indexed by key,
+    so sifting only moves keys around.
+    """
+
+    __slots__ = ("capacity", "heap", "positions", "priorities_", "size")
+
+    arity = 2
+
+    def __init__(self, capacity: int):
+        if capacity < 0:
+            raise ValueError("The capacity can't be negative")
+
+        self.capacity = capacity
+        self.heap = array("q", [0]) * capacity  # index in heap -> key
+        self.positions = array("q", [ABSENT]) * capacity  # key -> index in heap
+        self.priorities_ = array("d", [0.0]) * capacity  # key -> priority
+        self.size = 0
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> "DenseIndexedPriorityQueue":
+        """
+        Restores a snapshot written by save(), as is: nothing is sifted. With
+        "mmap", the arrays are views over a private memory map of the file
+        instead of copies, so the queue is usable right away, pages are read
+        on demand, and worker processes that load the same file share them
+        until they modify them. Changes never reach the file.
+        """
+        header, buffer = snapshot.read_snapshot(path, copy_on_write=mmap)
+
+        if header.layout != snapshot.DENSE_LAYOUT:
+            raise ValueError("Not a DenseIndexedPriorityQueue snapshot")
+
+        queue = cls(0)
+        queue.capacity = header.capacity
+        queue.size = header.size
+
+        offset = snapshot.first_section()
+        length = header.capacity * 8
+        arrays = []
+
+        for typecode in ("q", "q", "d"):
+            end = offset + length
+            section = buffer[offset:end]
+
+            if mmap and sys.byteorder == "little":
+                arrays.append(section.cast(typecode))
+            else:
+                values = array(typecode)
+                values.frombytes(section)
+                arrays.append(snapshot.little_endian(values))
+
+            offset = snapshot.align(end)
+
+        queue.heap, queue.positions, queue.priorities_ = arrays
+
+        return queue
+
+    def save(self, path: str) -> None:
+        # Writes the three arrays as they are, see the snapshot module
+        header = snapshot.Header(
+            snapshot.DENSE_LAYOUT,
+            snapshot.FLOAT,
+            snapshot.INT,
+            self.arity,
+            self.size,
+            self.capacity,
+        )
+
+        snapshot.write_snapshot(
+            path,
+            header,
+            [
+                snapshot.raw_values(self.heap, "q"),
+                snapshot.raw_values(self.positions, "q"),
+                snapshot.raw_values(self.priorities_, "d"),
+            ],
+        )
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key: int) -> bool:
+        return self._is_in_range(key) and self.positions[key] != ABSENT
+
+    def __iter__(self) -> Iterator[Tuple[int, float]]:
+        # In priority order, lazily and without changing the queue, like
+        # IndexedPriorityQueue.__iter__
+        heap = self.heap
+        priorities = self.priorities_
+        size = self.size
+
+        frontier = [(priorities[heap[0]], 0)] if size else []
+
+        while frontier:
+            priority, index = heappop(frontier)
+
+            yield heap[index], priority
+
+            if self.size != size:
+                raise RuntimeError("The queue changed size during iteration")
+
+            for child_index in range(2 * index + 1, min(2 * index + 3, size)):
+                heappush(frontier, (priorities[heap[child_index]], child_index))
+
+    def items(self) -> ItemsView:
+        return ItemsView(self, self._iter_items)
+
+    def index(self, key: int) -> int:
+        self._check_contains(key)
+        return self.positions[key]
+
+    def key(self, index: int) -> int:
+        if not 0 <= index < self.size:
+            raise KeyError(index)
+
+        return self.heap[index]
+
+    def priority(self, key: int) -> float:
+        self._check_contains(key)
+        return self.priorities_[key]
+
+    def priorities(self, keys: Iterable[int]) -> array:
+        # Bulk read: the priorities of all the given keys, as an array of
+        # doubles
+        check_contains = self._check_contains
+        priorities = self.priorities_
+
+        result = array("d")
+
+        for key in keys:
+            check_contains(key)
+            result.append(priorities[key])
+
+        return result
+
+    def peek(self) -> Tuple[int, float]:
+        if self.size == 0:
+            raise IndexError()
+
+        key = self.heap[0]
+
+        return key, self.priorities_[key]
+
+    def peek_many(self, count: int) -> List[Tuple[int, float]]:
+        return list(islice(self, count))
+
+    def keys_below(self, threshold: float, inclusive: bool = False) -> List[int]:
+        # Same as IndexedPriorityQueue.keys_below
+        heap = self.heap
+        return [heap[index] for index in self._indexes_below(threshold, inclusive)]
+
+    def count_below(self, threshold: float, inclusive: bool = False) -> int:
+        return len(self._indexes_below(threshold, inclusive))
+
+    def pop_while(
+        self, threshold: float, inclusive: bool = False
+    ) -> List[Tuple[int, float]]:
+        # Same as IndexedPriorityQueue.pop_while: the popped slots are refilled
+        # with the last keys of the heap, and only those are sifted down, unless
+        # rebuilding the heap is cheaper
+        indexes = self._indexes_below(threshold, inclusive)
+
+        heap = self.heap
+        positions = self.positions
+        priorities = self.priorities_
+
+        popped = sorted((heap[index] for index in indexes), key=priorities.__getitem__)
+
+        if self._prefers_heapify(len(popped), DELETE_MANY_HEAPIFY_RATIO):
+            return self.delete_many(popped)
+
+        for key in popped:
+            positions[key] = ABSENT
+
+        size = self.size - len(indexes)
+        holes = sorted(index for index in indexes if index < size)
+        fillers = [
+            index
+            for index in range(size, self.size)
+            if positions[heap[index]] != ABSENT
+        ]
+
+        for hole, filler in zip(holes, fillers):
+            key = heap[filler]
+            heap[hole] = key
+            positions[key] = hole
+
+        self.size = size
+
+        move_down = self._move_down
+
+        for index in reversed(holes):
+            move_down(index)
+
+        return [(key, priorities[key]) for key in popped]
+
+    def drain(self) -> Iterator[Tuple[int, float]]:
+        while self.size:
+            yield self.pop()
+
+    def push(self, key: int, priority: float) -> None:
+        # Like the other methods, out of range keys are missing keys
+        if not self._is_in_range(key):
+            raise KeyError(key)
+
+        if self.positions[key] != ABSENT:
+            raise KeyError("Key already exists")
+
+        index = self.size
+
+        self.priorities_[key] = priority
+        self.heap[index] = key
+        self.positions[key] = index
+        self.size += 1
+
+        self._move_up(index)
+
+    def pop(self) -> Tuple[int, float]:
+        if self.size == 0:
+            raise IndexError()
+
+        key = self.heap[0]
+
+        self._remove(0)
+
+        return key, self.priorities_[key]
+
+    def delete(self, key: int) -> Tuple[int, float]:
+        self._check_contains(key)
+
+        self._remove(self.positions[key])
+
+        return key, self.priorities_[key]
+
+    def update(self, key: int, new_priority: float) -> None:
+        self._check_contains(key)
+
+        old_priority = self.priorities_[key]
+        self.priorities_[key] = new_priority
+        new_priority = self.priorities_[key]  # As rounded to a double
+
+        if new_priority < old_priority:
+            self._move_up(self.positions[key])
+        elif old_priority < new_priority:
+            self._move_down(self.positions[key])
+
+    def update_many(self, keys: Iterable[int], priorities: Iterable[float]) -> None:
+        # Both sequences are validated before anything changes. A batch that
+        # touches a large share of the heap is written at once and heapified,
+        # otherwise each key is sifted from its slot.
+        keys = array("q", keys)
+        priorities = array("d", priorities)
+
+        if len(keys) != len(priorities):
+            raise ValueError("keys and priorities must have the same length")
+
+        check_contains = self._check_contains
+
+        for key in keys:
+            check_contains(key)
+
+        own_priorities = self.priorities_
+
+        if self._prefers_heapify(len(keys), UPDATE_MANY_HEAPIFY_RATIO):
+            for key, priority in zip(keys, priorities):
+                own_priorities[key] = priority
+
+            self._heapify()
+            return
+
+        positions = self.positions
+        move_up = self._move_up
+        move_down = self._move_down
+
+        for key, priority in zip(keys, priorities):
+            old_priority = own_priorities[key]
+            own_priorities[key] = priority
+
+            if priority < old_priority:
+                move_up(positions[key])
+            elif old_priority < priority:
+                move_down(positions[key])
+
+    def delete_many(self, keys: Iterable[int]) -> List[Tuple[int, float]]:
+        keys = array("q", keys)
+
+        for key in keys:
+            self._check_contains(key)
+
+        if len(set(keys)) != len(keys):
+            raise KeyError("Duplicated keys")
+
+        if not self._prefers_heapify(len(keys), DELETE_MANY_HEAPIFY_RATIO):
+            delete = self.delete
+            return [delete(key) for key in keys]
+
+        heap = self.heap
+        positions = self.positions
+
+        for key in keys:
+            positions[key] = ABSENT
+
+        # Compacts the remaining keys at the start of the heap
+        size = 0
+
+        for index in range(self.size):
+            key = heap[index]
+
+            if positions[key] != ABSENT:
+                heap[size] = key
+                positions[key] = size
+                size += 1
+
+        self.size = size
+        self._heapify()
+
+        return [(key, self.priorities_[key]) for key in keys]
+
+    def pop_many(self, count: int) -> List[Tuple[int, float]]:
+        count = min(count, self.size)
+
+        if not self._prefers_heapify(count, POP_MANY_SORT_RATIO):
+            pop = self.pop
+            return [pop() for _ in range(count)]
+
+        # A sorted heap is still a valid heap
+        priorities = self.priorities_
+        positions = self.positions
+        heap = self.heap
+
+        ordered = sorted(heap[: self.size], key=priorities.__getitem__)
+
+        for index, key in enumerate(ordered[count:]):
+            heap[index] = key
+            positions[key] = index
+
+        for key in ordered[:count]:
+            positions[key] = ABSENT
+
+        self.size -= count
+
+        return [(key, priorities[key]) for key in ordered[:count]]
+
+    def _iter_items(self) -> Iterator[Tuple[int, float]]:
+        heap = self.heap
+        priorities = self.priorities_
+
+        for index in range(self.size):
+            key = heap[index]
+            yield key, priorities[key]
+
+    def _prefers_heapify(self, count: int, ratio: float) -> bool:
+        return count > 1 and count >= self.size * ratio
+
+    def _indexes_below(self, threshold: float, inclusive: bool) -> List[int]:
+        # Depth-first from the root, only expanding the slots that qualify
+        heap = self.heap
+        priorities = self.priorities_
+        size = self.size
+
+        indexes = []
+        stack = [0] if size else []
+
+        while stack:
+            index = stack.pop()
+            priority = priorities[heap[index]]
+
+            if priority < threshold or inclusive and priority == threshold:
+                indexes.append(index)
+
+                child_index = 2 * index + 1
+
+                if child_index < size:
+                    stack.append(child_index)
+
+                    if child_index + 1 < size:
+                        stack.append(child_index + 1)
+
+        return indexes
+
+    def _is_in_range(self, key: int) -> bool:
+        # Keys that aren't ints are out of range too
+        return isinstance(key, int) and 0 <= key < self.capacity
+
+    def _check_contains(self, key: int) -> None:
+        if not (self._is_in_range(key) and self.positions[key] != ABSENT):
+            raise KeyError(key)
+
+    def _remove(self, index: int) -> None:
+        heap = self.heap
+
+        key = heap[index]
+        self.positions[key] = ABSENT
+        self.size -= 1
+
+        last_index = self.size
+
+        if index == last_index:
+            return
+
+        last_key = heap[last_index]
+        heap[index] = last_key
+        self.positions[last_key] = index
+
+        if (
+            index > 0
+            and self.priorities_[last_key] < self.priorities_[heap[(index - 1) >> 1]]
+        ):
+            self._move_up(index)
+        else:
+            self._move_down(index)
+
+    def _heapify(self) -> None:
+        move_down = self._move_down
+
+        for index in reversed(range(self.size // 2)):
+            move_down(index)
+
+    def _move_up(self, index: int) -> int:
+        heap = self.heap
+        positions = self.positions
+        priorities = self.priorities_
+
+        key = heap[index]
+        priority = priorities[key]
+
+        while index > 0:
+            parent_index = (index - 1) >> 1
+            parent_key = heap[parent_index]
+
+            if not priority < priorities[parent_key]:
+                break
+
+            heap[index] = parent_key
+            positions[parent_key] = index
+
+            index = parent_index
+
+        heap[index] = key
+        positions[key] = index
+
+        return index
+
+    def _move_down(self, index: int) -> int:
+        heap = self.heap
+        positions = self.positions
+        priorities = self.priorities_
+
+        size = self.size
+        key = heap[index]
+        priority = priorities[key]
+
+        child_index = 2 * index + 1
+
+        while child_index < size:
+            child_key = heap[child_index]
+            child_priority = priorities[child_key]
+
+            right_child_index = child_index + 1
+
+            if right_child_index < size:
+                right_child_key = heap[right_child_index]
+                right_child_priority = priorities[right_child_key]
+
+                if right_child_priority < child_priority:
+                    child_index = right_child_index
+                    child_key = right_child_key
+                    child_priority = right_child_priority
+
+            if not child_priority < priority:
+                break
+
+            heap[index] = child_key
+            positions[child_key] = index
+
+            index = child_index
+            child_index = 2 * index + 1
+
+        heap[index] = key
+        positions[key] = index
+
+        return index
@@ -0,0 +1,219 @@
+from numbers import Number
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple
+
+from indexed_priority_queue.backend import IndexedPriorityQueue
+
+
+class GroupedIndexedPriorityQueue:
+    """
+    Indexed priority queues by group (such as one per tenant), with a global
+    pop. Each group has its own queue, and a top-level queue holds the head
+    priority of each group, so the global head is found in O(1), and popped
+    in O(log(groups) + log(group size)). The top level is only updated when
+    the head of a group changes. Keys are unique within their group, and
+    empty groups are dropped.
+
+    A group can have a quota: the number of items that the global pop takes
+    from it per round. Once a group has used up its quota it waits, and when
+    every group with a quota and items has used it up, a new round starts and
+    all the quotas are reset. Within a round, pop follows the priorities.
+    Groups without a quota are never held back, nor do they hold back a new
+    round; pop(group) doesn't count against quotas.
+
+    "queue_factory" makes both the queues of the groups and the top-level
+    one, so they compare priorities in the same way.
+    """
+
+    def __init__(
+        self,
+        default_quota: Optional[int] = None,
+        queue_factory: Callable = IndexedPriorityQueue,
+    ):
+        _check_quota(default_quota)
+
+        self.default_quota = default_quota
+        self.queue_factory = queue_factory
+
+        self.groups: Dict[Hashable, IndexedPriorityQueue] = {}  # Non-empty only
+        self.heads = queue_factory()  # group -> head priority, of the available
+
+        self.quotas: Dict[Hashable, Optional[int]] = {}  # Only if not the default
+        self.used: Dict[Hashable, int] = {}  # group -> pops in this round
+        self.exhausted: Set[Hashable] = set()  # Groups out of quota
+        self.limited: Set[Hashable] = set()  # Available groups with a quota
+
+        self._size = 0
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, group_key: Tuple[Hashable, Hashable]) -> bool:
+        group, key = group_key
+        queue = self.groups.get(group)
+        return queue is not None and key in queue
+
+    def group_size(self, group: Hashable) -> int:
+        queue = self.groups.get(group)
+        return 0 if queue is None else len(queue)
+
+    def quota(self, group: Hashable) -> Optional[int]:
+        return self.quotas.get(group, self.default_quota)
+
+    def set_quota(self, group: Hashable, quota: Optional[int]) -> None:
+        """
+        Sets the number of items per round of the group, or None for no limit.
+        It applies to the current round too.
+        """
+        _check_quota(quota)
+
+        if quota == self.default_quota:
+            self.quotas.pop(group, None)
+        else:
+            self.quotas[group] = quota
+
+        if quota is not None and self.used.get(group, 0) >= quota:
+            self.exhausted.add(group)
+            self.limited.discard(group)
+
+            if group in self.heads:
+                self.heads.delete(group)
+
+        elif group in self.exhausted:
+            self.exhausted.remove(group)
+            self._refresh(group)
+
+        elif group in self.heads:
+            if quota is None:
+                self.limited.discard(group)
+            else:
+                self.limited.add(group)
+
+    def priority(self, group: Hashable, key: Hashable) -> Number:
+        return self._group(group).priority(key)
+
+    def peek(
+        self, group: Optional[Hashable] = None
+    ) -> Tuple[Hashable, Hashable, Number]:
+        """
+        The (group, key, priority) of the head of the group, or of the next
+        item that pop() would return if no group is given.
+        """
+        if group is None:
+            group = self._next_group()
+
+        return (group, *self._group(group).peek())
+
+    def push(self, group: Hashable, key: Hashable, priority: Number) -> None:
+        if group is None:
+            raise ValueError("None can't be a group")
+
+        queue = self.groups.get(group)
+
+        if queue is None:
+            queue = self.groups[group] = self.queue_factory()
+
+        queue.push(key, priority)
+        self._size += 1
+
+        self._refresh(group)
+
+    def pop(
+        self, group: Optional[Hashable] = None
+    ) -> Tuple[Hashable, Hashable, Number]:
+        """
+        Pops the head of the group, or of the group with the best head among
+        those with quota left if no group is given. Returns (group, key,
+        priority).
+        """
+        if group is None:
+            group = self._next_group()
+
+            used = self.used[group] = self.used.get(group, 0) + 1
+            quota = self.quota(group)
+
+            if quota is not None and used >= quota:
+                self.exhausted.add(group)
+                self.limited.discard(group)
+                self.heads.delete(group)
+
+        key, priority = self._group(group).pop()
+        self._size -= 1
+
+        self._refresh(group)
+
+        return group, key, priority
+
+    def update(self, group: Hashable, key: Hashable, new_priority: Number) -> None:
+        self._group(group).update(key, new_priority)
+        self._refresh(group)
+
+    def delete(self, group: Hashable, key: Hashable) -> Tuple[Hashable, Number]:
+        item = self._group(group).delete(key)
+        self._size -= 1
+
+        self._refresh(group)
+
+        return item
+
+    def _group(self, group: Hashable) -> IndexedPriorityQueue:
+        queue = self.groups.get(group)
+
+        if queue is None:
+            raise KeyError(group)
+
+        return queue
+
+    def _next_group(self) -> Hashable:
+        # Groups without a quota don't hold back a new round
+        if self.exhausted and not self.limited:
+            self._new_round()
+
+        if not self.heads:
+            raise IndexError()
+
+        return self.heads.peek()[0]
+
+    def _new_round(self) -> None:
+        exhausted = self.exhausted
+
+        self.used.clear()
+        self.exhausted = set()
+
+        for group in exhausted:
+            self._refresh(group)
+
+    def _refresh(self, group: Hashable) -> None:
+        # Brings the top level up to date with the head of the group, after
+        # any change to it
+        queue = self.groups.get(group)
+        heads = self.heads
+
+        if not queue:
+            self.groups.pop(group, None)
+            self.limited.discard(group)
+
+            if group in heads:
+                heads.delete(group)
+
+            return
+
+        if group in self.exhausted:
+            return
+
+        _, priority = queue.peek()
+
+        if group not in heads:
+            heads.push(group, priority)
+
+            if self.quota(group) is not None:
+                self.limited.add(group)
+        elif heads.priority(group) != priority:
+            heads.update(group, priority)
+
+
+def _check_quota(quota: Optional[int]) -> None:
+    if quota is not None and quota < 1:
+        raise ValueError("The quota must be at least 1")
@@ -0,0 +1,192 @@
+"""
+Opt-in instrumentation of the array heaps, see
+IndexedPriorityQueue.enable_stats. Instead of checking a flag on every call,
+enabling it swaps the class of the queue for a subclass whose methods count
+and time the calls before running the original ones, so a queue without
+stats runs exactly the same code as before.
+"""
+
+from collections import Counter
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, List
+
+DEFAULT_SAMPLE_EVERY = 100
+
+# The operations that are counted and timed
+OPERATIONS = (
+    "push",
+    "pop",
+    "peek",
+    "update",
+    "delete",
+    "push_many",
+    "pop_many",
+    "update_many",
+    "delete_many",
+    "merge",
+)
+
+_instrumented_classes: Dict[type, type] = {}
+
+
+class Stats:
+    """
+    What an instrumented queue has recorded so far.
+    """
+
+    __slots__ = (
+        "sample_every",
+        "calls",
+        "levels_up",
+        "levels_down",
+        "times",
+        "running",
+    )
+
+    def __init__(self, sample_every: int = DEFAULT_SAMPLE_EVERY):
+        if sample_every < 1:
+            raise ValueError("'sample_every' must be at least 1")
+
+        self.sample_every = sample_every
+        self.calls: Counter = Counter()  # operation -> calls
+
+        # Histograms: levels moved -> number of sifts
+        self.levels_up: Counter = Counter()
+        self.levels_down: Counter = Counter()
+
+        # operation -> [timed calls, total seconds, max seconds]
+        self.times: Dict[str, List[float]] = {}
+
+        self.running = False  # Whether an operation is being recorded
+
+    def record_time(self, operation: str, seconds: float) -> None:
+        times = self.times.get(operation)
+
+        if times is None:
+            self.times[operation] = [1, seconds, seconds]
+        else:
+            times[0] += 1
+            times[1] += seconds
+            times[2] = max(times[2], seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(self.calls),
+            "levels_up": dict(sorted(self.levels_up.items())),
+            "levels_down": dict(sorted(self.levels_down.items())),
+            "times": {
+                operation: {
+                    "samples": samples,
+                    "mean": total / samples,
+                    "max": maximum,
+                }
+                for operation, (samples, total, maximum) in self.times.items()
+            },
+        }
+
+
+def depth(index: int, arity: int) -> int:
+    # The level of the heap slot, 0 being the root
+    if arity == 2:
+        return (index + 1).bit_length() - 1
+
+    levels = 0
+
+    while index > 0:
+        index = (index - 1) // arity
+        levels += 1
+
+    return levels
+
+
+def instrumented_class(cls: type) -> type:
+    """
+    The subclass of a heap class that records stats. It keeps the slots of
+    the class, so instances can switch between both.
+    """
+    if "uninstrumented" in cls.__dict__:
+        return cls
+
+    instrumented = _instrumented_classes.get(cls)
+
+    if instrumented is None:
+        namespace = {
+            "__slots__": (),
+            "__module__": cls.__module__,
+            "uninstrumented": cls,
+            "stats": _stats,
+            "_move_up": _sift(cls._move_up, "levels_up"),
+            "_move_down": _sift(cls._move_down, "levels_down"),
+            "_heapify": _heapify,
+        }
+
+        for operation in OPERATIONS:
+            namespace[operation] = _timed(operation, getattr(cls, operation))
+
+        instrumented = type(f"Instrumented{cls.__name__}", (cls,), namespace)
+        _instrumented_classes[cls] = instrumented
+
+    return instrumented
+
+
+def _timed(operation: str, method: Callable) -> Callable:
+    # Counts every call, and times one of every "sample_every". Operations
+    # called by another one (push_many by merge, pop by a small pop_many...)
+    # are part of it, so only the outermost call is recorded.
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        stats = self._stats
+
+        if stats.running:
+            return method(self, *args, **kwargs)
+
+        calls = stats.calls
+        calls[operation] += 1
+        stats.running = True
+
+        try:
+            if calls[operation] % stats.sample_every:
+                return method(self, *args, **kwargs)
+
+            start = perf_counter()
+
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                stats.record_time(operation, perf_counter() - start)
+        finally:
+            stats.running = False
+
+    return wrapper
+
+
+def _sift(method: Callable, histogram: str) -> Callable:
+    @wraps(method)
+    def wrapper(self, index: int) -> int:
+        new_index = method(self, index)
+        levels = abs(depth(index, self.arity) - depth(new_index, self.arity))
+        getattr(self._stats, histogram)[levels] += 1
+        return new_index
+
+    return wrapper
+
+
+def _heapify(self) -> None:
+    # Bottom-up heapify sifts every internal slot: that would only blur the
+    # histograms, so it runs uninstrumented and is just counted
+    instrumented = type(self)
+    self._stats.calls["heapify"] += 1
+    self.__class__ = instrumented.uninstrumented
+
+    try:
+        self._heapify()
+    finally:
+        self.__class__ = instrumented
+
+
+def _stats(self) -> Dict[str, Any]:
+    snapshot = self._stats.snapshot()
+    snapshot["size"] = len(self)
+    snapshot["height"] = depth(len(self) - 1, self.arity) + 1 if self else 0
+    return snapshot
@@ -1,12 +1,279 @@
+from functools import partial
+from heapq import heappop, heappush
+from itertools import chain
+from itertools import count as counter
+from itertools import islice
 from numbers import Number
-from typing import Dict, Hashable, List, Tuple
+from operator import ge, gt, itemgetter, neg
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from indexed_priority_queue import snapshot
+from indexed_priority_queue.instrumentation import (
+    DEFAULT_SAMPLE_EVERY,
+    Stats,
+    instrumented_class,
+)
+from indexed_priority_queue.views import ItemsView
+
+# Share of the heap that a batch has to touch before a single O(n) re-heapify
+# (or sort, for pop_many) beats handling every item on its own. Measured with
+# benchmarks.batch on random priorities.
+PUSH_MANY_HEAPIFY_RATIO = 0.75
+UPDATE_MANY_HEAPIFY_RATIO = 0.5
+DELETE_MANY_HEAPIFY_RATIO = 0.4
+POP_MANY_SORT_RATIO = 0.15
+
+# Orders
+MIN = "min"
+MAX = "max"
+
+# What merge and union do with the keys in more than one queue: raise
+# KeyError, or keep the lowest or the highest priority
+RAISE = "raise"
+KEEP_MIN = "min"
+KEEP_MAX = "max"
+CONFLICTS = (RAISE, KEEP_MIN, KEEP_MAX)
+
+
+def make_sort_key(
+    order: str = MIN, key: Optional[Callable] = None, stable: bool = False
+) -> Optional[Callable[[Any], Any]]:
+    """
+    Returns the function that turns a priority into what the heap compares,
+    or None if that is the priority itself. "max" negates the result of
+    "key" (a number, or a tuple of them), and "stable" pairs it with an
+    insertion counter.
+    """
+    if order not in (MIN, MAX):
+        raise ValueError(f"'order' must be '{MIN}' or '{MAX}'")
+
+    if key is None and order == MIN and not stable:
+        return None
+
+    if order == MIN:
+        sort_key = key
+    elif key is None:
+        sort_key = neg
+    else:
+        sort_key = lambda priority: _negate(key(priority))  # noqa: E731
+
+    if not stable:
+        return sort_key
+
+    sequence = counter()
+
+    if sort_key is None:
+        return lambda priority: (priority, next(sequence))
+
+    return lambda priority: (sort_key(priority), next(sequence))
+
+
+def _negate(value: Any) -> Any:
+    # Reverses the order of numbers, and of tuples of the same length, item
+    # by item, so the heap still compares them natively
+    if isinstance(value, tuple):
+        return tuple(map(_negate, value))
+
+    try:
+        return -value
+    except TypeError:
+        raise TypeError(
+            "With order='max', 'key' must return numbers or tuples of numbers"
+        ) from None
+
+
+def check_conflict(conflict: str) -> None:
+    if conflict not in CONFLICTS:
+        raise ValueError(f"'conflict' must be one of {', '.join(CONFLICTS)}")
 
 
 class IndexedPriorityQueue:
-    def __init__(self):
+    """
+    A binary heap of (key, priority) pairs, indexed by key. By default the
+    lowest priority comes first and priorities are compared as they are.
+
+    With order="max", the highest one comes first instead. "key" is applied
+    once to every priority as it is pushed or updated, and the heap compares
+    its results, like the key of sorted(). With stable=True, equal priorities
+    come out in the order they were pushed (or last updated). These options
+    store what the heap compares in "queue", and the priorities apart.
+    """
+
+    __slots__ = (
+        "queue",
+        "index_key",
+        "key_index",
+        "sort_key",
+        "key_priority",
+        "stable",
+        "_stats",
+    )
+
+    arity = 2
+
+    def __init__(
+        self, order: str = MIN, key: Optional[Callable] = None, stable: bool = False
+    ):
+        # Parallel lists: the heap slot "i" holds priority queue[i] and key
+        # index_key[i]. The key -> slot dict is the only hash table.
         self.queue: List[Number] = []
+        self.index_key: List[Hashable] = []  # index in heap -> key
         self.key_index: Dict[Hashable, int] = {}  # key -> index in heap
-        self.index_key: Dict[int, Hashable] = {}  # index in heap -> key
+
+        # Without options, the heap compares the priorities themselves
+        self.sort_key = make_sort_key(order, key, stable)
+        self.stable = stable
+        self.key_priority: Optional[Dict[Hashable, Number]] = (
+            None if self.sort_key is None else {}
+        )
+
+    @classmethod
+    def from_items(
+        cls, items: Iterable[Tuple[Hashable, Number]], **kwargs
+    ) -> "IndexedPriorityQueue":
+        # Loads all the (key, priority) pairs first and then heapifies them
+        # bottom-up, which is O(n) instead of the O(n * log(n)) of pushing.
+        # Keyword arguments are passed to the constructor.
+        queue = cls(**kwargs)
+        queue._append(items)
+        queue._heapify()
+
+        return queue
+
+    @classmethod
+    def from_dict(
+        cls, mapping: Mapping[Hashable, Number], **kwargs
+    ) -> "IndexedPriorityQueue":
+        return cls.from_items(mapping.items(), **kwargs)
+
+    @classmethod
+    def union(cls, *queues, conflict: str = RAISE, **kwargs) -> "IndexedPriorityQueue":
+        """
+        A new queue with the pairs of all the queues, which are left as they
+        are. The biggest one is copied as is, if it is of the same kind and
+        without options, and the pairs of the rest are merged into it at once.
+        Keyword arguments are passed to the constructor.
+        """
+        check_conflict(conflict)
+
+        queue = cls(**kwargs)
+        queues = sorted(queues, key=len, reverse=True)
+
+        if queues and queue._copy_heap(queues[0]):
+            queues = queues[1:]
+
+        queue._merge_items(
+            chain.from_iterable(other.items() for other in queues), conflict
+        )
+
+        return queue
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "IndexedPriorityQueue":
+        # Restores a snapshot written by save(). The heap order is restored as
+        # it was, so nothing is sifted (unless the arity differs, or there are
+        # options). Only load trusted files: keys or priorities that are
+        # neither all ints, all floats nor all strings are unpickled.
+        header, buffer = snapshot.read_snapshot(path)
+
+        if header.layout not in (snapshot.HEAP_LAYOUT, snapshot.STABLE_HEAP_LAYOUT):
+            raise ValueError("Not an IndexedPriorityQueue snapshot")
+
+        priorities, offset = snapshot.decode_values(
+            buffer, snapshot.first_section(), header.size, header.priorities_type
+        )
+        keys, offset = snapshot.decode_values(
+            buffer, offset, header.size, header.keys_type
+        )
+
+        queue = cls(**kwargs)
+        queue.queue = priorities
+        queue.index_key = keys
+        queue.key_index = dict(zip(keys, range(len(keys))))
+
+        if len(queue.key_index) != len(keys):
+            raise ValueError("The snapshot has duplicated keys")
+
+        if queue.sort_key is not None:
+            queue.key_priority = dict(zip(keys, priorities))
+            queue.queue = [None] * len(priorities)
+            indexes = range(len(priorities))
+
+            # The sequence of a stable queue is handed out again in the order
+            # it was, so ties still come out in insertion order
+            if queue.stable and header.layout == snapshot.STABLE_HEAP_LAYOUT:
+                sequences, _ = snapshot.decode_values(
+                    buffer, offset, header.size, snapshot.INT
+                )
+                indexes = sorted(indexes, key=sequences.__getitem__)
+
+            sort_key = queue.sort_key
+
+            for index in indexes:
+                queue.queue[index] = sort_key(priorities[index])
+
+            queue._heapify()
+        elif queue.arity != header.arity:
+            queue._heapify()
+
+        return queue
+
+    def save(self, path: str) -> None:
+        # Writes a compact binary snapshot: the priorities and the keys, in heap
+        # order, and the insertion sequences if stable. See the snapshot module
+        # for the layout.
+        priorities = self._priorities()
+        priorities_type = snapshot.values_type(priorities)
+        keys_type = snapshot.values_type(self.index_key, allow_strings=True)
+
+        sections = snapshot.encode_values(priorities, priorities_type)
+        sections += snapshot.encode_values(self.index_key, keys_type)
+
+        if self.stable:
+            layout = snapshot.STABLE_HEAP_LAYOUT
+            sections += snapshot.encode_values(
+                [sequence for _, sequence in self.queue], snapshot.INT
+            )
+        else:
+            layout = snapshot.HEAP_LAYOUT
+
+        header = snapshot.Header(
+            layout,
+            priorities_type,
+            keys_type,
+            self.arity,
+            len(self.queue),
+            len(self.queue),
+        )
+
+        snapshot.write_snapshot(path, header, sections)
+
+    def enable_stats(self, sample_every: int = DEFAULT_SAMPLE_EVERY) -> None:
+        """
+        Starts recording stats, from scratch: calls per operation, histograms
+        of the levels moved by every sift, and the time of one of every
+        "sample_every" calls of each operation. See the instrumentation module.
+        """
+        self._stats = Stats(sample_every)
+        self.__class__ = instrumented_class(type(self))
+
+    def disable_stats(self) -> None:
+        self.__class__ = getattr(type(self), "uninstrumented", type(self))
+
+    def stats(self) -> Dict[str, Any]:
+        # Overridden by the instrumented classes
+        raise ValueError("Stats are not enabled, see enable_stats()")
 
     def __bool__(self) -> bool:
         return bool(self.queue)
@@ -17,70 +284,161 @@ class IndexedPriorityQueue:
     def __contains__(self, key: Hashable) -> bool:
         return key in self.key_index
 
+    def __iter__(self) -> Iterator[Tuple[Hashable, Number]]:
+        """
+        Yields the (key, priority) pairs in priority order, lazily and without
+        changing the queue. A frontier heap holds the slots whose parents have
+        been yielded, so the first k pairs cost O(k * log(k)). The queue must
+        not change during the iteration.
+        """
+        queue = self.queue
+        size = len(queue)
+
+        if size == 0:
+            return
+
+        frontier = [(queue[0], 0)]
+
+        while frontier:
+            _, index = heappop(frontier)
+
+            yield self.index_key[index], self._priority(index)
+
+            if len(queue) != size:
+                raise RuntimeError("The queue changed size during iteration")
+
+            for child_index in self._ordered_children(index):
+                heappush(frontier, (queue[child_index], child_index))
+
+    def items(self) -> ItemsView:
+        return ItemsView(self, self._iter_items)
+
     def index(self, key: Hashable) -> int:
         return self.key_index[key]
 
     def key(self, index: int) -> Hashable:
+        if not 0 <= index < len(self.index_key):
+            raise KeyError(index)
+
         return self.index_key[index]
 
     def priority(self, key: Hashable) -> Number:
         index = self.index(key)
-        return self.queue[index]
+        return self._priority(index)
 
     def peek(self) -> Tuple[Hashable, Number]:
         if len(self.queue) == 0:
             raise IndexError()
 
-        return self.key(0), self.queue[0]
+        return self.index_key[0], self._priority(0)
+
+    def peek_many(self, count: int) -> List[Tuple[Hashable, Number]]:
+        # The first "count" pairs, in order, like heapq.nsmallest
+        return list(islice(self, count))
+
+    def keys_below(self, threshold: Number, inclusive: bool = False) -> List[Hashable]:
+        """
+        The keys whose priorities come before "threshold" (are lower, for the
+        default order), or are equal to it with inclusive=True, in no
+        particular order. The slots whose parents don't qualify are never
+        visited, so it is O(k) for k keys, and the queue doesn't change.
+        """
+        index_key = self.index_key
+        return [index_key[index] for index in self._indexes_below(threshold, inclusive)]
+
+    def count_below(self, threshold: Number, inclusive: bool = False) -> int:
+        return len(self._indexes_below(threshold, inclusive))
+
+    def pop_while(
+        self, threshold: Number, inclusive: bool = False
+    ) -> List[Tuple[Hashable, Number]]:
+        """
+        Pops all the pairs that keys_below would return, in order. Instead of
+        a pop for each one, the slots that they leave are filled with the last
+        items of the heap, and only those are sifted down, which is
+        O(k * log(n)) for k pairs (or the heap is rebuilt, if k is close to n).
+        """
+        indexes = self._indexes_below(threshold, inclusive)
+
+        if not indexes:
+            return []
+
+        queue = self.queue
+        index_key = self.index_key
+        key_index = self.key_index
+
+        popped = [(index_key[index], queue[index]) for index in indexes]
+
+        for key, _ in popped:
+            del key_index[key]
+
+        if self._prefers_heapify(len(indexes), DELETE_MANY_HEAPIFY_RATIO):
+            self._compact(indexes)
+            self._heapify()
+        else:
+            self._refill(indexes)
+
+        popped.sort(key=itemgetter(1))
+
+        return self._restore_priorities(popped)
+
+    def drain(self) -> Iterator[Tuple[Hashable, Number]]:
+        # Pops the pairs one at a time, as they are consumed
+        while self.queue:
+            yield self.pop()
 
     def push(self, key: Hashable, priority: Number) -> None:
         if key in self.key_index:
             raise KeyError("Key already exists")
 
-        self.queue.append(priority)
+        # The key function may raise, so nothing changes before it returns
+        if self.sort_key is not None:
+            sort_priority = self.sort_key(priority)
+            self.key_priority[key] = priority
+            priority = sort_priority
 
-        index = len(self.queue) - 1
+        index = len(self.queue)
 
         self.key_index[key] = index
-        self.index_key[index] = key
+        self.index_key.append(key)
+        self.queue.append(priority)
 
-        self._maintain_invariant(index)
+        self._move_up(index)
 
     def pop(self) -> Tuple[Hashable, Number]:
         if len(self.queue) == 0:
             raise IndexError()
 
         if len(self.queue) == 1:
-            index = 0
-            key = self.index_key[index]
-
+            key = self.index_key.pop()
             priority = self.queue.pop()
 
-            del self.index_key[index]
             del self.key_index[key]
 
+            if self.key_priority is not None:
+                priority = self.key_priority.pop(key)
+
             return key, priority
 
-        if len(self.queue) > 1:
-            index = 0
-            key = self.index_key[index]
-            priority = self.queue[index]
+        index = 0
+        key = self.index_key[index]
+        priority = self.queue[index]
 
-            last_index = len(self.queue) - 1
-            last_key = self.index_key[last_index]
-            last_priority = self.queue.pop()
+        last_key = self.index_key.pop()
+        last_priority = self.queue.pop()
 
-            self.queue[index] = last_priority
+        self.queue[index] = last_priority
+        self.index_key[index] = last_key
 
-            del self.key_index[key]
-            del self.index_key[last_index]
+        del self.key_index[key]
+        self.key_index[last_key] = index
 
-            self.index_key[index] = last_key
-            self.key_index[last_key] = index
+        self._move_down(index)
 
-            self._maintain_invariant(0)
+        if self.key_priority is not None:
+            priority = self.key_priority.pop(key)
 
-            return key, priority
+        return key, priority
 
     def delete(self, key: Hashable) -> Tuple[Hashable, Number]:
         index = self.index(key)
@@ -91,69 +449,483 @@ class IndexedPriorityQueue:
         priority = self.queue[index]
 
         last_index = len(self.queue) - 1
-        last_key = self.index_key[last_index]
+        last_key = self.index_key.pop()
         last_priority = self.queue.pop()
 
         del self.key_index[key]
-        del self.index_key[last_index]
 
         if index != last_index:
             self.queue[index] = last_priority
+            self.index_key[index] = last_key
 
             self.key_index[last_key] = index
-            self.index_key[index] = last_key
 
             self._maintain_invariant(index)
 
+        if self.key_priority is not None:
+            priority = self.key_priority.pop(key)
+
         return key, priority
 
     def update(self, key: Hashable, new_priority: Number) -> None:
         index = self.index(key)
 
+        if self.sort_key is not None:
+            sort_priority = self.sort_key(new_priority)
+            self.key_priority[key] = new_priority
+            new_priority = sort_priority
+
+        old_priority = self.queue[index]
         self.queue[index] = new_priority
 
-        self._maintain_invariant(index)
+        if new_priority < old_priority:
+            self._move_up(index)
+        elif old_priority < new_priority:
+            self._move_down(index)
 
-    def _maintain_invariant(self, index: int) -> None:
-        self._move_down(index)
-        self._move_up(index)
+    def push_many(self, items: Iterable[Tuple[Hashable, Number]]) -> None:
+        size = len(self.queue)
+
+        self._append(items)
+
+        appended = self.index_key[size:]
+
+        try:
+            if self._prefers_heapify(len(appended), PUSH_MANY_HEAPIFY_RATIO):
+                self._heapify()
+            else:
+                move_up = self._move_up
+
+                for index in range(size, len(self.queue)):
+                    move_up(index)
+        except BaseException:
+            # Such as priorities that can't be compared
+            self._discard(appended)
+            raise
+
+    def pop_many(self, count: int) -> List[Tuple[Hashable, Number]]:
+        count = min(count, len(self.queue))
+
+        if self._prefers_heapify(count, POP_MANY_SORT_RATIO):
+            return self._pop_many_sorted(count)
+
+        queue = self.queue
+        index_key = self.index_key
+        key_index = self.key_index
+        move_down = self._move_down
+
+        popped = []
+
+        for _ in range(count):
+            key = index_key[0]
+            popped.append((key, queue[0]))
+            del key_index[key]
+
+            last_key = index_key.pop()
+            last_priority = queue.pop()
+
+            if queue:
+                queue[0] = last_priority
+                index_key[0] = last_key
+                move_down(0)
+
+        return self._restore_priorities(popped)
+
+    def merge(self, other: Any, conflict: str = RAISE) -> None:
+        """
+        Adds all the pairs of "other", which can be any queue with items(), and
+        leaves it as it is. "conflict" decides what happens to the keys in
+        both: RAISE raises KeyError and merges nothing, and KEEP_MIN and
+        KEEP_MAX keep the lowest or the highest priority, compared as they are.
+
+        The new pairs are pushed as a batch, like push_many: they are sifted up
+        when "other" is small next to this queue, and heapified along with the
+        rest when it isn't, so it costs O(min(m * log(n), n + m)).
+        """
+        self._merge_items(other.items(), conflict)
+
+    def update_many(self, items: Iterable[Tuple[Hashable, Number]]) -> None:
+        items = list(items)
+
+        indexes = [self.index(key) for key, _ in items]
 
-    def _move_up(self, index) -> None:
-        parent_index = (index - 1) // 2
+        if not self._prefers_heapify(len(items), UPDATE_MANY_HEAPIFY_RATIO):
+            update = self.update
 
-        if index > 0 and self.queue[parent_index] > self.queue[index]:
-            self._swap(index, parent_index)
-            self._move_up(parent_index)
+            for key, priority in items:
+                update(key, priority)
 
-    def _swap(self, index_a: int, index_b: int) -> None:
-        key_a = self.index_key[index_a]
-        key_b = self.index_key[index_b]
+            return
 
-        # Swap priorities in heap
-        self.queue[index_a], self.queue[index_b] = (
-            self.queue[index_b],
-            self.queue[index_a],
+        queue = self.queue
+        sort_key = self.sort_key
+
+        if sort_key is None:
+            priorities = [priority for _, priority in items]
+        else:
+            priorities = [sort_key(priority) for _, priority in items]
+            self.key_priority.update(items)
+
+        for index, priority in zip(indexes, priorities):
+            queue[index] = priority
+
+        self._heapify()
+
+    def delete_many(self, keys: Iterable[Hashable]) -> List[Tuple[Hashable, Number]]:
+        keys = list(keys)
+
+        indexes = {self.index(key) for key in keys}
+
+        if len(indexes) != len(keys):
+            raise KeyError("Duplicated keys")
+
+        if not self._prefers_heapify(len(keys), DELETE_MANY_HEAPIFY_RATIO):
+            delete = self.delete
+            return [delete(key) for key in keys]
+
+        deleted = [(key, self.queue[self.key_index.pop(key)]) for key in keys]
+
+        self._compact(indexes)
+        self._heapify()
+
+        return self._restore_priorities(deleted)
+
+    def _priority(self, index: int) -> Number:
+        if self.key_priority is None:
+            return self.queue[index]
+
+        return self.key_priority[self.index_key[index]]
+
+    def _iter_items(self) -> Iterator[Tuple[Hashable, Number]]:
+        if self.key_priority is None:
+            return zip(self.index_key, self.queue)
+
+        return iter(self.key_priority.items())
+
+    def _is_below(self, threshold: Number, inclusive: bool) -> Callable[[Any], bool]:
+        # Whether what the heap compares comes before the threshold
+        bound = threshold if self.sort_key is None else self.sort_key(threshold)
+
+        if self.stable:
+            # Calling sort_key took a counter higher than any in the heap, so
+            # ties come before the bound; -1 puts them after it
+            if not inclusive:
+                bound = bound[0], -1
+
+            return partial(gt, bound)
+
+        return partial(ge if inclusive else gt, bound)
+
+    def _indexes_below(self, threshold: Number, inclusive: bool) -> List[int]:
+        # Depth-first from the root, only expanding the slots that qualify
+        queue = self.queue
+
+        if not queue:
+            return []
+
+        is_below = self._is_below(threshold, inclusive)
+        ordered_children = self._ordered_children
+
+        indexes = []
+        stack = [0]
+
+        while stack:
+            index = stack.pop()
+
+            if is_below(queue[index]):
+                indexes.append(index)
+                stack.extend(ordered_children(index))
+
+        return indexes
+
+    def _ordered_children(self, index: int) -> Iterable[int]:
+        # The slots that __iter__ adds to its frontier once "index" is yielded
+        first_child_index = self.arity * index + 1
+        return range(
+            first_child_index, min(first_child_index + self.arity, len(self.queue))
         )
 
-        # Swap mappings
-        self.key_index[key_a], self.key_index[key_b] = index_b, index_a
-        self.index_key[index_a], self.index_key[index_b] = key_b, key_a
+    def _priorities(self) -> List[Number]:
+        # In heap order
+        if self.key_priority is None:
+            return self.queue
 
-    def _move_down(self, index: int) -> None:
-        left_child_index = index * 2 + 1
+        return [self.key_priority[key] for key in self.index_key]
 
-        if (
-            left_child_index < len(self.queue)
-            and self.queue[left_child_index] < self.queue[index]
-        ):
-            self._swap(index, left_child_index)
-            self._move_down(left_child_index)
+    def _restore_priorities(
+        self, items: List[Tuple[Hashable, Number]]
+    ) -> List[Tuple[Hashable, Number]]:
+        # Replaces what the heap compared with the priorities, for items that
+        # have just been removed
+        if self.key_priority is None:
+            return items
+
+        key_priority = self.key_priority
+
+        return [(key, key_priority.pop(key)) for key, _ in items]
+
+    def _prefers_heapify(self, count: int, ratio: float) -> bool:
+        return count > 1 and count >= len(self.queue) * ratio
+
+    def _append(self, items: Iterable[Tuple[Hashable, Number]]) -> None:
+        # Appends the items at the end of the heap without sifting them. If a
+        # key is duplicated, or anything else raises (such as the iterable, or
+        # a malformed pair), the appended items are rolled back.
+        queue = self.queue
+        index_key = self.index_key
+        key_index = self.key_index
+        key_priority = self.key_priority
+        sort_key = self.sort_key
+
+        size = len(queue)
+
+        try:
+            for key, priority in items:
+                if key in key_index:
+                    raise KeyError("Key already exists")
+
+                if sort_key is not None:
+                    sort_priority = sort_key(priority)
+                    key_priority[key] = priority
+                    priority = sort_priority
+
+                key_index[key] = len(index_key)
+                index_key.append(key)
+                queue.append(priority)
+        except BaseException:
+            for appended_key in index_key[size:]:
+                del key_index[appended_key]
+
+                if key_priority is not None:
+                    del key_priority[appended_key]
+
+            del index_key[size:]
+            del queue[size:]
 
-        right_child_index = index * 2 + 2
+            raise
 
+    def _discard(self, keys: List[Hashable]) -> None:
+        # Takes the keys out of the heap, wherever they are, and rebuilds it
+        key_index = self.key_index
+        key_priority = self.key_priority
+
+        indexes = [key_index.pop(key) for key in keys]
+
+        if key_priority is not None:
+            for key in keys:
+                del key_priority[key]
+
+        self._compact(indexes)
+        self._heapify()
+
+    def _compact(self, removed_indexes: Iterable[int]) -> None:
+        # Drops the given slots, keeping the relative order of the rest. The
+        # heap invariant must be restored afterwards.
+        removed_indexes = set(removed_indexes)
+
+        kept = [i for i in range(len(self.queue)) if i not in removed_indexes]
+
+        self.queue[:] = [self.queue[i] for i in kept]
+        self.index_key[:] = [self.index_key[i] for i in kept]
+
+        key_index = self.key_index
+
+        for index, key in enumerate(self.index_key):
+            key_index[key] = index
+
+    def _refill(self, removed_indexes: List[int]) -> None:
+        # Fills the removed slots with the last items of the heap, and sifts
+        # them down, deepest first. Every ancestor of a removed slot must have
+        # been removed as well, so only the refilled slots are out of place.
+        queue = self.queue
+        index_key = self.index_key
+        key_index = self.key_index
+
+        size = len(queue) - len(removed_indexes)
+        removed = set(removed_indexes)
+
+        holes = sorted(index for index in removed_indexes if index < size)
+        fillers = [index for index in range(size, len(queue)) if index not in removed]
+
+        for hole, filler in zip(holes, fillers):
+            key = index_key[filler]
+            queue[hole] = queue[filler]
+            index_key[hole] = key
+            key_index[key] = hole
+
+        del queue[size:]
+        del index_key[size:]
+
+        move_down = self._move_down
+
+        for index in reversed(holes):
+            move_down(index)
+
+    def _merge_items(
+        self, items: Iterable[Tuple[Hashable, Number]], conflict: str
+    ) -> Any:
+        # Returns what push_many returns
+        check_conflict(conflict)
+
+        if conflict == RAISE:
+            # push_many raises on the first duplicate, and rolls back
+            return self.push_many(items)
+
+        keep_min = conflict == KEEP_MIN
+        merged: Dict[Hashable, Number] = {}
+
+        for key, priority in items:
+            if key in merged:
+                current = merged[key]
+            elif key in self:
+                current = self.priority(key)
+            else:
+                merged[key] = priority
+                continue
+
+            if priority < current if keep_min else current < priority:
+                merged[key] = priority
+
+        updates = []
+        new_items = []
+
+        for item in merged.items():
+            (updates if item[0] in self else new_items).append(item)
+
+        self.update_many(updates)
+
+        return self.push_many(new_items)
+
+    def _copy_heap(self, other: Any) -> bool:
+        # Copies the heap of "other" into this empty queue, as is, if it has
+        # the same layout. Returns whether it did.
         if (
-            right_child_index < len(self.queue)
-            and self.queue[right_child_index] < self.queue[index]
+            type(other) is not type(self)
+            or other.arity != self.arity
+            or other.sort_key is not None
+            or self.sort_key is not None
+            or self.queue
         ):
-            self._swap(index, right_child_index)
-            self._move_down(right_child_index)
+            return False
+
+        self.queue = other.queue.copy()
+        self.index_key = other.index_key.copy()
+        self.key_index = other.key_index.copy()
+
+        return True
+
+    def _pop_many_sorted(self, count: int) -> List[Tuple[Hashable, Number]]:
+        # Sorting the whole heap beats "count" pops when "count" is close to
+        # its size. The sorted remainder is already a valid heap.
+        queue = self.queue
+        index_key = self.index_key
+        key_index = self.key_index
+
+        order = sorted(range(len(queue)), key=queue.__getitem__)
+
+        popped = [(index_key[i], queue[i]) for i in order[:count]]
+
+        for key, _ in popped:
+            del key_index[key]
+
+        order = order[count:]
+
+        queue[:] = [queue[i] for i in order]
+        index_key[:] = [index_key[i] for i in order]
+
+        for index, key in enumerate(index_key):
+            key_index[key] = index
+
+        return self._restore_priorities(popped)
+
+    def _maintain_invariant(self, index: int) -> None:
+        # The element at "index" either belongs above its parent or somewhere
+        # below; it never needs both passes.
+        if index > 0 and self.queue[index] < self.queue[(index - 1) >> 1]:
+            self._move_up(index)
+        else:
+            self._move_down(index)
+
+    def _heapify(self) -> None:
+        # Floyd's bottom-up construction: sift down every internal node,
+        # starting from the parent of the last leaf
+        move_down = self._move_down
+
+        for index in reversed(range(len(self.queue) // 2)):
+            move_down(index)
+
+    def _move_up(self, index: int) -> int:
+        # Carries the element up in a "hole": bigger parents are shifted down
+        # into it and each slot is written once. Returns the final index.
+        queue = self.queue
+        index_key = self.index_key
+        key_index = self.key_index
+
+        priority = queue[index]
+        key = index_key[index]
+
+        # The element is written into the hole even if a comparison raises,
+        # here and in _move_down, so no item is lost
+        try:
+            while index > 0:
+                parent_index = (index - 1) >> 1
+                parent_priority = queue[parent_index]
+
+                if not priority < parent_priority:
+                    break
+
+                parent_key = index_key[parent_index]
+                queue[index] = parent_priority
+                index_key[index] = parent_key
+                key_index[parent_key] = index
+
+                index = parent_index
+        finally:
+            queue[index] = priority
+            index_key[index] = key
+            key_index[key] = index
+
+        return index
+
+    def _move_down(self, index: int) -> int:
+        # Carries the element down in a "hole", shifting the smaller child up
+        # into it at each level. Returns the final index.
+        queue = self.queue
+        index_key = self.index_key
+        key_index = self.key_index
+
+        size = len(queue)
+        priority = queue[index]
+        key = index_key[index]
+
+        child_index = 2 * index + 1
+
+        try:
+            while child_index < size:
+                child_priority = queue[child_index]
+
+                right_child_index = child_index + 1
+
+                if right_child_index < size:
+                    right_child_priority = queue[right_child_index]
+
+                    if right_child_priority < child_priority:
+                        child_index = right_child_index
+                        child_priority = right_child_priority
+
+                if not child_priority < priority:
+                    break
+
+                child_key = index_key[child_index]
+                queue[index] = child_priority
+                index_key[index] = child_key
+                key_index[child_key] = index
+
+                index = child_index
+                child_index = 2 * index + 1
+        finally:
+            queue[index] = priority
+            index_key[index] = key
+            key_index[key] = index
+
+        return index
@@ -0,0 +1,327 @@
+import os
+import pickle
+import struct
+import zlib
+from numbers import Number
+from time import monotonic
+from typing import Callable, Hashable, Iterable, List, Tuple
+
+from indexed_priority_queue.backend import IndexedPriorityQueue
+
+# fsync policies
+ALWAYS = "always"
+BATCH = "batch"
+NEVER = "never"
+
+FSYNC_POLICIES = (ALWAYS, BATCH, NEVER)
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCH_INTERVAL = 1.0
+DEFAULT_CHECKPOINT_EVERY = 1000000
+
+# Length and CRC32 of the pickled (method name, arguments) that follows
+RECORD_HEADER = struct.Struct("<II")
+
+CHECKPOINT_PREFIX = "checkpoint."
+JOURNAL_PREFIX = "journal."
+
+
+class JournaledIndexedPriorityQueue:
+    """
+    An indexed priority queue whose changes are durable. Every push, pop,
+    update and delete (and their batch versions) is appended to a journal in
+    "directory", and every "checkpoint_every" operations the queue is saved
+    as a snapshot and the journal starts over. On creation, the queue is
+    restored from the last checkpoint and the journal that follows it.
+
+    "fsync" is the durability policy of the journal:
+
+    - "always": each operation is written and fsynced before returning.
+    - "batch": each operation is written right away, so a crash of the
+      process loses nothing, but fsynced in groups: when "batch_size" of them
+      are pending, or on the first operation after "batch_interval" seconds
+      since the last fsync (there is no timer, so call sync() before going
+      idle). A crash of the machine loses at most one group.
+    - "never": operations are written through a buffered file and never
+      fsynced, so the operating system decides when they reach the disk.
+
+    sync() forces pending operations to disk, and close() syncs and closes
+    the journal. The queue must be created by "queue_factory" and support
+    save() and load(), like IndexedPriorityQueue.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fsync: str = BATCH,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        batch_interval: float = DEFAULT_BATCH_INTERVAL,
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+        queue_factory: Callable = IndexedPriorityQueue,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"'fsync' must be one of {', '.join(FSYNC_POLICIES)}")
+
+        self.directory = directory
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.checkpoint_every = checkpoint_every
+        self.queue_factory = queue_factory
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.generation = self._last_generation()
+        self.queue = self._recover()
+
+        self._remove_older_generations()
+
+        self._journal = open(self._journal_path(self.generation), "ab")
+        self._unsynced = 0  # Operations written but not fsynced
+        self._last_sync = monotonic()
+
+    def __enter__(self) -> "JournaledIndexedPriorityQueue":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __bool__(self) -> bool:
+        return bool(self.queue)
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.queue
+
+    def priority(self, key: Hashable) -> Number:
+        return self.queue.priority(key)
+
+    def peek(self) -> Tuple[Hashable, Number]:
+        return self.queue.peek()
+
+    def push(self, key: Hashable, priority: Number) -> None:
+        self.queue.push(key, priority)
+        self._log("push", key, priority)
+
+    def pop(self) -> Tuple[Hashable, Number]:
+        item = self.queue.pop()
+
+        # Logged as a deletion, so replaying doesn't depend on the heap layout
+        self._log("delete", item[0])
+
+        return item
+
+    def update(self, key: Hashable, new_priority: Number) -> None:
+        self.queue.update(key, new_priority)
+        self._log("update", key, new_priority)
+
+    def delete(self, key: Hashable) -> Tuple[Hashable, Number]:
+        item = self.queue.delete(key)
+        self._log("delete", key)
+        return item
+
+    def push_many(self, items: Iterable[Tuple[Hashable, Number]]) -> None:
+        items = list(items)
+        self.queue.push_many(items)
+        self._log("push_many", items)
+
+    def update_many(self, items: Iterable[Tuple[Hashable, Number]]) -> None:
+        items = list(items)
+        self.queue.update_many(items)
+        self._log("update_many", items)
+
+    def delete_many(self, keys: Iterable[Hashable]) -> List[Tuple[Hashable, Number]]:
+        keys = list(keys)
+        items = self.queue.delete_many(keys)
+        self._log("delete_many", keys)
+        return items
+
+    def pop_many(self, count: int) -> List[Tuple[Hashable, Number]]:
+        items = self.queue.pop_many(count)
+        self._log("delete_many", [key for key, _ in items])
+        return items
+
+    def keys_below(self, threshold: Number, inclusive: bool = False) -> List[Hashable]:
+        return self.queue.keys_below(threshold, inclusive)
+
+    def count_below(self, threshold: Number, inclusive: bool = False) -> int:
+        return self.queue.count_below(threshold, inclusive)
+
+    def pop_while(
+        self, threshold: Number, inclusive: bool = False
+    ) -> List[Tuple[Hashable, Number]]:
+        items = self.queue.pop_while(threshold, inclusive)
+        self._log("delete_many", [key for key, _ in items])
+        return items
+
+    def sync(self) -> None:
+        self._journal.flush()
+
+        if self.fsync != NEVER:
+            os.fsync(self._journal.fileno())
+
+        self._unsynced = 0
+        self._last_sync = monotonic()
+
+    def checkpoint(self) -> None:
+        """
+        Saves the queue as a new checkpoint and starts a new, empty journal.
+        The previous checkpoint and journal are removed once the new ones are
+        in place, so a crash at any point leaves a consistent pair behind.
+        """
+        self.sync()
+
+        generation = self.generation + 1
+        path = self._checkpoint_path(generation)
+
+        self.queue.save(path + ".tmp")
+        _fsync_file(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        _fsync_directory(self.directory)
+
+        self._journal.close()
+
+        self.generation = generation
+        self._journal = open(self._journal_path(generation), "ab")
+        self._operations = 0
+
+        self._remove_older_generations()
+
+    def close(self) -> None:
+        if not self._journal.closed:
+            self.sync()
+            self._journal.close()
+
+    def _log(self, name: str, *arguments) -> None:
+        data = pickle.dumps((name, arguments), protocol=pickle.HIGHEST_PROTOCOL)
+        record = RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data
+
+        self._journal.write(record)
+
+        if self.fsync != NEVER:
+            self._unsynced += 1
+
+            if (
+                self.fsync == ALWAYS
+                or self._unsynced >= self.batch_size
+                or monotonic() - self._last_sync >= self.batch_interval
+            ):
+                self.sync()
+            else:
+                # Reaches the operating system now, only the fsync waits
+                self._journal.flush()
+
+        self._operations += 1
+
+        if self._operations >= self.checkpoint_every:
+            self.checkpoint()
+
+    def _recover(self):
+        queue = self.queue_factory()
+        checkpoint_path = self._checkpoint_path(self.generation)
+
+        if os.path.exists(checkpoint_path):
+            queue = _load_checkpoint(queue, checkpoint_path)
+
+        self._operations = 0
+
+        journal_path = self._journal_path(self.generation)
+
+        if not os.path.exists(journal_path):
+            return queue
+
+        with open(journal_path, "rb") as file:
+            data = file.read()
+
+        offset = 0
+
+        while offset + RECORD_HEADER.size <= len(data):
+            length, checksum = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            end = start + length
+
+            # A torn write at the end, from a crash
+            if end > len(data) or zlib.crc32(data[start:end]) != checksum:
+                break
+
+            name, arguments = pickle.loads(data[start:end])
+            getattr(queue, name)(*arguments)
+
+            self._operations += 1
+            offset = end
+
+        if offset < len(data):
+            with open(journal_path, "r+b") as file:
+                file.truncate(offset)
+
+        return queue
+
+    def _last_generation(self) -> int:
+        generations = [
+            int(name.partition(".")[2])
+            for name in os.listdir(self.directory)
+            if name.startswith(CHECKPOINT_PREFIX) and name.partition(".")[2].isdigit()
+        ]
+
+        return max(generations, default=0)
+
+    def _remove_older_generations(self) -> None:
+        for name in os.listdir(self.directory):
+            if not name.startswith((CHECKPOINT_PREFIX, JOURNAL_PREFIX)):
+                continue
+
+            # Older generations, and checkpoints that were being written
+            generation = name.partition(".")[2]
+
+            if not generation.isdigit() or int(generation) < self.generation:
+                os.remove(os.path.join(self.directory, name))
+
+    def _checkpoint_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"{CHECKPOINT_PREFIX}{generation}")
+
+    def _journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"{JOURNAL_PREFIX}{generation}")
+
+
+def _load_checkpoint(queue, path: str):
+    # load() would build a queue with the default options, so the pairs are
+    # moved into the one from the factory, which has the configured order,
+    # key, arity and so on. Dense snapshots hold their whole configuration.
+    if not hasattr(queue, "push_many"):
+        return type(queue).load(path)
+
+    # Loaded as stable, the pairs are moved in the order they were inserted,
+    # so a stable queue breaks ties as it did before the checkpoint
+    checkpoint = IndexedPriorityQueue.load(path, stable=True)
+    heap = checkpoint.queue
+
+    queue.push_many(
+        sorted(
+            checkpoint.items(),
+            key=lambda item: heap[checkpoint.index(item[0])][1],
+        )
+    )
+
+    return queue
+
+
+def _fsync_file(path: str) -> None:
+    with open(path, "rb") as file:
+        os.fsync(file.fileno())
+
+
+def _fsync_directory(path: str) -> None:
+    # Makes the renames in the directory durable (not supported on Windows)
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
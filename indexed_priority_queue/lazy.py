@@ -0,0 +1,210 @@
+from numbers import Number
+from typing import Hashable, Iterable, Iterator, List, Tuple
+
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+
+DEFAULT_MAX_DEAD = 0.5
+
+
+class LazyIndexedPriorityQueue(IndexedPriorityQueue):
+    """
+    An indexed priority queue for workloads where most keys are deleted
+    before they reach the top. delete only marks the key as dead, in O(1),
+    leaving it in the heap. pop and peek drop the dead keys that reach the
+    root, and once more than "max_dead" of the heap is dead, it is compacted
+    and rebuilt in O(n). Pushing a dead key again reuses its slot.
+
+    len, in, priority and the rest only see the live keys, except for key(),
+    which returns whatever key is in the slot of the heap.
+    """
+
+    __slots__ = ("dead", "max_dead")
+
+    def __init__(self, max_dead: float = DEFAULT_MAX_DEAD, **kwargs):
+        if not 0 <= max_dead < 1:
+            raise ValueError("'max_dead' must be in the range [0, 1)")
+
+        super().__init__(**kwargs)
+
+        self.dead = set()  # Keys deleted but still in the heap
+        self.max_dead = max_dead
+
+    def save(self, path: str) -> None:
+        self.compact()
+        super().save(path)
+
+    def __bool__(self) -> bool:
+        return len(self.queue) > len(self.dead)
+
+    def __len__(self) -> int:
+        return len(self.queue) - len(self.dead)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.key_index and key not in self.dead
+
+    def __iter__(self) -> Iterator[Tuple[Hashable, Number]]:
+        dead = self.dead
+
+        for key, priority in super().__iter__():
+            if key not in dead:
+                yield key, priority
+
+    def index(self, key: Hashable) -> int:
+        if key in self.dead:
+            raise KeyError(key)
+
+        return self.key_index[key]
+
+    def keys_below(self, threshold: Number, inclusive: bool = False) -> List[Hashable]:
+        dead = self.dead
+        return [
+            key for key in super().keys_below(threshold, inclusive) if key not in dead
+        ]
+
+    def count_below(self, threshold: Number, inclusive: bool = False) -> int:
+        if not self.dead:
+            return super().count_below(threshold, inclusive)
+
+        return len(self.keys_below(threshold, inclusive))
+
+    def pop_while(
+        self, threshold: Number, inclusive: bool = False
+    ) -> List[Tuple[Hashable, Number]]:
+        # The dead keys below the threshold go away as well
+        popped = super().pop_while(threshold, inclusive)
+
+        if not self.dead:
+            return popped
+
+        dead = self.dead
+        live = [(key, priority) for key, priority in popped if key not in dead]
+        dead.difference_update(key for key, _ in popped)
+
+        return live
+
+    def peek(self) -> Tuple[Hashable, Number]:
+        if self.dead:
+            self._drop_dead_root()
+
+        return super().peek()
+
+    def drain(self) -> Iterator[Tuple[Hashable, Number]]:
+        while self:
+            yield self.pop()
+
+    def push(self, key: Hashable, priority: Number) -> None:
+        if key in self.dead:
+            self.dead.remove(key)
+            super().update(key, priority)
+        else:
+            super().push(key, priority)
+
+    def pop(self) -> Tuple[Hashable, Number]:
+        if self.dead:
+            self._drop_dead_root()
+
+        return super().pop()
+
+    def delete(self, key: Hashable) -> Tuple[Hashable, Number]:
+        dead = self.dead
+
+        if key in dead:
+            raise KeyError(key)
+
+        index = self.key_index[key]
+
+        # The last slot can go right away
+        if index == len(self.queue) - 1:
+            return super().delete(key)
+
+        dead.add(key)
+        deleted = key, self._priority(index)
+
+        if len(dead) > self.max_dead * len(self.queue):
+            self.compact()
+
+        return deleted
+
+    def push_many(self, items: Iterable[Tuple[Hashable, Number]]) -> None:
+        items = list(items)
+
+        # Dead keys would look duplicated
+        if any(key in self.dead for key, _ in items):
+            self.compact()
+
+        super().push_many(items)
+
+    def pop_many(self, count: int) -> List[Tuple[Hashable, Number]]:
+        if not self.dead:
+            return super().pop_many(count)
+
+        pop = self.pop
+        return [pop() for _ in range(min(count, len(self)))]
+
+    def update_many(self, items: Iterable[Tuple[Hashable, Number]]) -> None:
+        items = list(items)
+
+        for key, _ in items:
+            self.index(key)
+
+        super().update_many(items)
+
+    def delete_many(self, keys: Iterable[Hashable]) -> List[Tuple[Hashable, Number]]:
+        keys = list(keys)
+
+        indexes = [self.index(key) for key in keys]
+
+        if len(set(keys)) != len(keys):
+            raise KeyError("Duplicated keys")
+
+        self.dead.update(keys)
+        deleted = [(key, self._priority(index)) for key, index in zip(keys, indexes)]
+
+        self._compact_if_needed()
+
+        return deleted
+
+    def compact(self) -> None:
+        """
+        Removes the dead keys from the heap, and rebuilds it in O(n).
+        """
+        if not self.dead:
+            return
+
+        removed_indexes = [self.key_index.pop(key) for key in self.dead]
+
+        if self.key_priority is not None:
+            for key in self.dead:
+                del self.key_priority[key]
+
+        self.dead.clear()
+
+        self._compact(removed_indexes)
+        self._heapify()
+
+    def _copy_heap(self, other) -> bool:
+        # The dead keys are copied along with the heap
+        if not super()._copy_heap(other):
+            return False
+
+        self.dead = set(other.dead)
+
+        return True
+
+    def _iter_items(self) -> Iterator[Tuple[Hashable, Number]]:
+        dead = self.dead
+
+        for key, priority in super()._iter_items():
+            if key not in dead:
+                yield key, priority
+
+    def _compact_if_needed(self) -> None:
+        if len(self.dead) > self.max_dead * len(self.queue):
+            self.compact()
+
+    def _drop_dead_root(self) -> None:
+        dead = self.dead
+
+        while dead and self.index_key[0] in dead:
+            dead.remove(self.index_key[0])
+            super().pop()
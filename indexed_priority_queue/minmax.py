@@ -0,0 +1,230 @@
+from numbers import Number
+from typing import Hashable, Iterable, List, Tuple
+
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+
+
+def _is_min_level(index: int) -> bool:
+    # The root is on level 0, a min level, and levels alternate from there
+    return (index + 1).bit_length() % 2 == 1
+
+
+class MinMaxIndexedPriorityQueue(IndexedPriorityQueue):
+    """
+    Same as IndexedPriorityQueue, but kept as a min-max heap: nodes on even
+    levels are smaller than their descendants, and nodes on odd levels are
+    bigger. The smallest item is the root and the biggest one is one of its
+    children, so both ends can be peeked in O(1) and popped in O(log(n)).
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "MinMaxIndexedPriorityQueue":
+        # Snapshots don't tell a min-max heap from a binary one
+        queue = super().load(path, **kwargs)
+        queue._heapify()
+        return queue
+
+    def peek_max(self) -> Tuple[Hashable, Number]:
+        index = self._max_index()
+        return self.index_key[index], self._priority(index)
+
+    def pop_max(self) -> Tuple[Hashable, Number]:
+        return self.delete(self.index_key[self._max_index()])
+
+    def pop_while(
+        self, threshold: Number, inclusive: bool = False
+    ) -> List[Tuple[Hashable, Number]]:
+        # The items below the threshold aren't the top of the heap here (the
+        # max levels are in the way), so they are deleted as a batch instead
+        indexes = sorted(
+            self._indexes_below(threshold, inclusive), key=self.queue.__getitem__
+        )
+        return self.delete_many([self.index_key[index] for index in indexes])
+
+    def update(self, key: Hashable, new_priority: Number) -> None:
+        index = self.index(key)
+
+        if self.sort_key is not None:
+            sort_priority = self.sort_key(new_priority)
+            self.key_priority[key] = new_priority
+            new_priority = sort_priority
+
+        self.queue[index] = new_priority
+        self._maintain_invariant(index)
+
+    def _ordered_children(self, index: int) -> Iterable[int]:
+        # A node on a min level is the smallest of its subtree, and one on a
+        # max level is the biggest, so it is only yielded after all of its
+        # descendants: the grandchildren are added along with the children.
+        if not _is_min_level(index):
+            return ()
+
+        size = len(self.queue)
+        first_child_index = 2 * index + 1
+        first_grandchild_index = 2 * first_child_index + 1
+
+        children = range(first_child_index, min(first_child_index + 2, size))
+        grandchildren = range(
+            first_grandchild_index, min(first_grandchild_index + 4, size)
+        )
+
+        return [*children, *grandchildren]
+
+    def _max_index(self) -> int:
+        size = len(self.queue)
+
+        if size == 0:
+            raise IndexError()
+
+        if size < 3:
+            return size - 1
+
+        return 2 if self.queue[1] < self.queue[2] else 1
+
+    def _pop_many_sorted(self, count: int) -> List[Tuple[Hashable, Number]]:
+        # A sorted list is a binary heap, but not a min-max one
+        popped = super()._pop_many_sorted(count)
+        self._heapify()
+        return popped
+
+    def _belongs_above_parent(self, index: int) -> bool:
+        # Whether the element belongs on its parent's kind of level instead
+        queue = self.queue
+        parent_index = (index - 1) >> 1
+
+        if _is_min_level(index):
+            return queue[parent_index] < queue[index]
+
+        return queue[index] < queue[parent_index]
+
+    def _swap(self, index: int, other_index: int) -> None:
+        queue = self.queue
+        index_key = self.index_key
+
+        queue[index], queue[other_index] = queue[other_index], queue[index]
+        index_key[index], index_key[other_index] = (
+            index_key[other_index],
+            index_key[index],
+        )
+
+        self.key_index[index_key[index]] = index
+        self.key_index[index_key[other_index]] = other_index
+
+    def _maintain_invariant(self, index: int) -> None:
+        # The element at "index" has been replaced by an arbitrary one. If it
+        # belongs on the other kind of level, it swaps places with its parent
+        # first, and the parent's old element is sifted down from "index".
+        if index == 0:
+            self._move_down(index)
+            return
+
+        parent_index = (index - 1) >> 1
+
+        if self._belongs_above_parent(index):
+            self._swap(index, parent_index)
+            self._move_up_level(parent_index)
+            self._move_down(index)
+        elif self._move_up_level(index) == index:
+            self._move_down(index)
+
+    def _heapify(self) -> None:
+        move_down = self._move_down
+
+        for index in reversed(range(len(self.queue) // 2)):
+            move_down(index)
+
+    def _move_up(self, index: int) -> int:
+        # For a new leaf: it moves up either through the min levels or
+        # through the max levels, depending on how it compares to its parent.
+        # Like the binary heap, it also indexes the element where it starts.
+        self.key_index[self.index_key[index]] = index
+
+        if index == 0:
+            return index
+
+        if self._belongs_above_parent(index):
+            parent_index = (index - 1) >> 1
+            self._swap(index, parent_index)
+            index = parent_index
+
+        return self._move_up_level(index)
+
+    def _move_up_level(self, index: int) -> int:
+        # Moves the element up through the levels of its own kind (its
+        # grandparents). Returns the final index.
+        queue = self.queue
+        is_min_level = _is_min_level(index)
+
+        while index > 2:
+            grandparent_index = (((index - 1) >> 1) - 1) >> 1
+
+            if is_min_level:
+                moves = queue[index] < queue[grandparent_index]
+            else:
+                moves = queue[grandparent_index] < queue[index]
+
+            if not moves:
+                break
+
+            self._swap(index, grandparent_index)
+            index = grandparent_index
+
+        return index
+
+    def _move_down(self, index: int) -> int:
+        # Moves the element down through the levels of its own kind, swapping
+        # it with its smallest (or biggest) child or grandchild. Returns the
+        # final index.
+        self.key_index[self.index_key[index]] = index
+
+        queue = self.queue
+        size = len(queue)
+        is_min_level = _is_min_level(index)
+
+        while 2 * index + 1 < size:
+            first_child_index = 2 * index + 1
+            first_grandchild_index = 2 * first_child_index + 1
+
+            # The smallest (or biggest) of the children and grandchildren,
+            # which are two contiguous ranges
+            best_index = first_child_index
+            best_priority = queue[best_index]
+
+            for candidate_range in (
+                range(first_child_index + 1, min(first_child_index + 2, size)),
+                range(first_grandchild_index, min(first_grandchild_index + 4, size)),
+            ):
+                for candidate_index in candidate_range:
+                    priority = queue[candidate_index]
+
+                    if (
+                        priority < best_priority
+                        if is_min_level
+                        else best_priority < priority
+                    ):
+                        best_index = candidate_index
+                        best_priority = priority
+
+            if is_min_level:
+                moves = best_priority < queue[index]
+            else:
+                moves = queue[index] < best_priority
+
+            if not moves:
+                break
+
+            self._swap(index, best_index)
+
+            if best_index < first_grandchild_index:
+                return best_index
+
+            # The element being moved down may not fit below the grandchild's
+            # parent, which is on the other kind of level
+            if self._belongs_above_parent(best_index):
+                self._swap(best_index, (best_index - 1) >> 1)
+
+            index = best_index
+
+        return index
@@ -0,0 +1,32 @@
+# Raises ImportError when the C extension has not been built, in which case
+# the package falls back to the pure Python classes
+from indexed_priority_queue import _speedups
+from indexed_priority_queue.dary import DaryIndexedPriorityQueue
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+
+
+class NativeSiftMixin:
+    # Replaces the sift core of the pure Python heaps with the C functions of
+    # _speedups. Every other method is inherited as is.
+    __slots__ = ()
+
+    def _move_up(self, index: int) -> int:
+        return _speedups.move_up(
+            self.queue, self.index_key, self.key_index, index, self.arity
+        )
+
+    def _move_down(self, index: int) -> int:
+        return _speedups.move_down(
+            self.queue, self.index_key, self.key_index, index, self.arity
+        )
+
+    def _heapify(self) -> None:
+        _speedups.heapify(self.queue, self.index_key, self.key_index, self.arity)
+
+
+class NativeIndexedPriorityQueue(NativeSiftMixin, IndexedPriorityQueue):
+    __slots__ = ()
+
+
+class NativeDaryIndexedPriorityQueue(NativeSiftMixin, DaryIndexedPriorityQueue):
+    __slots__ = ()
@@ -0,0 +1,360 @@
+from heapq import heappop, heappush
+from itertools import count as counter
+from itertools import islice
+from numbers import Number
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from indexed_priority_queue.ipq import KEEP_MIN, RAISE, check_conflict
+from indexed_priority_queue.views import ItemsView
+
+
+class _Node:
+    __slots__ = ("key", "priority", "child", "sibling", "prev")
+
+    def __init__(self, key: Hashable, priority: Number):
+        self.key = key
+        self.priority = priority
+        self.child: Optional[_Node] = None  # Leftmost child
+        self.sibling: Optional[_Node] = None  # Next sibling to the right
+        # Left sibling, or the parent if this is the leftmost child
+        self.prev: Optional[_Node] = None
+
+
+class IndexedPairingHeap:
+    """
+    An indexed priority queue backed by a pairing heap. It has the same
+    push/pop/update/delete/peek/priority interface as IndexedPriorityQueue,
+    but lowering a priority is amortized O(1): the node is cut from its
+    parent and melded with the root, without sifting.
+    """
+
+    __slots__ = ("root", "nodes")
+
+    def __init__(self):
+        self.root: Optional[_Node] = None
+        self.nodes: Dict[Hashable, _Node] = {}  # key -> node
+
+    @classmethod
+    def from_items(
+        cls, items: Iterable[Tuple[Hashable, Number]]
+    ) -> "IndexedPairingHeap":
+        queue = cls()
+
+        for key, priority in items:
+            queue.push(key, priority)
+
+        return queue
+
+    @classmethod
+    def union(
+        cls, *heaps: "IndexedPairingHeap", conflict: str = RAISE
+    ) -> "IndexedPairingHeap":
+        heap = cls()
+
+        for other in heaps:
+            heap.merge(other, conflict)
+
+        return heap
+
+    def __bool__(self) -> bool:
+        return self.root is not None
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.nodes
+
+    def __iter__(self) -> Iterator[Tuple[Hashable, Number]]:
+        # In priority order, lazily and without changing the heap: the
+        # frontier holds the nodes whose parents have been yielded. The
+        # counter breaks ties, so nodes are never compared.
+        size = len(self.nodes)
+        order = counter()
+
+        frontier = []
+
+        if self.root is not None:
+            frontier.append((self.root.priority, next(order), self.root))
+
+        while frontier:
+            _, _, node = heappop(frontier)
+
+            yield node.key, node.priority
+
+            if len(self.nodes) != size:
+                raise RuntimeError("The heap changed size during iteration")
+
+            child = node.child
+
+            while child is not None:
+                heappush(frontier, (child.priority, next(order), child))
+                child = child.sibling
+
+    def items(self) -> ItemsView:
+        return ItemsView(
+            self, lambda: ((key, node.priority) for key, node in self.nodes.items())
+        )
+
+    def priority(self, key: Hashable) -> Number:
+        return self.nodes[key].priority
+
+    def peek(self) -> Tuple[Hashable, Number]:
+        if self.root is None:
+            raise IndexError()
+
+        return self.root.key, self.root.priority
+
+    def peek_many(self, count: int) -> List[Tuple[Hashable, Number]]:
+        return list(islice(self, count))
+
+    def keys_below(self, threshold: Number, inclusive: bool = False) -> List[Hashable]:
+        # Same as IndexedPriorityQueue.keys_below: the children of the nodes
+        # that don't qualify are never visited
+        keys = []
+        stack = [] if self.root is None else [self.root]
+
+        while stack:
+            node = stack.pop()
+            priority = node.priority
+
+            if priority < threshold or inclusive and priority == threshold:
+                keys.append(node.key)
+
+                child = node.child
+
+                while child is not None:
+                    stack.append(child)
+                    child = child.sibling
+
+        return keys
+
+    def count_below(self, threshold: Number, inclusive: bool = False) -> int:
+        return len(self.keys_below(threshold, inclusive))
+
+    def pop_while(
+        self, threshold: Number, inclusive: bool = False
+    ) -> List[Tuple[Hashable, Number]]:
+        # Popping the root only melds its children, so a batch has nothing to
+        # save: it pops while the root qualifies
+        popped = []
+
+        while self.root is not None:
+            priority = self.root.priority
+
+            if not (priority < threshold or inclusive and priority == threshold):
+                break
+
+            popped.append(self.pop())
+
+        return popped
+
+    def drain(self) -> Iterator[Tuple[Hashable, Number]]:
+        while self.root is not None:
+            yield self.pop()
+
+    def push(self, key: Hashable, priority: Number) -> None:
+        if key in self.nodes:
+            raise KeyError("Key already exists")
+
+        node = _Node(key, priority)
+        self.nodes[key] = node
+
+        self.root = node if self.root is None else _meld(self.root, node)
+
+    def pop(self) -> Tuple[Hashable, Number]:
+        root = self.root
+
+        if root is None:
+            raise IndexError()
+
+        del self.nodes[root.key]
+
+        self.root = _merge_pairs(root.child)
+
+        return root.key, root.priority
+
+    def delete(self, key: Hashable) -> Tuple[Hashable, Number]:
+        node = self.nodes.pop(key)
+        self._remove(node)
+        return key, node.priority
+
+    def merge(self, other: "IndexedPairingHeap", conflict: str = RAISE) -> None:
+        """
+        Adds all the pairs of another pairing heap, and leaves it as it is. Its
+        tree is copied without comparing anything, and melded with this one in
+        O(1), so it costs O(m), plus a delete for every key in both. These are
+        resolved by "conflict", like in IndexedPriorityQueue.merge.
+        """
+        check_conflict(conflict)
+
+        nodes = self.nodes
+        conflicts = [key for key in other.nodes if key in nodes]
+
+        if conflicts and conflict == RAISE:
+            raise KeyError("Key already exists")
+
+        copies: Dict[Hashable, _Node] = {}
+        root = _copy_tree(other.root, copies)
+
+        if root is None:
+            return
+
+        self._meld_with_root(root)
+
+        keep_min = conflict == KEEP_MIN
+
+        for key in conflicts:
+            node = nodes[key]
+            copy = copies[key]
+
+            if (
+                copy.priority < node.priority
+                if keep_min
+                else node.priority < copy.priority
+            ):
+                self._remove(node)
+            else:
+                self._remove(copy)
+                copies[key] = node
+
+        nodes.update(copies)
+
+    def update(self, key: Hashable, new_priority: Number) -> None:
+        node = self.nodes[key]
+
+        old_priority = node.priority
+        node.priority = new_priority
+
+        if new_priority < old_priority:
+            # Decrease-key. The subtree under the node is still a valid heap,
+            # so it is cut and melded with the root as a whole.
+            if node is not self.root:
+                _cut(node)
+                self.root = _meld(self.root, node)
+
+        elif old_priority < new_priority:
+            # The children may now be smaller than the node, so they are
+            # detached and the node re-enters the heap on its own
+            children = node.child
+            node.child = None
+
+            if node is self.root:
+                self.root = node
+            else:
+                _cut(node)
+                self.root = _meld(self.root, node)
+
+            self._meld_with_root(_merge_pairs(children))
+
+    def _meld_with_root(self, node: Optional[_Node]) -> None:
+        if node is None:
+            return
+
+        self.root = node if self.root is None else _meld(self.root, node)
+
+    def _remove(self, node: _Node) -> None:
+        # Takes the node out of the tree, leaving its children in it
+        if node is self.root:
+            self.root = _merge_pairs(node.child)
+        else:
+            _cut(node)
+            self._meld_with_root(_merge_pairs(node.child))
+
+
+def _copy_tree(root: Optional[_Node], nodes: Dict[Hashable, _Node]) -> Optional[_Node]:
+    # Copies the tree with the same shape, adding the new nodes to "nodes".
+    # Iterative, because the trees of a pairing heap can be very deep.
+    if root is None:
+        return None
+
+    copy_root = nodes[root.key] = _Node(root.key, root.priority)
+    stack = [(root, copy_root)]
+
+    while stack:
+        node, copy = stack.pop()
+        previous = copy
+        child = node.child
+
+        while child is not None:
+            child_copy = nodes[child.key] = _Node(child.key, child.priority)
+            child_copy.prev = previous
+
+            if previous is copy:
+                copy.child = child_copy
+            else:
+                previous.sibling = child_copy
+
+            stack.append((child, child_copy))
+            previous = child_copy
+            child = child.sibling
+
+    return copy_root
+
+
+def _meld(a: _Node, b: _Node) -> _Node:
+    # Links two heap-ordered trees, making the bigger root the leftmost child
+    # of the smaller one
+    if b.priority < a.priority:
+        a, b = b, a
+
+    child = a.child
+
+    b.sibling = child
+    b.prev = a
+
+    if child is not None:
+        child.prev = b
+
+    a.child = b
+    a.sibling = None
+    a.prev = None
+
+    return a
+
+
+def _merge_pairs(first: Optional[_Node]) -> Optional[_Node]:
+    # Standard two-pass pairing: melds the siblings pairwise left to right,
+    # then melds the resulting trees right to left
+    if first is None:
+        return None
+
+    pairs = []
+
+    while first is not None:
+        second = first.sibling
+
+        if second is None:
+            first.prev = None
+            pairs.append(first)
+            break
+
+        following = second.sibling
+        first.sibling = second.sibling = None
+        pairs.append(_meld(first, second))
+
+        first = following
+
+    root = pairs.pop()
+
+    while pairs:
+        root = _meld(pairs.pop(), root)
+
+    return root
+
+
+def _cut(node: _Node) -> None:
+    # Detaches a non-root node, and its subtree, from its parent and siblings
+    prev = node.prev
+    sibling = node.sibling
+
+    if prev.child is node:
+        prev.child = sibling
+    else:
+        prev.sibling = sibling
+
+    if sibling is not None:
+        sibling.prev = prev
+
+    node.prev = None
+    node.sibling = None
@@ -0,0 +1,127 @@
+from operator import index
+from typing import Dict, Hashable, Iterator, List, Tuple
+
+from indexed_priority_queue.views import ItemsView
+
+
+class IndexedRadixHeap:
+    """
+    An indexed priority queue for monotone integer priorities: no priority
+    may be lower than the last popped one (or "minimum", before the first
+    pop), which is the case of event simulations and Dijkstra's algorithm
+    with integer weights. Breaking that raises ValueError.
+
+    Items live in buckets by the highest bit in which their priority differs
+    from the last popped one: bucket 0 holds the ones equal to it, and
+    bucket b the ones that differ in bit b - 1 and above it. Pushes, updates
+    and deletions just move an item between buckets, in O(1). When bucket 0
+    is empty, pop takes the first non-empty bucket, whose minimum becomes
+    the last popped priority, and spreads it over lower buckets. An item can
+    only move down, so that is O(1) amortized for priorities of a bounded
+    bit length (at most that many moves per item).
+    """
+
+    __slots__ = ("buckets", "key_bucket", "last")
+
+    def __init__(self, minimum: int = 0):
+        # Each bucket maps its keys to their priorities
+        self.buckets: List[Dict[Hashable, int]] = [{}]
+        self.key_bucket: Dict[Hashable, int] = {}  # key -> index of its bucket
+        self.last = minimum  # The last popped priority
+
+    def __bool__(self) -> bool:
+        return bool(self.key_bucket)
+
+    def __len__(self) -> int:
+        return len(self.key_bucket)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.key_bucket
+
+    def items(self) -> ItemsView:
+        return ItemsView(self, self._iter_items)
+
+    def priority(self, key: Hashable) -> int:
+        return self.buckets[self.key_bucket[key]][key]
+
+    def peek(self) -> Tuple[Hashable, int]:
+        # Doesn't spread any bucket, so it costs O(size of the first
+        # non-empty bucket) when bucket 0 is empty
+        bucket = self._first_bucket()
+        key = min(bucket, key=bucket.__getitem__)
+
+        return key, bucket[key]
+
+    def push(self, key: Hashable, priority: int) -> None:
+        if key in self.key_bucket:
+            raise KeyError("Key already exists")
+
+        self._insert(key, self._check_priority(priority))
+
+    def pop(self) -> Tuple[Hashable, int]:
+        bucket = self.buckets[0]
+
+        if not bucket:
+            self._spread(self._first_bucket())
+
+        key, priority = bucket.popitem()
+        del self.key_bucket[key]
+
+        return key, priority
+
+    def delete(self, key: Hashable) -> Tuple[Hashable, int]:
+        bucket_index = self.key_bucket.pop(key)
+        return key, self.buckets[bucket_index].pop(key)
+
+    def update(self, key: Hashable, new_priority: int) -> None:
+        new_priority = self._check_priority(new_priority)
+
+        del self.buckets[self.key_bucket[key]][key]
+
+        self._insert(key, new_priority)
+
+    def drain(self) -> Iterator[Tuple[Hashable, int]]:
+        while self.key_bucket:
+            yield self.pop()
+
+    def _check_priority(self, priority: int) -> int:
+        priority = index(priority)  # Raises TypeError if it isn't an integer
+
+        if priority < self.last:
+            raise ValueError(
+                f"Priority {priority} is lower than the last popped one, {self.last}"
+            )
+
+        return priority
+
+    def _insert(self, key: Hashable, priority: int) -> None:
+        bucket_index = (priority ^ self.last).bit_length()
+        buckets = self.buckets
+
+        while len(buckets) <= bucket_index:
+            buckets.append({})
+
+        buckets[bucket_index][key] = priority
+        self.key_bucket[key] = bucket_index
+
+    def _first_bucket(self) -> Dict[Hashable, int]:
+        for bucket in self.buckets:
+            if bucket:
+                return bucket
+
+        raise IndexError()
+
+    def _spread(self, bucket: Dict[Hashable, int]) -> None:
+        # Makes the minimum of the bucket the last popped priority, and moves
+        # its items to the buckets they now belong to (all of them lower)
+        self.last = min(bucket.values())
+
+        items = list(bucket.items())
+        bucket.clear()
+
+        for key, priority in items:
+            self._insert(key, priority)
+
+    def _iter_items(self) -> Iterator[Tuple[Hashable, int]]:
+        for bucket in self.buckets:
+            yield from bucket.items()
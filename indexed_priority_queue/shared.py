@@ -0,0 +1,242 @@
+import os
+from array import array
+from itertools import islice
+from multiprocessing import RLock, current_process, parent_process, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from indexed_priority_queue.dense import ABSENT, DenseIndexedPriorityQueue
+
+HEADER_SIZE = 8  # The size of the queue, as a signed 64 bits integer
+
+# The names of the blocks of shared memory created by this process
+_created_names = set()
+
+
+class SharedIndexedPriorityQueue(DenseIndexedPriorityQueue):
+    """
+    A DenseIndexedPriorityQueue whose arrays live in a block of shared memory,
+    so several processes can push, pop, update and delete directly, without
+    going through one that owns the queue. Every operation holds a
+    multiprocessing.RLock shared by all of them.
+
+    The queue is passed to other processes like a lock: as an argument of
+    multiprocessing.Process, or of the initializer of a multiprocessing.Pool.
+    They attach to the same block of memory. The process that created the
+    queue frees the memory with close(), or when leaving a with block; the
+    others just detach from it.
+    """
+
+    __slots__ = ("lock", "memory", "owner", "_header")
+
+    def __init__(self, capacity: int, lock=None, name: Optional[str] = None):
+        if capacity < 0:
+            raise ValueError("The capacity can't be negative")
+
+        if name is None:
+            memory = SharedMemory(create=True, size=HEADER_SIZE + 24 * capacity)
+            _created_names.add(memory.name)
+        else:
+            memory = _attach(name)
+
+        self.lock = RLock() if lock is None else lock
+        self.memory = memory
+        # Forked processes inherit the queue, but don't own it
+        self.owner = os.getpid() if name is None else None
+        self.capacity = capacity
+
+        buffer = memory.buf
+        self._header = buffer[:HEADER_SIZE].cast("q")
+
+        # The same three arrays as DenseIndexedPriorityQueue, one after the
+        # other
+        offset = HEADER_SIZE
+        arrays = []
+
+        for typecode in ("q", "q", "d"):
+            end = offset + 8 * capacity
+            arrays.append(buffer[offset:end].cast(typecode))
+            offset = end
+
+        self.heap, self.positions, self.priorities_ = arrays
+
+        if name is None:
+            self.positions[:] = array("q", [ABSENT]) * capacity
+            self.size = 0
+
+    def __reduce__(self):
+        return type(self), (self.capacity, self.lock, self.memory.name)
+
+    def __enter__(self) -> "SharedIndexedPriorityQueue":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Detaches from the shared memory, and frees it if this process created
+        the queue. The queue can't be used afterwards.
+        """
+        for view in (self._header, self.heap, self.positions, self.priorities_):
+            view.release()
+
+        self.memory.close()
+
+        if self.owner == os.getpid():
+            self.memory.unlink()
+            _created_names.discard(self.memory.name)
+
+    @property
+    def size(self) -> int:
+        return self._header[0]
+
+    @size.setter
+    def size(self, size: int) -> None:
+        self._header[0] = size
+
+    @classmethod
+    def load(cls, path: str, lock=None) -> "SharedIndexedPriorityQueue":
+        # Copies a DenseIndexedPriorityQueue snapshot into shared memory
+        source = DenseIndexedPriorityQueue.load(path, mmap=True)
+        queue = cls(source.capacity, lock=lock)
+
+        queue.heap[:] = source.heap
+        queue.positions[:] = source.positions
+        queue.priorities_[:] = source.priorities_
+        queue.size = source.size
+
+        return queue
+
+    def save(self, path: str) -> None:
+        with self.lock:
+            super().save(path)
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+    def __contains__(self, key: int) -> bool:
+        with self.lock:
+            return super().__contains__(key)
+
+    def __iter__(self) -> Iterator[Tuple[int, float]]:
+        # Over a copy of the ordered items: other processes may change the
+        # queue meanwhile
+        with self.lock:
+            return iter(list(super().__iter__()))
+
+    def peek_many(self, count: int) -> List[Tuple[int, float]]:
+        with self.lock:
+            return list(islice(super().__iter__(), count))
+
+    def index(self, key: int) -> int:
+        with self.lock:
+            return super().index(key)
+
+    def key(self, index: int) -> int:
+        with self.lock:
+            return super().key(index)
+
+    def priority(self, key: int) -> float:
+        with self.lock:
+            return super().priority(key)
+
+    def priorities(self, keys: Iterable[int]) -> array:
+        with self.lock:
+            return super().priorities(keys)
+
+    def peek(self) -> Tuple[int, float]:
+        with self.lock:
+            return super().peek()
+
+    def push(self, key: int, priority: float) -> None:
+        with self.lock:
+            super().push(key, priority)
+
+    def pop(self) -> Tuple[int, float]:
+        with self.lock:
+            return super().pop()
+
+    def drain(self) -> Iterator[Tuple[int, float]]:
+        # Other processes may pop the last item between checking the size and
+        # popping, so both happen under the lock
+        while True:
+            with self.lock:
+                if not self.size:
+                    return
+
+                item = super().pop()
+
+            yield item
+
+    def delete(self, key: int) -> Tuple[int, float]:
+        with self.lock:
+            return super().delete(key)
+
+    def update(self, key: int, new_priority: float) -> None:
+        with self.lock:
+            super().update(key, new_priority)
+
+    def update_many(self, keys: Iterable[int], priorities: Iterable[float]) -> None:
+        keys = list(keys)
+        priorities = list(priorities)
+
+        with self.lock:
+            super().update_many(keys, priorities)
+
+    def delete_many(self, keys: Iterable[int]) -> List[Tuple[int, float]]:
+        keys = list(keys)
+
+        with self.lock:
+            return super().delete_many(keys)
+
+    def pop_many(self, count: int) -> List[Tuple[int, float]]:
+        with self.lock:
+            return super().pop_many(count)
+
+    def keys_below(self, threshold: float, inclusive: bool = False) -> List[int]:
+        with self.lock:
+            return super().keys_below(threshold, inclusive)
+
+    def count_below(self, threshold: float, inclusive: bool = False) -> int:
+        with self.lock:
+            return super().count_below(threshold, inclusive)
+
+    def pop_while(
+        self, threshold: float, inclusive: bool = False
+    ) -> List[Tuple[int, float]]:
+        with self.lock:
+            return super().pop_while(threshold, inclusive)
+
+    def _iter_items(self) -> Iterator[Tuple[int, float]]:
+        with self.lock:
+            return iter(list(super()._iter_items()))
+
+
+def _attach(name: str) -> SharedMemory:
+    # Attaching registers the memory with the resource tracker, which unlinks
+    # it when the process exits. Processes started by multiprocessing share
+    # the tracker of their parent, where it is already registered, but other
+    # ones would free the memory of the owner, so they unregister it.
+    try:
+        return SharedMemory(name, track=False)
+    except TypeError:  # Before Python 3.13
+        pass
+
+    memory = SharedMemory(name)
+
+    if (
+        os.name == "posix"
+        and not _started_by_multiprocessing()
+        and memory.name not in _created_names
+    ):
+        resource_tracker.unregister(memory._name, "shared_memory")
+
+    return memory
+
+
+def _started_by_multiprocessing() -> bool:
+    # A spawned process unpickles its arguments before it knows its parent
+    return parent_process() is not None or getattr(
+        current_process(), "_inheriting", False
+    )
@@ -0,0 +1,179 @@
+"""
+Compact binary snapshots of the queues.
+
+A snapshot is a fixed header followed by 8-byte aligned sections:
+
+- IndexedPriorityQueue: the priorities in heap order, then the key table
+  (the key of each heap slot). Positions are implied by the key table. A
+  stable queue adds a third section, the insertion sequence of each slot.
+- DenseIndexedPriorityQueue: its three arrays as they are in memory, the
+  heap (key table), the positions and the priorities.
+
+Priorities are stored as raw little-endian int64 or float64 arrays when they
+are all ints or all floats, and keys as a raw int64 array, or as offsets into
+a UTF-8 blob, when they are all ints or all strings. Anything else is
+pickled. The raw arrays can be memory-mapped, see
+DenseIndexedPriorityQueue.load.
+"""
+
+import mmap
+import pickle
+import struct
+import sys
+from array import array
+from typing import Any, List, NamedTuple, Sequence, Tuple
+
+MAGIC = b"IPQSNAP\x00"
+VERSION = 1
+
+HEAP_LAYOUT = b"h"
+STABLE_HEAP_LAYOUT = b"s"
+DENSE_LAYOUT = b"d"
+
+INT = b"q"
+FLOAT = b"d"
+STRING = b"s"
+PICKLE = b"p"
+
+# magic, version, layout, priorities type, keys type, arity, size, capacity
+HEADER = struct.Struct("<8sBcccIQQ")
+LENGTH = struct.Struct("<Q")
+ALIGNMENT = 8
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+
+class Header(NamedTuple):
+    layout: bytes
+    priorities_type: bytes
+    keys_type: bytes
+    arity: int
+    size: int
+    capacity: int
+
+
+def values_type(values: Sequence[Any], allow_strings: bool = False) -> bytes:
+    if all(type(value) is int and INT64_MIN <= value <= INT64_MAX for value in values):
+        return INT
+
+    if all(type(value) is float for value in values):
+        return FLOAT
+
+    if allow_strings and all(type(value) is str for value in values):
+        return STRING
+
+    return PICKLE
+
+
+def encode_values(values: Sequence[Any], type_: bytes) -> List[bytes]:
+    # Returns the sections that hold the values
+    if type_ in (INT, FLOAT):
+        return [little_endian(array(type_.decode(), values)).tobytes()]
+
+    if type_ == STRING:
+        encoded = [value.encode("utf8") for value in values]
+        offsets = array("q", [0])
+
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+
+        return [little_endian(offsets).tobytes(), b"".join(encoded)]
+
+    pickled = pickle.dumps(list(values), protocol=pickle.HIGHEST_PROTOCOL)
+
+    return [LENGTH.pack(len(pickled)), pickled]
+
+
+def decode_values(
+    buffer: memoryview, offset: int, size: int, type_: bytes
+) -> Tuple[list, int]:
+    # Returns the values and the offset of the next section
+    if type_ in (INT, FLOAT):
+        values = array(type_.decode())
+        end = offset + size * values.itemsize
+        values.frombytes(buffer[offset:end])
+        return little_endian(values).tolist(), align(end)
+
+    if type_ == STRING:
+        offsets = array("q")
+        offsets_end = offset + (size + 1) * offsets.itemsize
+        offsets.frombytes(buffer[offset:offsets_end])
+        offsets = little_endian(offsets)
+
+        start = align(offsets_end)
+        end = start + offsets[-1]
+        blob = bytes(buffer[start:end])
+        values = [
+            blob[start:stop].decode("utf8") for start, stop in zip(offsets, offsets[1:])
+        ]
+        return values, align(end)
+
+    (length,) = LENGTH.unpack_from(buffer, offset)
+    start = offset + LENGTH.size
+    end = start + length
+    return pickle.loads(buffer[start:end]), align(end)
+
+
+def raw_values(values: Sequence[Any], typecode: str):
+    # A little-endian buffer with the values, without copying them if they
+    # already are in one (an array or memoryview on a little-endian machine)
+    if sys.byteorder == "little" and isinstance(values, (array, memoryview)):
+        return values
+
+    return little_endian(array(typecode, values))
+
+
+def write_snapshot(path: str, header: Header, sections: Sequence[Any]) -> None:
+    # Sections are bytes-like objects
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, *header))
+        _pad(file)
+
+        for section in sections:
+            file.write(section)
+            _pad(file)
+
+
+def read_snapshot(path: str, copy_on_write: bool = False) -> Tuple[Header, memoryview]:
+    """
+    Returns the header and a buffer with the whole file. If "copy_on_write",
+    the file is memory-mapped privately instead of read: pages are loaded
+    lazily and shared with other processes that map the same file, until they
+    are written to. Writes never reach the file.
+    """
+    with open(path, "rb") as file:
+        if copy_on_write:
+            buffer = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY))
+        else:
+            buffer = memoryview(file.read())
+
+    if len(buffer) < HEADER.size or buffer[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a queue snapshot")
+
+    _, version, *fields = HEADER.unpack_from(buffer)
+
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version: {version}")
+
+    return Header(*fields), buffer
+
+
+def first_section() -> int:
+    return align(HEADER.size)
+
+
+def align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def little_endian(values: array) -> array:
+    # Snapshots are little-endian: swaps in place on big-endian machines
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    return values
+
+
+def _pad(file) -> None:
+    file.write(b"\0" * (align(file.tell()) - file.tell()))
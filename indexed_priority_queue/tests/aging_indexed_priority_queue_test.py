@@ -0,0 +1,377 @@
+import os
+from random import Random, choice
+from tempfile import TemporaryDirectory
+
+from indexed_priority_queue.aging import MAX_OFFSET_DRIFT, AgingIndexedPriorityQueue
+from indexed_priority_queue.tests import random_indexed_priority_queue_test
+from indexed_priority_queue.tests.base_indexed_priority_queue_test_case import (
+    BaseIndexedPriorityQueueTestCase,
+)
+
+
+class AgingIndexedPriorityQueueTestCase(BaseIndexedPriorityQueueTestCase):
+    def create_queue(self, **kwargs):
+        return AgingIndexedPriorityQueue(**kwargs)
+
+    def push_values(self, count=10):
+        for key in range(count):
+            self.queue.push(key, key * 10)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.create_queue(order="middle")
+
+        with self.assertRaises(TypeError):
+            self.create_queue(key=abs)
+
+        for factor in (0, -2):
+            with self.assertRaises(ValueError):
+                self.queue.scale_all(factor)
+
+    def test_shift_all(self):
+        self.push_values()
+        stored = list(self.queue.queue)
+
+        self.queue.shift_all(-5)
+        self.queue.shift_all(2)
+
+        # Nothing moved, and integers stay integers
+        self.assertEqual(self.queue.queue, stored)
+        self.assertEqual(self.queue.offset, -3)
+
+        self.assertEqual(self.queue.priority(4), 37)
+        self.assertIsInstance(self.queue.priority(4), int)
+        self.assertEqual(self.queue.peek(), (0, -3))
+        self.assertEqual(self.queue.pop(), (0, -3))
+        self.assertEqual(self.queue.delete(5), (5, 47))
+        self.assertEqual(
+            sorted(self.queue.items()),
+            [(key, key * 10 - 3) for key in (1, 2, 3, 4, 6, 7, 8, 9)],
+        )
+        self.assert_invariant()
+
+    def test_scale_all(self):
+        self.push_values()
+        self.queue.shift_all(1)
+
+        self.queue.scale_all(2)
+        self.queue.scale_all(0.25)
+
+        self.assertEqual(self.queue.priority(4), 20.5)
+        self.assertEqual(
+            list(self.queue),
+            [(key, (key * 10 + 1) / 2) for key in range(10)],
+        )
+        self.assert_invariant()
+
+    def test_push_and_update_after_a_transform(self):
+        self.push_values()
+        self.queue.shift_all(-100)
+        self.queue.scale_all(2)
+
+        self.queue.push("new", -150)
+        self.queue.update(9, -190)
+
+        self.assertEqual(self.queue.priority("new"), -150)
+        self.assertEqual(
+            self.queue.pop_many(4), [(0, -200), (9, -190), (1, -180), (2, -160)]
+        )
+        self.assertEqual(self.queue.peek(), ("new", -150))
+        self.assert_invariant()
+
+    def test_max_order(self):
+        self.queue = self.create_queue(order="max")
+        self.push_values()
+
+        self.queue.shift_all(5)
+        self.queue.scale_all(2)
+        self.queue.push("new", 100)
+
+        self.assertEqual(self.queue.pop(), (9, 190))
+        self.assertEqual(self.queue.pop(), (8, 170))
+        self.assertEqual(self.queue.keys_below(140), [7])
+        self.assertEqual(
+            self.queue.pop_while(130, inclusive=True), [(7, 150), (6, 130)]
+        )
+        self.assertEqual(self.queue.peek(), (5, 110))
+        self.assertEqual(self.queue.priority("new"), 100)
+        self.assert_invariant()
+
+    def test_stable(self):
+        for order in ("min", "max"):
+            self.queue = self.create_queue(order=order, stable=True)
+
+            for key in range(6):
+                self.queue.push(key, key % 2)
+
+            self.queue.shift_all(0.5)
+            self.queue.renormalize()
+            self.queue.scale_all(3)
+            self.queue.push(6, 1.5)
+
+            expected = (
+                [0, 2, 4, 6, 1, 3, 5] if order == "min" else [1, 3, 5, 0, 2, 4, 6]
+            )
+
+            self.assertEqual([self.queue.pop()[0] for _ in range(7)], expected)
+
+    def test_batch_operations(self):
+        for options in ({}, {"order": "max"}, {"stable": True}):
+            self.queue = self.create_queue(**options)
+            self.push_values(100)
+            self.queue.shift_all(0.5)
+            self.queue.scale_all(4)
+
+            expected = {key: (key * 10 + 0.5) * 4 for key in range(100)}
+
+            self.queue.push_many((key, key * 3.0) for key in range(100, 200))
+            expected.update((key, key * 3.0) for key in range(100, 200))
+
+            updated = {key: -key for key in range(0, 200, 2)}
+            self.queue.update_many(updated.items())
+            expected.update(updated)
+
+            self.assertEqual(dict(self.queue.items()), expected)
+
+            deleted = self.queue.delete_many(range(50, 150))
+            self.assertEqual(
+                deleted, [(key, expected.pop(key)) for key in range(50, 150)]
+            )
+
+            ordered = sorted(
+                expected.items(),
+                key=lambda item: item[1],
+                reverse=options.get("order") == "max",
+            )
+
+            self.assertEqual(self.queue.peek_many(5), ordered[:5])
+            self.assertEqual(self.queue.pop_many(5), ordered[:5])
+            self.assertEqual(self.queue.count_below(ordered[10][1]), 5)
+            self.assertEqual(self.queue.pop_while(ordered[10][1]), ordered[5:10])
+            self.assert_invariant()
+
+    def test_thresholds_match_the_priorities(self):
+        # Undoing the transform on the threshold would round it differently
+        # than priority() rounds the stored one
+        random = Random(0)
+
+        for options in ({}, {"order": "max"}, {"stable": True}):
+            self.queue = self.create_queue(**options)
+
+            for key in range(50):
+                self.queue.push(key, random.random() * 100)
+
+            self.queue.shift_all(0.9595149153582413)
+            self.queue.scale_all(1.0982515383020084)
+
+            for key in range(50):
+                priority = self.queue.priority(key)
+
+                self.assertIn(key, self.queue.keys_below(priority, inclusive=True))
+                self.assertNotIn(key, self.queue.keys_below(priority))
+
+            items = sorted(
+                self.queue.items(),
+                key=lambda item: item[1],
+                reverse=options.get("order") == "max",
+            )
+
+            self.assertEqual(
+                self.queue.pop_while(items[9][1], inclusive=True), items[:10]
+            )
+            self.assert_invariant()
+
+    def test_renormalize(self):
+        self.push_values()
+        self.queue.shift_all(0.5)
+        self.queue.scale_all(3)
+
+        before = list(self.queue.items())
+        order = list(self.queue.index_key)
+
+        self.queue.renormalize()
+
+        self.assertEqual(self.queue.offset, 0)
+        self.assertEqual(self.queue.scale, 1)
+        self.assertEqual(list(self.queue.items()), before)
+        self.assertEqual(self.queue.index_key, order)
+        self.assertEqual(self.queue.queue[1], 31.5)
+
+    def test_renormalize_when_drifted(self):
+        self.queue.push("a", 0.5)
+        self.queue.push("b", 1.0)
+
+        self.queue.shift_all(MAX_OFFSET_DRIFT / 2)
+        self.assertEqual(self.queue.offset, MAX_OFFSET_DRIFT / 2)
+
+        self.queue.shift_all(MAX_OFFSET_DRIFT)
+        self.assertEqual(self.queue.offset, 0)
+        self.assertEqual(self.queue.peek(), ("a", MAX_OFFSET_DRIFT * 1.5 + 0.5))
+
+        self.queue.scale_all(2.0**70)
+        self.assertEqual(self.queue.scale, 1)
+        self.assertEqual(
+            self.queue.priority("b"), (MAX_OFFSET_DRIFT * 1.5 + 1) * 2**70
+        )
+
+        # Integers never drift
+        self.queue = self.create_queue()
+        self.queue.push("a", 1)
+        self.queue.shift_all(MAX_OFFSET_DRIFT * 10)
+        self.assertEqual(self.queue.offset, MAX_OFFSET_DRIFT * 10)
+
+        # But floats shifted by integers do
+        self.queue = self.create_queue()
+        self.queue.push("a", 0.5)
+        self.queue.push("b", 1)
+        self.queue.shift_all(MAX_OFFSET_DRIFT * 10)
+        self.assertEqual(self.queue.offset, 0)
+        self.assertEqual(self.queue.priority("a"), MAX_OFFSET_DRIFT * 10 + 0.5)
+
+    def test_drift_goes_by_every_stored_priority(self):
+        # The biggest one is neither the root nor the last item
+        for key, priority in (("a", 0.5), ("b", 1000.0), ("c", 1.0)):
+            self.queue.push(key, priority)
+
+        self.assertEqual(self.queue.queue, [0.5, 1000.0, 1.0])
+        self.assertEqual(self.queue.stored_max, 1000.0)
+
+        self.queue.shift_all(MAX_OFFSET_DRIFT * 2.0)
+        self.assertEqual(self.queue.offset, MAX_OFFSET_DRIFT * 2.0)
+
+        self.queue.shift_all(MAX_OFFSET_DRIFT * 1000.0)
+        self.assertEqual(self.queue.offset, 0)
+        self.assertEqual(self.queue.stored_max, MAX_OFFSET_DRIFT * 1002.0 + 1000)
+        self.assertEqual(self.queue.priority("c"), MAX_OFFSET_DRIFT * 1002.0 + 1)
+
+    def test_no_drift_when_the_stored_priorities_are_zero(self):
+        for key in range(10):
+            self.queue.push(key, 0)
+
+        for _ in range(100):
+            self.queue.shift_all(0.5)
+
+        # Not folded into the heap on every shift
+        self.assertEqual(self.queue.queue, [0] * 10)
+        self.assertEqual(self.queue.offset, 50.0)
+        self.assertEqual(self.queue.priority(3), 50.0)
+
+        self.queue.push(10, 51.0)
+        self.queue.shift_all(MAX_OFFSET_DRIFT * 2.0)
+
+        self.assertEqual(self.queue.offset, 0)
+        self.assertEqual(self.queue.priority(3), MAX_OFFSET_DRIFT * 2.0 + 50)
+        self.assert_invariant()
+
+    def test_reset_when_empty(self):
+        self.queue.push("a", 1)
+        self.queue.shift_all(0.5)
+        self.queue.pop()
+
+        self.queue.shift_all(0.25)
+
+        self.assertEqual(self.queue.offset, 0)
+        self.assertEqual(self.queue.scale, 1)
+
+    def test_save_and_load(self):
+        for order in ("min", "max"):
+            self.queue = self.create_queue(order=order)
+            self.push_values()
+            self.queue.shift_all(-0.5)
+
+            with TemporaryDirectory() as directory:
+                path = os.path.join(directory, "queue.snapshot")
+                self.queue.save(path)
+
+                queue = AgingIndexedPriorityQueue.load(path, order=order)
+
+            self.assertEqual(list(queue), list(self.queue))
+
+    def test_merge_and_union(self):
+        self.push_values()
+        self.queue.shift_all(0.5)
+
+        other = self.create_queue()
+        other.push("a", 3)
+        other.scale_all(2)
+
+        self.queue.merge(other)
+        self.assertEqual(self.queue.priority("a"), 6)
+
+        other = self.create_queue()
+        other.push("b", 7)
+
+        expected = dict(self.queue.items(), b=7)
+
+        # The transform of the biggest queue is copied along with its heap,
+        # unless the order differs
+        for order in ("min", "max"):
+            queue = AgingIndexedPriorityQueue.union(self.queue, other, order=order)
+
+            self.assertEqual(dict(queue.items()), expected)
+            self.assertEqual(queue.offset, 0.5 if order == "min" else 0)
+
+    def test_random(self):
+        random = Random(0)
+
+        for options in ({}, {"order": "max", "stable": True}):
+            self.queue = self.create_queue(**options)
+            expected = {}
+
+            # Powers of two keep the floats exact
+            for key in range(2000):
+                operation = random.random()
+
+                if operation < 0.4 or not expected:
+                    expected[key] = random.randrange(-100, 100)
+                    self.queue.push(key, expected[key])
+                elif operation < 0.6:
+                    delta = random.randrange(-10, 10)
+                    expected = {k: p + delta for k, p in expected.items()}
+                    self.queue.shift_all(delta)
+                elif operation < 0.7:
+                    factor = random.choice((0.5, 2))
+                    expected = {k: p * factor for k, p in expected.items()}
+                    self.queue.scale_all(factor)
+                elif operation < 0.8:
+                    updated = random.choice(list(expected))
+                    expected[updated] = random.randrange(-100, 100)
+                    self.queue.update(updated, expected[updated])
+                else:
+                    popped_key, priority = self.queue.pop()
+                    best = (max if options else min)(expected.values())
+                    self.assertEqual(priority, best)
+                    self.assertEqual(expected.pop(popped_key), priority)
+
+                self.assertEqual(dict(self.queue.items()), expected)
+
+            self.assert_invariant()
+
+
+class AgingMixin:
+    def create_queue(self, **kwargs):
+        return AgingIndexedPriorityQueue(**kwargs)
+
+    @property
+    def operations(self):
+        return super().operations + [self.shift_all, self.scale_all]
+
+    def shift_all(self):
+        self.queue.shift_all(choice([-1.5, 2, 100]))
+
+    def scale_all(self):
+        self.queue.scale_all(choice([0.5, 2, 3]))
+
+
+class RandomAgingIndexedPriorityQueueTestCase(
+    AgingMixin,
+    random_indexed_priority_queue_test.RandomBatchIndexedPriorityQueueTestCase,
+):
+    pass
+
+
+class RandomStableMaxAgingIndexedPriorityQueueTestCase(
+    AgingMixin,
+    random_indexed_priority_queue_test.RandomStableMaxIndexedPriorityQueueTestCase,
+):
+    pass
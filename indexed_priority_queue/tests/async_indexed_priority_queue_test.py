@@ -0,0 +1,169 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from indexed_priority_queue.async_queue import AsyncIndexedPriorityQueue
+
+
+class AsyncIndexedPriorityQueueTestCase(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.queue = AsyncIndexedPriorityQueue()
+
+    async def wait_for_waiters(self):
+        # Lets the other tasks run until they block
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def test_when_empty(self):
+        self.assertTrue(self.queue.empty())
+        self.assertFalse(self.queue.full())
+        self.assertEqual(len(self.queue), 0)
+
+        with self.assertRaises(asyncio.QueueEmpty):
+            self.queue.pop_nowait()
+
+        with self.assertRaises(IndexError):
+            self.queue.peek()
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(self.queue.pop(), 0.01)
+
+    async def test_example(self):
+        await self.queue.push("John", 7)
+        await self.queue.push("Maria", 3)
+        self.queue.push_nowait("Peter", 5)
+        self.assertEqual(self.queue.peek(), ("Maria", 3))
+
+        self.queue.update("Peter", 1)
+        self.assertEqual(self.queue.delete("John"), ("John", 7))
+        self.assertEqual(self.queue.priority("Maria"), 3)
+        self.assertIn("Maria", self.queue)
+
+        self.assertEqual(await self.queue.pop(), ("Peter", 1))
+        self.assertEqual(self.queue.pop_nowait(), ("Maria", 3))
+        self.assertFalse(self.queue)
+
+    async def test_pop_waits_for_push(self):
+        consumer = asyncio.ensure_future(self.queue.pop())
+        await self.wait_for_waiters()
+        self.assertFalse(consumer.done())
+
+        await self.queue.push("John", 1)
+
+        self.assertEqual(await consumer, ("John", 1))
+
+    async def test_consumers_are_woken_up_in_order(self):
+        consumers = [asyncio.ensure_future(self.queue.pop()) for _ in range(3)]
+        await self.wait_for_waiters()
+
+        for key, priority in (("a", 3), ("b", 2), ("c", 1)):
+            self.queue.push_nowait(key, priority)
+
+        results = await asyncio.gather(*consumers)
+
+        self.assertEqual([key for key, _ in results], ["c", "b", "a"])
+
+    async def test_pop_until(self):
+        self.queue.push_nowait("late", 10)
+
+        consumer = asyncio.ensure_future(self.queue.pop_until(5))
+        await self.wait_for_waiters()
+        self.assertFalse(consumer.done())
+
+        # Not the head: no change for the consumer
+        self.queue.push_nowait("later", 20)
+        self.queue.update("later", 15)
+        await self.wait_for_waiters()
+        self.assertFalse(consumer.done())
+
+        self.queue.update("late", 4)
+
+        self.assertEqual(await consumer, ("late", 4))
+        self.assertEqual(len(self.queue), 1)
+
+    async def test_pop_until_with_a_timeout(self):
+        self.queue.push_nowait("late", 10)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.queue.pop_until(5, timeout=0.01)
+
+        self.assertFalse(self.queue._getters)
+        self.assertEqual(self.queue.peek(), ("late", 10))
+
+        # Already due: no waiting
+        self.assertEqual(await self.queue.pop_until(10, timeout=0), ("late", 10))
+
+        consumer = asyncio.ensure_future(self.queue.pop_until(5, timeout=10))
+        await self.wait_for_waiters()
+
+        self.queue.push_nowait("due", 3)
+
+        self.assertEqual(await consumer, ("due", 3))
+
+    async def test_timed_out_consumer_doesnt_take_the_head(self):
+        first = asyncio.ensure_future(self.queue.pop_until(5, timeout=0.01))
+        second = asyncio.ensure_future(self.queue.pop_until(5))
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await first
+
+        self.queue.push_nowait("a", 1)
+
+        self.assertEqual(await second, ("a", 1))
+
+    async def test_update_and_delete_only_wake_up_on_head_changes(self):
+        for key, priority in (("a", 10), ("b", 20), ("c", 30)):
+            self.queue.push_nowait(key, priority)
+
+        consumer = asyncio.ensure_future(self.queue.pop_until(5))
+        await self.wait_for_waiters()
+
+        getters = self.queue._getters
+        self.assertEqual(len(getters), 1)
+        future = getters[0][1]
+
+        self.queue.update("c", 25)
+        self.queue.delete("b")
+        self.assertFalse(future.done())
+
+        # The head changes, but it is not due yet
+        self.queue.update("a", 7)
+        self.assertFalse(future.done())
+
+        self.queue.delete("a")
+        self.queue.update("c", 5)
+        self.assertTrue(future.done())
+
+        self.assertEqual(await consumer, ("c", 5))
+
+    async def test_push_waits_when_full(self):
+        self.queue = AsyncIndexedPriorityQueue(maxsize=2)
+
+        await self.queue.push("a", 1)
+        await self.queue.push("b", 2)
+        self.assertTrue(self.queue.full())
+
+        with self.assertRaises(asyncio.QueueFull):
+            self.queue.push_nowait("c", 3)
+
+        producer = asyncio.ensure_future(self.queue.push("c", 3))
+        await self.wait_for_waiters()
+        self.assertFalse(producer.done())
+
+        self.queue.delete("b")
+        await producer
+
+        self.assertEqual(self.queue.pop_nowait(), ("a", 1))
+        self.assertEqual(self.queue.pop_nowait(), ("c", 3))
+
+    async def test_cancelled_consumer_passes_the_item_on(self):
+        first = asyncio.ensure_future(self.queue.pop())
+        second = asyncio.ensure_future(self.queue.pop())
+        await self.wait_for_waiters()
+
+        self.queue.push_nowait("a", 1)
+        first.cancel()
+
+        self.assertEqual(await second, ("a", 1))
+
+        with self.assertRaises(asyncio.CancelledError):
+            await first
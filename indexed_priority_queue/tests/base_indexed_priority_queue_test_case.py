@@ -5,18 +5,22 @@ from indexed_priority_queue.ipq import IndexedPriorityQueue
 
 class BaseIndexedPriorityQueueTestCase(TestCase):
     def setUp(self):
-        self.queue = IndexedPriorityQueue()
+        self.queue = self.create_queue()
+
+    def create_queue(self, **kwargs):
+        return IndexedPriorityQueue(**kwargs)
 
     def assert_invariant(self):
         heap_size = len(self.queue)
+        arity = self.queue.arity
 
         for root in range(heap_size):
-            left = 2 * root + 1
-            right = 2 * root + 2
-
-            self.assert_child_invariant(heap_size, root, left)
-            self.assert_child_invariant(heap_size, root, right)
+            for child in range(arity * root + 1, arity * root + arity + 1):
+                self.assert_child_invariant(heap_size, root, child)
 
     def assert_child_invariant(self, heap_size, root_index, child_index):
         if child_index < heap_size:
-            self.assertLessEqual(root_index, child_index)
+            self.assertLessEqual(
+                self.queue.queue[root_index], self.queue.queue[child_index]
+            )
+            self.assertEqual(self.queue.index(self.queue.key(root_index)), root_index)
@@ -0,0 +1,102 @@
+from random import Random
+from unittest import TestCase
+
+from indexed_priority_queue.benchmarks.engines import ENGINES, native, split_engines
+from indexed_priority_queue.benchmarks.suite import compare, percentile, run_case
+from indexed_priority_queue.benchmarks.traces import TRACES, replay
+
+
+class BenchmarkSuiteTestCase(TestCase):
+    def test_traces_replay_on_every_engine(self):
+        for name, generate in TRACES.items():
+            trace = generate(500, Random(0))
+            self.assertTrue(trace, name)
+
+            engines, skipped = split_engines(trace)
+            self.assertEqual(len(engines) + len(skipped), len(ENGINES))
+
+            for engine in engines:
+                replay(ENGINES[engine].create(trace), trace)
+
+    def test_engines_skip_traces_they_cant_replay(self):
+        native_engines = {"binary-native", "4-ary-native"}
+
+        _, skipped = split_engines(TRACES["discrete-event"](500, Random(0)))
+        self.assertEqual(set(skipped), set() if native else native_engines)
+
+        _, skipped = split_engines(TRACES["uniform"](500, Random(0)))
+        self.assertEqual(
+            set(skipped), {"radix"} | (set() if native else native_engines)
+        )
+
+        # Integer priorities that go below the last popped one
+        trace = [("push", 0, 5), ("pop",), ("push", 1, 3)]
+        self.assertIn("radix", split_engines(trace)[1])
+
+        trace = [("push", "a", 0.5), ("push", "b", "c"), ("pop",)]
+        engines, skipped = split_engines(trace, ["binary", "dense", "aging"])
+
+        self.assertEqual(engines, ["binary"])
+        self.assertEqual(set(skipped), {"dense", "aging"})
+
+    def test_bounded_engine_never_evicts(self):
+        trace = TRACES["top-k"](500, Random(0))
+        queue = ENGINES["bounded"].create(trace)
+
+        self.assertEqual(queue.capacity, 101)
+        replay(queue, trace)
+
+    def test_traces_are_reproducible(self):
+        for generate in TRACES.values():
+            self.assertEqual(generate(200, Random(1)), generate(200, Random(1)))
+
+    def test_percentile(self):
+        values = list(range(100))
+
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+
+    def test_run_case(self):
+        result = run_case("binary", "uniform", 300, 0, None, repeat=1)
+
+        self.assertEqual(result["operations"], 300)
+        self.assertGreater(result["ops_per_sec"], 0)
+        self.assertLessEqual(result["p50_ns"], result["p99_ns"])
+
+        result = run_case("radix", "uniform", 300, 0, None, repeat=1)
+
+        self.assertEqual(
+            result,
+            {
+                "trace": "uniform",
+                "size": 300,
+                "engine": "radix",
+                "skipped": "the priorities aren't all integers",
+            },
+        )
+
+    def test_compare(self):
+        def report(ops_per_sec, p99_ns):
+            return {
+                "results": [
+                    {
+                        "trace": "uniform",
+                        "size": 1000,
+                        "engine": "binary",
+                        "ops_per_sec": ops_per_sec,
+                        "p50_ns": 100,
+                        "p99_ns": p99_ns,
+                        "peak_rss": 1000,
+                    }
+                ]
+            }
+
+        (change,) = compare(report(100, 1000), report(95, 1050), threshold=0.1)
+        self.assertEqual(change["regressed"], [])
+        self.assertAlmostEqual(change["ratios"]["ops_per_sec"], 0.95)
+
+        (change,) = compare(report(100, 1000), report(80, 1200), threshold=0.1)
+        self.assertEqual(change["regressed"], ["ops_per_sec", "p99_ns"])
+
+        self.assertEqual(compare(report(100, 1000), {"results": []}), [])
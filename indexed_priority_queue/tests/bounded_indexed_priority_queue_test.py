@@ -0,0 +1,141 @@
+import heapq
+from random import Random
+from unittest import TestCase
+
+from indexed_priority_queue.bounded import BoundedIndexedPriorityQueue
+from indexed_priority_queue.tests.minmax_indexed_priority_queue_test import (
+    MinMaxInvariantMixin,
+)
+
+
+class BoundedIndexedPriorityQueueTestCase(MinMaxInvariantMixin, TestCase):
+    def setUp(self):
+        self.queue = BoundedIndexedPriorityQueue(3)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            BoundedIndexedPriorityQueue(-1)
+
+    def test_push_until_full(self):
+        self.assertIsNone(self.queue.push("a", 5))
+        self.assertIsNone(self.queue.push("b", 3))
+        self.assertFalse(self.queue.full())
+        self.assertIsNone(self.queue.push("c", 4))
+        self.assertTrue(self.queue.full())
+
+    def test_push_evicts_the_worst(self):
+        self.queue.push_many([("a", 5), ("b", 3), ("c", 4)])
+
+        self.assertEqual(self.queue.push("d", 1), ("a", 5))
+        self.assertNotIn("a", self.queue)
+        self.assertEqual(len(self.queue), 3)
+        self.assertEqual(self.queue.peek(), ("d", 1))
+        self.assertEqual(self.queue.peek_max(), ("c", 4))
+
+        self.assert_invariant()
+
+    def test_push_rejects_worse_items(self):
+        self.queue.push_many([("a", 5), ("b", 3), ("c", 4)])
+
+        self.assertEqual(self.queue.push("d", 6), ("d", 6))
+        self.assertEqual(self.queue.push("e", 5), ("e", 5))
+        self.assertNotIn("d", self.queue)
+        self.assertEqual(len(self.queue), 3)
+
+    def test_push_with_duplicated_keys(self):
+        self.queue.push("a", 1)
+
+        with self.assertRaises(KeyError):
+            self.queue.push("a", 2)
+
+    def test_zero_capacity(self):
+        self.queue = BoundedIndexedPriorityQueue(0)
+
+        self.assertEqual(self.queue.push("a", 1), ("a", 1))
+        self.assertFalse(self.queue)
+
+    def test_merge_returns_the_items_left_out(self):
+        self.queue.push_many([("a", 5), ("b", 3)])
+        other = BoundedIndexedPriorityQueue(3)
+        other.push_many([("a", 1), ("c", 4), ("d", 6)])
+
+        with self.assertRaises(KeyError):
+            self.queue.merge(other)
+
+        self.assertEqual(len(self.queue), 2)
+
+        self.assertEqual(self.queue.merge(other, conflict="min"), [("d", 6)])
+        self.assertEqual(sorted(self.queue.items()), [("a", 1), ("b", 3), ("c", 4)])
+        self.assert_invariant()
+
+    def test_union(self):
+        queues = [BoundedIndexedPriorityQueue(5) for _ in range(3)]
+
+        for offset, queue in enumerate(queues):
+            queue.push_many((key, key) for key in range(offset * 5, offset * 5 + 5))
+
+        self.queue = BoundedIndexedPriorityQueue.union(*queues, capacity=4)
+
+        self.assertEqual(self.queue.pop_many(4), [(key, key) for key in range(4)])
+
+    def test_push_many_returns_the_items_left_out(self):
+        left_out = self.queue.push_many((key, key % 7) for key in range(10))
+
+        self.assertEqual(len(left_out), 7)
+        self.assertEqual(sorted(priority for _, priority in left_out)[-1], 6)
+        self.assertEqual(sorted(self.queue.queue), [0, 0, 1])
+
+    def test_push_many_with_duplicated_keys(self):
+        self.queue.push_many([("a", 5), ("b", 3), ("c", 4)])
+        items = list(self.queue.items())
+
+        for batch in ([("d", 1), ("a", 0)], [("d", 1), ("e", 2), ("d", 0)]):
+            with self.assertRaises(KeyError):
+                self.queue.push_many(batch)
+
+            self.assertEqual(list(self.queue.items()), items)
+
+    def test_from_items(self):
+        self.queue = BoundedIndexedPriorityQueue.from_items(
+            ((key, -key) for key in range(100)), capacity=5
+        )
+
+        self.assertEqual(len(self.queue), 5)
+        self.assertEqual(self.queue.peek(), (99, -99))
+        self.assertEqual(self.queue.peek_max(), (95, -95))
+
+    def test_top_k_of_a_stream(self):
+        random = Random(0)
+
+        for capacity in (1, 2, 10, 100):
+            self.queue = BoundedIndexedPriorityQueue(capacity)
+            seen = {}
+
+            for key in range(3000):
+                seen[key] = random.random()
+                self.queue.push(key, seen[key])
+
+                # Kept items can be updated too, and only get better here
+                if key % 50 == 0:
+                    kept_key = self.queue.peek_max()[0]
+                    seen[kept_key] /= 2
+                    self.queue.update(kept_key, seen[kept_key])
+
+            self.assert_invariant()
+
+            expected = heapq.nsmallest(capacity, seen.items(), key=lambda i: i[1])
+            self.assertEqual(self.queue.pop_many(capacity), expected)
+            self.assertFalse(self.queue)
+
+    def test_top_k_without_updates(self):
+        random = Random(1)
+        stream = [(key, random.randrange(1000)) for key in range(5000)]
+
+        self.queue = BoundedIndexedPriorityQueue(50)
+        self.queue.push_many(stream)
+
+        self.assertEqual(
+            sorted(self.queue.queue),
+            sorted(priority for _, priority in stream)[:50],
+        )
+        self.assert_invariant()
@@ -0,0 +1,169 @@
+from queue import Empty
+from random import Random
+from threading import Thread
+from time import monotonic
+from unittest import TestCase
+
+from indexed_priority_queue.concurrent_queue import ConcurrentIndexedPriorityQueue
+from indexed_priority_queue.pairing import IndexedPairingHeap
+
+THREADS = 4
+KEYS_PER_THREAD = 500
+
+
+class ConcurrentIndexedPriorityQueueTestCase(TestCase):
+    def setUp(self):
+        self.queue = self.create_queue()
+
+    def create_queue(self):
+        return ConcurrentIndexedPriorityQueue(shards=4)
+
+    def test_invalid_shards(self):
+        with self.assertRaises(ValueError):
+            ConcurrentIndexedPriorityQueue(shards=0)
+
+    def test_when_empty(self):
+        self.assertFalse(self.queue)
+        self.assertEqual(len(self.queue), 0)
+
+        with self.assertRaises(IndexError):
+            self.queue.peek()
+
+        with self.assertRaises(Empty):
+            self.queue.pop_nowait()
+
+        with self.assertRaises(Empty):
+            self.queue.get_nowait()
+
+        with self.assertRaises(KeyError):
+            self.queue.delete("John")
+
+    def test_pop_with_timeout(self):
+        start = monotonic()
+
+        with self.assertRaises(Empty):
+            self.queue.pop(timeout=0.05)
+
+        self.assertGreaterEqual(monotonic() - start, 0.05)
+
+        with self.assertRaises(ValueError):
+            self.queue.pop(timeout=-1)
+
+    def test_example(self):
+        self.queue.push("John", 7)
+        self.queue.push("Maria", 3)
+        self.queue.push("Peter", 5)
+        self.assertEqual(self.queue.peek(), ("Maria", 3))
+
+        self.queue.push("Kim", 2)
+        self.queue.update("Peter", 1)
+        self.assertEqual(self.queue.peek(), ("Peter", 1))
+
+        self.assertEqual(len(self.queue), 4)
+        self.assertEqual(self.queue.delete("John"), ("John", 7))
+        self.assertEqual(len(self.queue), 3)
+
+        self.assertEqual(self.queue.pop(), ("Peter", 1))
+        self.assertEqual(self.queue.pop(), ("Kim", 2))
+        self.assertEqual(self.queue.priority("Maria"), 3)
+
+        self.assertIn("Maria", self.queue)
+        self.assertNotIn("John", self.queue)
+
+        with self.assertRaises(KeyError):
+            self.queue.push("Maria", 1)
+
+    def test_pop_order(self):
+        priorities = list(range(200))
+        Random(0).shuffle(priorities)
+
+        for key, priority in enumerate(priorities):
+            self.queue.push(key, priority)
+
+        popped = [self.queue.pop()[1] for _ in priorities]
+
+        self.assertEqual(popped, sorted(priorities))
+
+        with self.assertRaises(Empty):
+            self.queue.pop(block=False)
+
+    def test_blocking_pop_wakes_up_on_push(self):
+        popped = []
+
+        consumer = Thread(target=lambda: popped.append(self.queue.pop(timeout=5)))
+        consumer.start()
+
+        self.queue.push("John", 1)
+        consumer.join()
+
+        self.assertEqual(popped, [("John", 1)])
+
+    def test_pop_after_delete(self):
+        self.queue.push("John", 1)
+        self.queue.delete("John")
+
+        with self.assertRaises(Empty):
+            self.queue.pop(timeout=0.01)
+
+        self.queue.push("Maria", 2)
+        self.assertEqual(self.queue.pop(timeout=1), ("Maria", 2))
+
+    def test_concurrent_producers_and_consumers(self):
+        popped = []
+
+        def produce(thread):
+            random = Random(thread)
+            keys = range(thread * KEYS_PER_THREAD, (thread + 1) * KEYS_PER_THREAD)
+
+            for key in keys:
+                self.queue.push(key, random.random())
+
+            # Some keys are updated or deleted before being popped
+            for key in keys[::5]:
+                try:
+                    self.queue.update(key, random.random())
+                except KeyError:
+                    pass
+
+            for key in keys[1::5]:
+                try:
+                    popped.append(self.queue.delete(key))
+                except KeyError:
+                    pass
+
+        def consume():
+            while True:
+                try:
+                    popped.append(self.queue.pop(timeout=0.5))
+                except Empty:
+                    return
+
+        threads = [Thread(target=produce, args=(i,)) for i in range(THREADS)]
+        threads += [Thread(target=consume) for _ in range(THREADS)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        keys = [key for key, _ in popped]
+
+        self.assertEqual(sorted(keys), list(range(THREADS * KEYS_PER_THREAD)))
+        self.assertEqual(len(self.queue), 0)
+
+
+class ApproximateConcurrentIndexedPriorityQueueTestCase(
+    ConcurrentIndexedPriorityQueueTestCase
+):
+    def create_queue(self):
+        return ConcurrentIndexedPriorityQueue(shards=4, exact=False)
+
+
+class PairingConcurrentIndexedPriorityQueueTestCase(
+    ConcurrentIndexedPriorityQueueTestCase
+):
+    def create_queue(self):
+        return ConcurrentIndexedPriorityQueue(
+            shards=3, queue_factory=IndexedPairingHeap
+        )
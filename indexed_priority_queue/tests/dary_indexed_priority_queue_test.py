@@ -0,0 +1,53 @@
+from indexed_priority_queue.dary import DaryIndexedPriorityQueue
+from indexed_priority_queue.tests import (
+    indexed_priority_queue_test,
+    random_indexed_priority_queue_test,
+)
+
+
+class DaryIndexedPriorityQueueTestCase(
+    indexed_priority_queue_test.IndexedPriorityQueueTestCase
+):
+    def create_queue(self, **kwargs):
+        return DaryIndexedPriorityQueue(**kwargs)
+
+    def test_arity(self):
+        self.assertEqual(self.queue.arity, 4)
+        self.assertEqual(DaryIndexedPriorityQueue(arity=3).arity, 3)
+
+    def test_invalid_arity(self):
+        with self.assertRaises(ValueError):
+            DaryIndexedPriorityQueue(arity=1)
+
+    def test_from_items_with_arity(self):
+        self.queue = DaryIndexedPriorityQueue.from_items(
+            ((i, -i) for i in range(50)), arity=8
+        )
+
+        self.assertEqual(self.queue.arity, 8)
+        self.assertEqual(self.queue.peek(), (49, -49))
+
+        self.assert_invariant()
+
+    def test_load_with_another_arity(self):
+        for key in range(100):
+            self.queue.push(key, -key)
+
+        self.queue = self.save_and_load(arity=3)
+
+        self.assertEqual(self.queue.arity, 3)
+        self.assert_invariant()
+
+
+class RandomTernaryIndexedPriorityQueueTestCase(
+    random_indexed_priority_queue_test.RandomBatchIndexedPriorityQueueTestCase
+):
+    def create_queue(self, **kwargs):
+        return DaryIndexedPriorityQueue(arity=3, **kwargs)
+
+
+class RandomOctonaryIndexedPriorityQueueTestCase(
+    random_indexed_priority_queue_test.RandomBatchIndexedPriorityQueueTestCase
+):
+    def create_queue(self, **kwargs):
+        return DaryIndexedPriorityQueue(arity=8, **kwargs)
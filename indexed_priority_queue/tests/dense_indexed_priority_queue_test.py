@@ -0,0 +1,337 @@
+import os
+from random import choice, randrange, sample
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from indexed_priority_queue.dense import DenseIndexedPriorityQueue
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+
+CAPACITY = 300
+
+
+class DenseIndexedPriorityQueueTestCase(TestCase):
+    RUNS = 50
+
+    def setUp(self):
+        self.queue = DenseIndexedPriorityQueue(CAPACITY)
+
+    def assert_invariant(self):
+        heap = self.queue.heap
+        priorities = self.queue.priorities_
+
+        for index in range(len(self.queue)):
+            self.assertEqual(self.queue.positions[heap[index]], index)
+
+            if index > 0:
+                parent_key = heap[(index - 1) // 2]
+                self.assertLessEqual(priorities[parent_key], priorities[heap[index]])
+
+        self.assertEqual(
+            sum(position != -1 for position in self.queue.positions), len(self.queue)
+        )
+
+    def test_when_empty(self):
+        self.assertFalse(self.queue)
+        self.assertEqual(len(self.queue), 0)
+        self.assertNotIn(0, self.queue)
+        self.assertNotIn(CAPACITY, self.queue)
+
+        with self.assertRaises(IndexError):
+            self.queue.pop()
+
+        with self.assertRaises(IndexError):
+            self.queue.peek()
+
+        for method in (self.queue.delete, self.queue.priority, self.queue.index):
+            with self.assertRaises(KeyError):
+                method(0)
+
+        with self.assertRaises(KeyError):
+            self.queue.key(0)
+
+        with self.assertRaises(KeyError):
+            self.queue.update(0, 1.0)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            DenseIndexedPriorityQueue(-1)
+
+    def test_out_of_range_keys(self):
+        # Missing keys, for every method
+        for key in (-1, CAPACITY):
+            with self.assertRaises(KeyError):
+                self.queue.push(key, 1.0)
+
+            with self.assertRaises(KeyError):
+                self.queue.update(key, 1.0)
+
+            with self.assertRaises(KeyError):
+                self.queue.priority(key)
+
+            with self.assertRaises(KeyError):
+                self.queue.delete(key)
+
+    def test_keys_that_arent_ints(self):
+        self.queue.push(1, 1.0)
+
+        for key in ("1", 1.0, None):
+            self.assertNotIn(key, self.queue)
+
+            with self.assertRaises(KeyError):
+                self.queue.push(key, 1.0)
+
+            with self.assertRaises(KeyError):
+                self.queue.update(key, 1.0)
+
+            with self.assertRaises(KeyError):
+                self.queue.priority(key)
+
+            with self.assertRaises(KeyError):
+                self.queue.delete(key)
+
+        self.assertNotIn(-1, self.queue)
+        self.assertNotIn(CAPACITY, self.queue)
+
+    def test_push_with_duplicated_keys(self):
+        self.queue.push(1, 1.0)
+
+        with self.assertRaises(KeyError):
+            self.queue.push(1, 2.0)
+
+    def test_example(self):
+        self.queue.push(10, 7)
+        self.queue.push(11, 3)
+        self.queue.push(12, 5)
+        self.assertEqual(self.queue.peek(), (11, 3.0))
+
+        self.queue.push(13, 2)
+        self.assertEqual(self.queue.peek(), (13, 2.0))
+
+        self.queue.update(12, 1)
+        self.assertEqual(self.queue.peek(), (12, 1.0))
+
+        self.assertEqual(len(self.queue), 4)
+        self.assertEqual(self.queue.delete(10), (10, 7.0))
+        self.assertEqual(len(self.queue), 3)
+
+        self.assertEqual(self.queue.pop(), (12, 1.0))
+        self.assertEqual(self.queue.peek(), (13, 2.0))
+        self.assertEqual(self.queue.index(13), 0)
+        self.assertEqual(self.queue.key(0), 13)
+        self.assertEqual(self.queue.priority(13), 2.0)
+
+        self.assertIn(11, self.queue)
+        self.assertNotIn(10, self.queue)
+
+        self.assert_invariant()
+
+    def test_iteration(self):
+        self.assertEqual(list(self.queue), [])
+
+        for key in range(100):
+            self.queue.push(key, (key * 37) % 101)
+
+        expected = sorted(
+            ((key, float((key * 37) % 101)) for key in range(100)),
+            key=lambda item: item[1],
+        )
+
+        self.assertEqual(list(self.queue), expected)
+        self.assertEqual(self.queue.peek_many(5), expected[:5])
+        self.assertEqual(sorted(self.queue.items()), sorted(expected))
+        self.assertIn((3, 10.0), self.queue.items())
+        self.assertEqual(len(self.queue), 100)
+
+        iterator = iter(self.queue)
+        next(iterator)
+        self.queue.pop()
+
+        with self.assertRaises(RuntimeError):
+            next(iterator)
+
+        self.assertEqual(list(self.queue.drain()), expected[1:])
+        self.assertFalse(self.queue)
+
+    def test_priorities(self):
+        for key in range(10):
+            self.queue.push(key, key / 2)
+
+        self.assertEqual(list(self.queue.priorities([4, 0, 9])), [2.0, 0.0, 4.5])
+
+        with self.assertRaises(KeyError):
+            self.queue.priorities([1, 10])
+
+    def test_update_many(self):
+        for key in range(20):
+            self.queue.push(key, key)
+
+        for keys in ([3], [19, 0, 7], list(range(20))):
+            priorities = [randrange(-50, 50) for _ in keys]
+
+            self.queue.update_many(keys, priorities)
+
+            self.assertEqual(list(self.queue.priorities(keys)), priorities)
+            self.assert_invariant()
+
+    def test_update_many_heapifies_large_batches(self):
+        for key in range(20):
+            self.queue.push(key, key)
+
+        with patch.object(
+            DenseIndexedPriorityQueue,
+            "_heapify",
+            autospec=True,
+            side_effect=DenseIndexedPriorityQueue._heapify,
+        ) as heapify:
+            self.queue.update_many(range(9), [-key for key in range(9)])
+            self.assertEqual(heapify.call_count, 0)
+
+            self.queue.update_many(range(10, 20), [-key for key in range(10, 20)])
+            self.assertEqual(heapify.call_count, 1)
+
+        self.assertEqual(self.queue.peek(), (19, -19))
+        self.assert_invariant()
+
+    def test_update_many_with_invalid_arguments(self):
+        self.queue.push(1, 1.0)
+
+        with self.assertRaises(ValueError):
+            self.queue.update_many([1], [1.0, 2.0])
+
+        with self.assertRaises(KeyError):
+            self.queue.update_many([1, 2], [3.0, 4.0])
+
+        self.assertEqual(self.queue.priority(1), 1.0)
+
+    def test_save_and_load(self):
+        for key in range(0, CAPACITY, 3):
+            self.queue.push(key, (key * 37 % 101) / 3)
+
+        self.queue.delete(9)
+
+        for mmap in (False, True):
+            with TemporaryDirectory() as directory:
+                path = os.path.join(directory, "queue.snapshot")
+                self.queue.save(path)
+
+                queue = DenseIndexedPriorityQueue.load(path, mmap=mmap)
+
+                self.assertEqual(queue.capacity, CAPACITY)
+                self.assertEqual(len(queue), len(self.queue))
+                self.assertEqual(list(queue.heap), list(self.queue.heap))
+                self.assertEqual(list(queue.positions), list(self.queue.positions))
+                self.assertEqual(list(queue.priorities_), list(self.queue.priorities_))
+
+                # The loaded queue is fully usable, and doesn't change the file
+                queue.push(1, -1.0)
+                queue.update(0, 1000.0)
+                self.assertEqual(queue.pop(), (1, -1.0))
+
+                self.queue, original = queue, self.queue
+                self.assert_invariant()
+                self.queue = original
+
+                self.assertNotIn(1, DenseIndexedPriorityQueue.load(path))
+
+    def test_save_and_load_when_empty(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "queue.snapshot")
+            DenseIndexedPriorityQueue(0).save(path)
+
+            self.assertEqual(len(DenseIndexedPriorityQueue.load(path, mmap=True)), 0)
+
+    def test_load_another_kind_of_snapshot(self):
+        queue = IndexedPriorityQueue()
+        queue.push(1, 1.0)
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "queue.snapshot")
+            queue.save(path)
+
+            with self.assertRaises(ValueError):
+                DenseIndexedPriorityQueue.load(path)
+
+    def test_random(self):
+        for _ in range(DenseIndexedPriorityQueueTestCase.RUNS):
+            self.setUp()
+            self.do_random_test()
+
+    def do_random_test(self):
+        expected = {}
+        operations = ("push", "push", "pop", "delete", "update", "batch")
+
+        for _ in range(randrange(300)):
+            operation = choice(operations)
+            absent = [key for key in range(CAPACITY) if key not in expected]
+
+            if (operation == "push" or not expected) and absent:
+                key = choice(absent)
+                expected[key] = float(randrange(70))
+                self.queue.push(key, expected[key])
+
+            elif operation == "pop":
+                key, priority = self.queue.pop()
+                self.assertEqual(priority, min(expected.values()))
+                self.assertEqual(expected.pop(key), priority)
+
+            elif operation == "delete":
+                key = choice(list(expected))
+                self.assertEqual(self.queue.delete(key), (key, expected.pop(key)))
+
+            elif operation == "update":
+                key = choice(list(expected))
+                expected[key] += randrange(-20, 20)
+                self.queue.update(key, expected[key])
+
+            else:
+                self.do_random_batch(expected)
+
+            self.assert_invariant()
+
+            for key, priority in expected.items():
+                self.assertEqual(self.queue.priority(key), priority)
+
+    def do_random_batch(self, expected):
+        keys = sample(list(expected), randrange(len(expected) + 1))
+        batch = choice(("update", "delete", "pop", "below"))
+
+        if batch == "update":
+            priorities = [float(randrange(70)) for _ in keys]
+            self.queue.update_many(keys, priorities)
+            expected.update(zip(keys, priorities))
+
+        elif batch == "delete":
+            for key, priority in self.queue.delete_many(keys):
+                self.assertEqual(expected.pop(key), priority)
+
+        elif batch == "pop":
+            popped = self.queue.pop_many(len(keys))
+            self.assertEqual(
+                [priority for _, priority in popped],
+                sorted(expected.values())[: len(keys)],
+            )
+
+            for key, priority in popped:
+                self.assertEqual(expected.pop(key), priority)
+
+        else:
+            threshold = float(randrange(-10, 80))
+            inclusive = choice((False, True))
+            below = {
+                key
+                for key, priority in expected.items()
+                if priority < threshold or inclusive and priority == threshold
+            }
+
+            self.assertEqual(set(self.queue.keys_below(threshold, inclusive)), below)
+            self.assertEqual(self.queue.count_below(threshold, inclusive), len(below))
+
+            popped = self.queue.pop_while(threshold, inclusive)
+            self.assertEqual(
+                [priority for _, priority in popped],
+                sorted(expected[key] for key in below),
+            )
+
+            for key, priority in popped:
+                self.assertEqual(expected.pop(key), priority)
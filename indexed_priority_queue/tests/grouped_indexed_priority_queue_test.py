@@ -0,0 +1,351 @@
+from functools import partial
+from random import Random
+from unittest import TestCase
+
+from indexed_priority_queue.backend import IndexedPriorityQueue
+from indexed_priority_queue.grouped import GroupedIndexedPriorityQueue
+
+
+class GroupedIndexedPriorityQueueTestCase(TestCase):
+    def setUp(self):
+        self.queue = GroupedIndexedPriorityQueue()
+
+    def assert_invariant(self):
+        queue = self.queue
+
+        self.assertTrue(all(queue.groups.values()))
+        self.assertEqual(sum(map(len, queue.groups.values())), len(queue))
+        self.assertFalse(queue.exhausted & set(queue.heads.key_index))
+
+        for group, group_queue in queue.groups.items():
+            if group in queue.exhausted:
+                continue
+
+            self.assertIn(group, queue.heads)
+            self.assertEqual(queue.heads.priority(group), group_queue.peek()[1])
+
+        self.assertLessEqual(set(queue.heads.key_index), set(queue.groups))
+        self.assertEqual(
+            queue.limited,
+            {
+                group
+                for group in queue.heads.key_index
+                if queue.quota(group) is not None
+            },
+        )
+
+    def push_example_values(self):
+        for group, key, priority in (
+            ("a", "a1", 5),
+            ("a", "a2", 1),
+            ("a", "a3", 7),
+            ("b", "b1", 3),
+            ("b", "b2", 2),
+            ("c", "c1", 4),
+        ):
+            self.queue.push(group, key, priority)
+
+    def test_invalid_arguments(self):
+        for quota in (0, -1):
+            with self.assertRaises(ValueError):
+                GroupedIndexedPriorityQueue(default_quota=quota)
+
+            with self.assertRaises(ValueError):
+                self.queue.set_quota("a", quota)
+
+        with self.assertRaises(ValueError):
+            self.queue.push(None, "key", 1)
+
+    def test_when_empty(self):
+        self.assertFalse(self.queue)
+        self.assertEqual(len(self.queue), 0)
+
+        for method in (self.queue.pop, self.queue.peek):
+            with self.assertRaises(IndexError):
+                method()
+
+            with self.assertRaises(KeyError):
+                method("a")
+
+    def test_push(self):
+        self.push_example_values()
+
+        self.assertTrue(self.queue)
+        self.assertEqual(len(self.queue), 6)
+        self.assertEqual(self.queue.group_size("a"), 3)
+        self.assertEqual(self.queue.group_size("d"), 0)
+        self.assertIn(("a", "a1"), self.queue)
+        self.assertNotIn(("b", "a1"), self.queue)
+        self.assertNotIn(("d", "a1"), self.queue)
+        self.assertEqual(self.queue.priority("b", "b1"), 3)
+        self.assertEqual(self.queue.heads.priority("a"), 1)
+
+        # Keys are unique within their group only
+        self.queue.push("b", "a1", 0)
+
+        with self.assertRaises(KeyError):
+            self.queue.push("a", "a1", 0)
+
+        self.assertEqual(self.queue.peek(), ("b", "a1", 0))
+        self.assert_invariant()
+
+    def test_pop(self):
+        self.push_example_values()
+
+        popped = [self.queue.pop() for _ in range(len(self.queue))]
+
+        self.assertEqual(
+            popped,
+            [
+                ("a", "a2", 1),
+                ("b", "b2", 2),
+                ("b", "b1", 3),
+                ("c", "c1", 4),
+                ("a", "a1", 5),
+                ("a", "a3", 7),
+            ],
+        )
+        self.assertFalse(self.queue)
+        self.assertFalse(self.queue.groups)
+        self.assertFalse(self.queue.heads)
+
+    def test_pop_from_a_group(self):
+        self.push_example_values()
+
+        self.assertEqual(self.queue.peek("b"), ("b", "b2", 2))
+        self.assertEqual(self.queue.pop("b"), ("b", "b2", 2))
+        self.assertEqual(self.queue.pop("b"), ("b", "b1", 3))
+
+        self.assertNotIn("b", self.queue.groups)
+
+        with self.assertRaises(KeyError):
+            self.queue.pop("b")
+
+        self.assertEqual(self.queue.pop(), ("a", "a2", 1))
+        self.assertEqual(len(self.queue), 3)
+        self.assert_invariant()
+
+    def test_update_and_delete(self):
+        self.push_example_values()
+
+        self.queue.update("c", "c1", 0)
+        self.assertEqual(self.queue.peek(), ("c", "c1", 0))
+
+        self.queue.update("a", "a2", 6)
+        self.assertEqual(self.queue.heads.priority("a"), 5)
+
+        self.assertEqual(self.queue.delete("c", "c1"), ("c1", 0))
+        self.assertNotIn("c", self.queue.groups)
+        self.assertNotIn("c", self.queue.heads)
+
+        with self.assertRaises(KeyError):
+            self.queue.delete("c", "c1")
+
+        with self.assertRaises(KeyError):
+            self.queue.update("a", "b1", 1)
+
+        self.assertEqual(self.queue.peek(), ("b", "b2", 2))
+        self.assertEqual(len(self.queue), 5)
+        self.assert_invariant()
+
+    def test_head_changes_only(self):
+        self.push_example_values()
+
+        heads = list(self.queue.heads.items())
+
+        # Below the head of the group, the top level doesn't change
+        self.queue.push("a", "a4", 10)
+        self.queue.update("a", "a3", 8)
+        self.queue.delete("a", "a4")
+
+        self.assertEqual(list(self.queue.heads.items()), heads)
+
+        self.assert_invariant()
+
+    def test_quotas(self):
+        self.queue = GroupedIndexedPriorityQueue(default_quota=1)
+
+        for key in range(4):
+            self.queue.push("a", key, key)
+
+        for key in range(2):
+            self.queue.push("b", key, 10 + key)
+
+        self.queue.set_quota("a", 2)
+
+        self.assertEqual(self.queue.quota("a"), 2)
+        self.assertEqual(self.queue.quota("b"), 1)
+
+        popped = [self.queue.pop()[:2] for _ in range(len(self.queue))]
+
+        # Two of "a" for every one of "b", per round
+        self.assertEqual(
+            popped, [("a", 0), ("a", 1), ("b", 0), ("a", 2), ("a", 3), ("b", 1)]
+        )
+        self.assertFalse(self.queue)
+
+    def test_quotas_dont_hold_back_alone(self):
+        self.queue = GroupedIndexedPriorityQueue(default_quota=1)
+
+        for key in range(3):
+            self.queue.push("a", key, key)
+
+        self.assertEqual(self.queue.pop(), ("a", 0, 0))
+        self.assertIn("a", self.queue.exhausted)
+        self.assert_invariant()
+
+        # No other group has items, so a new round starts
+        self.assertEqual(self.queue.peek(), ("a", 1, 1))
+        self.assertEqual(self.queue.pop(), ("a", 1, 1))
+
+        self.queue.push("b", 0, 100)
+
+        self.assertEqual(self.queue.pop(), ("b", 0, 100))
+        self.assertEqual(self.queue.pop(), ("a", 2, 2))
+        self.assertFalse(self.queue)
+
+    def test_groups_without_a_quota_dont_hold_back_a_new_round(self):
+        self.queue = GroupedIndexedPriorityQueue(default_quota=1)
+        self.queue.set_quota("b", 2)
+        self.queue.set_quota("free", None)
+
+        for key in range(4):
+            self.queue.push("a", key, key)
+            self.queue.push("b", key, 4 + key)
+
+        for key in range(3):
+            self.queue.push("free", key, 8 + key)
+
+        popped = [self.queue.pop()[:2] for _ in range(len(self.queue))]
+
+        # Once "a" and "b" use up their quotas, a new round starts, even
+        # though "free" has items
+        self.assertEqual(
+            popped,
+            [("a", 0), ("b", 0), ("b", 1)]
+            + [("a", 1), ("b", 2), ("b", 3)]
+            + [("a", 2), ("a", 3)]
+            + [("free", 0), ("free", 1), ("free", 2)],
+        )
+        self.assertFalse(self.queue)
+
+    def test_pop_from_a_group_ignores_quotas(self):
+        self.queue = GroupedIndexedPriorityQueue(default_quota=1)
+
+        for key in range(3):
+            self.queue.push("a", key, key)
+
+        self.queue.pop()
+        self.queue.push("b", 0, 100)
+
+        self.assertEqual(self.queue.pop("a"), ("a", 1, 1))
+        self.assertEqual(self.queue.peek(), ("b", 0, 100))
+        self.assert_invariant()
+
+    def test_set_quota_during_a_round(self):
+        self.queue = GroupedIndexedPriorityQueue(default_quota=2)
+
+        for key in range(4):
+            self.queue.push("a", key, key)
+            self.queue.push("b", key, 10 + key)
+
+        self.queue.pop()
+        self.queue.set_quota("a", 1)
+
+        self.assertIn("a", self.queue.exhausted)
+        self.assertEqual(self.queue.peek()[0], "b")
+        self.assert_invariant()
+
+        self.queue.set_quota("a", None)
+
+        self.assertIsNone(self.queue.quota("a"))
+        self.assertNotIn("a", self.queue.exhausted)
+        self.assertEqual(self.queue.peek(), ("a", 1, 1))
+        self.assert_invariant()
+
+        self.queue.set_quota("a", 2)
+        self.assertNotIn("a", self.queue.quotas)
+
+    def test_queue_factory(self):
+        self.queue = GroupedIndexedPriorityQueue(
+            queue_factory=partial(IndexedPriorityQueue, order="max")
+        )
+        self.push_example_values()
+
+        self.assertEqual(self.queue.pop(), ("a", "a3", 7))
+        self.assertEqual(self.queue.pop(), ("a", "a1", 5))
+        self.assertEqual(self.queue.pop(), ("c", "c1", 4))
+        self.assert_invariant()
+
+    def test_random(self):
+        random = Random(0)
+        self.queue = GroupedIndexedPriorityQueue(default_quota=3)
+        expected = {}  # (group, key) -> priority
+        used = {}
+        next_key = 0
+
+        for group in range(5):
+            self.queue.set_quota(group, random.choice((1, 2, None)))
+
+        for _ in range(3000):
+            operation = random.random()
+
+            if operation < 0.4 or not expected:
+                group = random.randrange(8)
+                expected[group, next_key] = random.randrange(100)
+                self.queue.push(group, next_key, expected[group, next_key])
+                next_key += 1
+
+            elif operation < 0.5:
+                group_key = random.choice(list(expected))
+                expected[group_key] = random.randrange(100)
+                self.queue.update(*group_key, expected[group_key])
+
+            elif operation < 0.6:
+                group_key = random.choice(list(expected))
+                priority = expected.pop(group_key)
+                self.assertEqual(
+                    self.queue.delete(*group_key), (group_key[1], priority)
+                )
+
+            elif operation < 0.7:
+                group = random.choice(list(expected))[0]
+                _, key, priority = self.queue.pop(group)
+                self.assertEqual(
+                    priority,
+                    min(p for (g, _), p in expected.items() if g == group),
+                )
+                self.assertEqual(expected.pop((group, key)), priority)
+
+            else:
+                # The best head among the groups with quota left. A new round
+                # starts once every group with a quota and items used it up.
+                def has_quota_left(group):
+                    quota = self.queue.quota(group)
+                    return quota is None or used.get(group, 0) < quota
+
+                groups = {group for group, _ in expected}
+                exhausted = [group for group in used if not has_quota_left(group)]
+                limited = [
+                    group
+                    for group in groups
+                    if self.queue.quota(group) is not None and has_quota_left(group)
+                ]
+
+                if exhausted and not limited:
+                    used.clear()
+
+                available = set(filter(has_quota_left, groups))
+
+                group, key, priority = self.queue.pop()
+
+                self.assertIn(group, available)
+                self.assertEqual(
+                    priority,
+                    min(p for (g, _), p in expected.items() if g in available),
+                )
+                self.assertEqual(expected.pop((group, key)), priority)
+                used[group] = used.get(group, 0) + 1
+
+            self.assertEqual(len(self.queue), len(expected))
+            self.assert_invariant()
@@ -0,0 +1,239 @@
+from random import choice, randrange
+from unittest import TestCase
+
+from indexed_priority_queue.pairing import IndexedPairingHeap
+
+
+class IndexedPairingHeapTestCase(TestCase):
+    RUNS = 50
+
+    def setUp(self):
+        self.queue = IndexedPairingHeap()
+
+    def assert_invariant(self):
+        # Walks the whole tree checking the heap order and the links
+        count = 0
+        stack = [self.queue.root] if self.queue.root else []
+
+        if stack:
+            self.assertIsNone(stack[0].prev)
+            self.assertIsNone(stack[0].sibling)
+
+        while stack:
+            node = stack.pop()
+            count += 1
+
+            self.assertIs(self.queue.nodes[node.key], node)
+
+            prev = node
+            child = node.child
+
+            while child is not None:
+                self.assertIs(child.prev, prev)
+                self.assertLessEqual(node.priority, child.priority)
+                stack.append(child)
+                prev = child
+                child = child.sibling
+
+        self.assertEqual(count, len(self.queue))
+
+    def test_when_empty(self):
+        self.assertFalse(self.queue)
+        self.assertEqual(len(self.queue), 0)
+
+        with self.assertRaises(IndexError):
+            self.queue.pop()
+
+        with self.assertRaises(IndexError):
+            self.queue.peek()
+
+        for method in (self.queue.delete, self.queue.priority):
+            with self.assertRaises(KeyError):
+                method("John")
+
+        with self.assertRaises(KeyError):
+            self.queue.update("John", 1)
+
+    def test_iteration(self):
+        self.assertEqual(list(self.queue), [])
+
+        for key in range(100):
+            self.queue.push(key, (key * 37) % 101)
+
+        # Gives the heap some structure
+        self.queue.pop()
+        self.queue.update(50, -1)
+
+        expected = sorted(self.queue.items(), key=lambda item: item[1])
+
+        self.assertEqual(len(expected), 99)
+        self.assertEqual(list(self.queue), expected)
+        self.assertEqual(self.queue.peek_many(5), expected[:5])
+        self.assertIn((50, -1), self.queue.items())
+        self.assertEqual(len(self.queue), 99)
+
+        iterator = iter(self.queue)
+        next(iterator)
+        self.queue.pop()
+
+        with self.assertRaises(RuntimeError):
+            next(iterator)
+
+        self.assertEqual(list(self.queue.drain()), expected[1:])
+        self.assertFalse(self.queue)
+
+    def test_push_with_duplicated_keys(self):
+        self.queue.push("John", 1)
+
+        with self.assertRaises(KeyError):
+            self.queue.push("John", 2)
+
+    def test_example(self):
+        self.queue.push("John", 7)
+        self.queue.push("Maria", 3)
+        self.queue.push("Peter", 5)
+        self.assertEqual(self.queue.peek(), ("Maria", 3))
+
+        self.queue.push("Kim", 2)
+        self.assertEqual(self.queue.peek(), ("Kim", 2))
+
+        self.queue.update("Peter", 1)
+        self.assertEqual(self.queue.peek(), ("Peter", 1))
+
+        self.assertEqual(len(self.queue), 4)
+        self.assertEqual(self.queue.delete("John"), ("John", 7))
+        self.assertEqual(len(self.queue), 3)
+
+        self.assertEqual(self.queue.pop(), ("Peter", 1))
+        self.assertEqual(self.queue.peek(), ("Kim", 2))
+        self.assertEqual(self.queue.priority("Kim"), 2)
+
+        self.assertTrue(self.queue)
+        self.assertNotIn("Max", self.queue)
+        self.assertIn("Maria", self.queue)
+
+        self.assert_invariant()
+
+    def test_update_increasing_priority_of_root(self):
+        self.queue = IndexedPairingHeap.from_items((i, i) for i in range(10))
+        self.queue.pop()
+
+        self.queue.update(1, 20)
+
+        self.assertEqual(self.queue.peek(), (2, 2))
+        self.assertEqual(self.queue.priority(1), 20)
+        self.assert_invariant()
+
+    def test_merge(self):
+        for key in range(20):
+            self.queue.push(key, key % 7)
+
+        other = IndexedPairingHeap.from_items((key, key % 5) for key in range(15, 40))
+
+        with self.assertRaises(KeyError):
+            self.queue.merge(other)
+
+        self.assertEqual(len(self.queue), 20)
+        self.assert_invariant()
+
+        self.queue.merge(other, conflict="min")
+
+        self.assertEqual(len(self.queue), 40)
+        self.assertEqual(self.queue.priority(16), 1)  # 16 % 7 is 2
+        self.assertEqual(self.queue.priority(19), 4)  # 19 % 5 is 4
+        self.assert_invariant()
+
+        # The other heap is left as it is
+        self.queue = other
+        self.assertEqual(len(other), 25)
+        self.assert_invariant()
+
+    def test_union(self):
+        heaps = [
+            IndexedPairingHeap.from_items((key, key + offset) for key in range(10))
+            for offset in range(3)
+        ]
+
+        self.queue = IndexedPairingHeap.union(*heaps, conflict="max")
+
+        self.assertEqual(
+            list(self.queue.drain()), [(key, key + 2) for key in range(10)]
+        )
+        self.assertEqual(len(IndexedPairingHeap.union()), 0)
+
+        with self.assertRaises(ValueError):
+            IndexedPairingHeap.union(*heaps, conflict="first")
+
+    def test_random(self):
+        for _ in range(IndexedPairingHeapTestCase.RUNS):
+            self.setUp()
+            self.do_random_test()
+
+    def do_random_test(self):
+        expected = {}
+
+        for key in range(randrange(300)):
+            operation = choice(
+                ("push", "push", "pop", "delete", "update", "below", "merge")
+            )
+
+            if operation == "push" or not expected:
+                expected[key] = randrange(70)
+                self.queue.push(key, expected[key])
+
+            elif operation == "pop":
+                popped_key, priority = self.queue.pop()
+                self.assertEqual(priority, min(expected.values()))
+                self.assertEqual(expected.pop(popped_key), priority)
+
+            elif operation == "delete":
+                deleted_key = choice(list(expected))
+                self.assertEqual(
+                    self.queue.delete(deleted_key),
+                    (deleted_key, expected.pop(deleted_key)),
+                )
+
+            elif operation == "merge":
+                other = {
+                    choice((key, *expected)): randrange(70)
+                    for _ in range(randrange(10))
+                }
+                self.queue.merge(
+                    IndexedPairingHeap.from_items(other.items()), conflict="min"
+                )
+
+                for other_key, priority in other.items():
+                    expected[other_key] = min(expected.get(other_key, 70), priority)
+
+            elif operation == "below":
+                threshold = randrange(-10, 80)
+                below = {
+                    key for key, priority in expected.items() if priority < threshold
+                }
+
+                self.assertEqual(set(self.queue.keys_below(threshold)), below)
+                self.assertEqual(self.queue.count_below(threshold), len(below))
+
+                popped = self.queue.pop_while(threshold)
+                self.assertEqual(
+                    [priority for _, priority in popped],
+                    sorted(expected[key] for key in below),
+                )
+
+                for popped_key, priority in popped:
+                    self.assertEqual(expected.pop(popped_key), priority)
+
+            else:
+                updated_key = choice(list(expected))
+                expected[updated_key] += randrange(-20, 20)
+                self.queue.update(updated_key, expected[updated_key])
+
+            self.assert_invariant()
+
+            for expected_key, priority in expected.items():
+                self.assertEqual(self.queue.priority(expected_key), priority)
+
+        while expected:
+            key, priority = self.queue.pop()
+            self.assertEqual(priority, min(expected.values()))
+            self.assertEqual(expected.pop(key), priority)
@@ -1,5 +1,10 @@
+import os
+from random import Random
+from tempfile import TemporaryDirectory
 from unittest.mock import Mock
 
+from indexed_priority_queue.ipq import KEEP_MAX, KEEP_MIN, RAISE
+from indexed_priority_queue.pairing import IndexedPairingHeap
 from indexed_priority_queue.tests.base_indexed_priority_queue_test_case import (
     BaseIndexedPriorityQueueTestCase,
 )
@@ -83,7 +88,7 @@ class IndexedPriorityQueueTestCase(BaseIndexedPriorityQueueTestCase):
         self.assertIn(KEY_MOCK, self.queue.key_index)
         self.assertEqual(self.queue.key_index[KEY_MOCK], LEFTMOST_INDEX)
 
-        self.assertIn(LEFTMOST_INDEX, self.queue.index_key)
+        self.assertEqual(len(self.queue.index_key), 1)
         self.assertEqual(self.queue.index_key[LEFTMOST_INDEX], KEY_MOCK)
 
     def test_push_with_examples(self):
@@ -138,7 +143,7 @@ class IndexedPriorityQueueTestCase(BaseIndexedPriorityQueueTestCase):
         self.assertEqual(len(self.queue), previous_length - 1)
 
         self.assertNotIn(popped_key, self.queue.key_index)
-        self.assertNotIn(last_element_index, self.queue.index_key)
+        self.assertEqual(len(self.queue.index_key), last_element_index)
 
         self.assert_invariant()
 
@@ -182,7 +187,7 @@ class IndexedPriorityQueueTestCase(BaseIndexedPriorityQueueTestCase):
         self.assertEqual(len(self.queue), length - 1)
 
         self.assertNotIn(middle_key, self.queue.key_index)
-        self.assertNotIn(last_index, self.queue.index_key)
+        self.assertEqual(len(self.queue.index_key), last_index)
 
         self.assert_invariant()
 
@@ -202,7 +207,7 @@ class IndexedPriorityQueueTestCase(BaseIndexedPriorityQueueTestCase):
         self.assertEqual(len(self.queue), length - 1)
 
         self.assertNotIn(last_key, self.queue.key_index)
-        self.assertNotIn(last_index, self.queue.index_key)
+        self.assertEqual(len(self.queue.index_key), last_index)
 
         self.assert_invariant()
 
@@ -373,3 +378,826 @@ class IndexedPriorityQueueTestCase(BaseIndexedPriorityQueueTestCase):
         for obj in objects:
             with self.assertRaises(TypeError):
                 self.queue.push(obj, 1)
+
+    def test_key_when_index_does_not_exist(self):
+        self.push_mocked_element_to_queue()
+
+        for index in (-1, 1):
+            with self.assertRaises(KeyError):
+                self.queue.key(index)
+
+    def test_key_when_index_exists(self):
+        self.push_mocked_element_to_queue()
+        self.assertIs(self.queue.key(LEFTMOST_INDEX), KEY_MOCK)
+
+    def test_from_items_when_empty(self):
+        queue = self.queue.from_items([])
+        self.assertEqual(len(queue), 0)
+
+    def test_from_items_with_examples(self):
+        self.queue = self.queue.from_items(
+            (key, priority) for priority, key in EXAMPLE_ELEMENTS
+        )
+
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS))
+        self.assertEqual(len(self.queue.key_index), len(EXAMPLE_ELEMENTS))
+        self.assertEqual(
+            self.queue.peek(), (EXAMPLE_TOP_PRIORITY_KEY, EXAMPLE_TOP_PRIORITY)
+        )
+
+        for priority, key in EXAMPLE_ELEMENTS:
+            self.assertEqual(self.queue.priority(key), priority)
+
+        self.assert_invariant()
+
+    def test_from_items_with_duplicated_keys(self):
+        with self.assertRaises(KeyError):
+            self.queue.from_items([("a", 1), ("b", 2), ("a", 3)])
+
+    def test_from_dict(self):
+        self.queue = self.queue.from_dict(
+            {key: priority for priority, key in EXAMPLE_ELEMENTS}
+        )
+
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS))
+        self.assertEqual(
+            self.queue.pop(), (EXAMPLE_TOP_PRIORITY_KEY, EXAMPLE_TOP_PRIORITY)
+        )
+
+        self.assert_invariant()
+
+    def test_push_many_one_by_one(self):
+        self.push_example_values()
+
+        self.queue.push_many([("Ann", 0), ("Bob", 20)])
+
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS) + 2)
+        self.assertEqual(self.queue.peek(), ("Ann", 0))
+        self.assertEqual(self.queue.priority("Bob"), 20)
+
+        self.assert_invariant()
+
+    def test_push_many_with_heapify(self):
+        self.queue.push_many((key, priority) for priority, key in EXAMPLE_ELEMENTS)
+
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS))
+        self.assertEqual(
+            self.queue.peek(), (EXAMPLE_TOP_PRIORITY_KEY, EXAMPLE_TOP_PRIORITY)
+        )
+
+        self.assert_invariant()
+
+    def test_push_many_with_duplicated_keys(self):
+        self.push_example_values()
+
+        with self.assertRaises(KeyError):
+            self.queue.push_many([("Ann", 0), ("Bob", 20), ("Ann", 1)])
+
+        with self.assertRaises(KeyError):
+            self.queue.push_many([("Ann", 0), ("Dan", 20)])
+
+        # Nothing has been pushed
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS))
+        self.assertEqual(len(self.queue.key_index), len(EXAMPLE_ELEMENTS))
+        self.assertNotIn("Ann", self.queue)
+
+        self.assert_invariant()
+
+    def assert_example_values_only(self):
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS))
+        self.assertEqual(len(self.queue.key_index), len(EXAMPLE_ELEMENTS))
+        self.assertEqual(
+            sorted(self.queue.items()),
+            sorted((key, priority) for priority, key in EXAMPLE_ELEMENTS),
+        )
+        self.assertEqual(
+            self.queue.peek(), (EXAMPLE_TOP_PRIORITY_KEY, EXAMPLE_TOP_PRIORITY)
+        )
+        self.assert_invariant()
+
+    def test_push_many_when_the_items_raise(self):
+        self.push_example_values()
+
+        def items():
+            yield "Ann", 0
+            yield "Bob", 20
+            raise RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            self.queue.push_many(items())
+
+        self.assert_example_values_only()
+
+    def test_push_many_with_malformed_pairs(self):
+        self.push_example_values()
+
+        for batch in ([("Ann", 0), ("Bob",)], [("Ann", 0), (["Bob"], 1)]):
+            with self.assertRaises((ValueError, TypeError)):
+                self.queue.push_many(batch)
+
+            self.assert_example_values_only()
+
+    def test_push_many_with_priorities_that_cant_be_compared(self):
+        self.push_example_values()
+
+        # Sifted up, and heapified
+        for count in (2, len(EXAMPLE_ELEMENTS)):
+            batch = [(f"new {index}", 0) for index in range(count - 1)]
+            batch.append(("bad", "x"))
+
+            with self.assertRaises(TypeError):
+                self.queue.push_many(batch)
+
+            self.assert_example_values_only()
+
+    def test_pop_many(self):
+        self.push_example_values()
+
+        expected = sorted(priority for priority, _ in EXAMPLE_ELEMENTS)
+
+        popped = self.queue.pop_many(1) + self.queue.pop_many(2)
+        popped += self.queue.pop_many(len(EXAMPLE_ELEMENTS))
+
+        self.assertEqual([priority for _, priority in popped], expected)
+        self.assertEqual(len(self.queue), 0)
+        self.assertEqual(len(self.queue.key_index), 0)
+
+        for key, priority in popped:
+            self.assertIn((priority, key), EXAMPLE_ELEMENTS)
+
+    def test_pop_many_keeps_the_rest(self):
+        self.push_example_values()
+
+        popped = self.queue.pop_many(5)
+
+        self.assertEqual(len(popped), 5)
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS) - 5)
+        self.assertEqual(len(self.queue.key_index), len(EXAMPLE_ELEMENTS) - 5)
+        self.assertLessEqual(popped[-1][1], self.queue.peek()[1])
+
+        self.assert_invariant()
+
+    def test_pop_many_when_empty(self):
+        self.assertEqual(self.queue.pop_many(3), [])
+
+    def test_keys_below(self):
+        self.push_example_values()
+
+        self.assertEqual(sorted(self.queue.keys_below(3)), ["Lara", "Peter", "Tom"])
+        self.assertEqual(
+            sorted(self.queue.keys_below(3, inclusive=True)),
+            ["Dan", "Justin", "Lara", "Peter", "Tom"],
+        )
+        self.assertEqual(self.queue.keys_below(1), [])
+        self.assertEqual(len(self.queue.keys_below(100)), len(EXAMPLE_ELEMENTS))
+
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS))
+        self.assert_invariant()
+
+    def test_count_below(self):
+        self.assertEqual(self.queue.count_below(3), 0)
+
+        self.push_example_values()
+
+        for threshold in range(14):
+            for inclusive in (False, True):
+                self.assertEqual(
+                    self.queue.count_below(threshold, inclusive),
+                    sum(
+                        priority < threshold or inclusive and priority == threshold
+                        for priority, _ in EXAMPLE_ELEMENTS
+                    ),
+                )
+
+    def test_pop_while(self):
+        self.push_example_values()
+
+        self.assertEqual(self.queue.pop_while(1), [])
+
+        popped = self.queue.pop_while(3)
+
+        self.assertEqual([priority for _, priority in popped], [1, 2, 2])
+        self.assertEqual(sorted(key for key, _ in popped), ["Lara", "Peter", "Tom"])
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS) - 3)
+        self.assertEqual(len(self.queue.key_index), len(EXAMPLE_ELEMENTS) - 3)
+        self.assert_invariant()
+
+        popped = self.queue.pop_while(5, inclusive=True)
+
+        self.assertEqual([priority for _, priority in popped], [3, 3, 4, 5])
+        self.assertEqual(self.queue.peek(), ("Kim", 6))
+        self.assert_invariant()
+
+        popped = self.queue.pop_while(100)
+
+        self.assertEqual([priority for _, priority in popped], [6, 7, 8, 9, 10, 11, 12])
+        self.assertFalse(self.queue)
+        self.assertEqual(self.queue.pop_while(100), [])
+
+    def test_pop_while_random(self):
+        random = Random(0)
+
+        for _ in range(20):
+            self.queue = self.create_queue()
+            expected = {key: random.randrange(100) for key in range(200)}
+            self.queue.push_many(expected.items())
+
+            threshold = random.randrange(100)
+            popped = self.queue.pop_while(threshold)
+
+            self.assertEqual(
+                [priority for _, priority in popped],
+                sorted(
+                    priority for priority in expected.values() if priority < threshold
+                ),
+            )
+
+            for key, priority in popped:
+                self.assertEqual(expected.pop(key), priority)
+
+            self.assertEqual(sorted(self.queue.items()), sorted(expected.items()))
+            self.assert_invariant()
+
+    def test_threshold_queries_with_options(self):
+        self.queue = self.create_queue(order="max", stable=True)
+
+        for key in range(20):
+            self.queue.push(key, key % 4)
+
+        self.assertEqual(self.queue.count_below(2), 5)
+        self.assertEqual(self.queue.count_below(2, inclusive=True), 10)
+        self.assertEqual(sorted(self.queue.keys_below(2)), [3, 7, 11, 15, 19])
+
+        # Ties come out in the order they were pushed
+        self.assertEqual(
+            self.queue.pop_while(2, inclusive=True),
+            [(key, 3) for key in range(3, 20, 4)]
+            + [(key, 2) for key in range(2, 20, 4)],
+        )
+        self.assert_invariant()
+
+        self.queue = self.create_queue(key=len)
+        self.queue.push_many([("a", "xx"), ("b", "x"), ("c", "xxx")])
+
+        self.assertEqual(sorted(self.queue.keys_below("yyy")), ["a", "b"])
+        self.assertEqual(self.queue.pop_while("yyy"), [("b", "x"), ("a", "xx")])
+        self.assertEqual(self.queue.peek(), ("c", "xxx"))
+
+    def test_merge(self):
+        random = Random(0)
+
+        # Small next to the queue (sifted up), and big (heapified)
+        for size, other_size in ((200, 10), (10, 200)):
+            self.queue = self.create_queue()
+            expected = {key: random.randrange(100) for key in range(size)}
+            self.queue.push_many(expected.items())
+
+            other = self.create_queue()
+            other_items = {
+                key: random.randrange(100) for key in range(size, size + other_size)
+            }
+            other.push_many(other_items.items())
+
+            self.queue.merge(other)
+            expected.update(other_items)
+
+            self.assertEqual(sorted(self.queue.items()), sorted(expected.items()))
+            self.assertEqual(sorted(other.items()), sorted(other_items.items()))
+            self.assert_invariant()
+
+            self.assertEqual(
+                [priority for _, priority in self.queue.drain()],
+                sorted(expected.values()),
+            )
+
+    def test_merge_conflicts(self):
+        self.push_example_values()
+        other = IndexedPairingHeap.from_items([("Ann", 0), ("Dan", 20), ("Jim", 1)])
+
+        with self.assertRaises(KeyError):
+            self.queue.merge(other)
+
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS))
+        self.assertNotIn("Ann", self.queue)
+
+        self.queue.merge(other, conflict=KEEP_MIN)
+
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS) + 1)
+        self.assertEqual(self.queue.priority("Dan"), 3)
+        self.assertEqual(self.queue.priority("Jim"), 1)
+        self.assertEqual(self.queue.peek(), ("Ann", 0))
+        self.assert_invariant()
+
+        self.queue.merge(other, conflict=KEEP_MAX)
+
+        self.assertEqual(self.queue.priority("Ann"), 0)
+        self.assertEqual(self.queue.priority("Dan"), 20)
+        self.assertEqual(self.queue.priority("Jim"), 1)
+        self.assert_invariant()
+
+        with self.assertRaises(ValueError):
+            self.queue.merge(other, conflict="first")
+
+    def test_merge_when_the_items_raise(self):
+        self.push_example_values()
+
+        class Source:
+            def __len__(self):
+                return 2
+
+            def items(self):
+                yield "Ann", 0
+                yield "Bob", 1
+                raise RuntimeError()
+
+        for conflict in (RAISE, KEEP_MIN):
+            with self.assertRaises(RuntimeError):
+                self.queue.merge(Source(), conflict=conflict)
+
+            self.assert_example_values_only()
+
+        with self.assertRaises(RuntimeError):
+            type(self.queue).union(self.queue, Source())
+
+        self.assert_example_values_only()
+
+    def test_union(self):
+        queues = []
+
+        for offset, keys in enumerate((range(0, 50), range(40, 100), range(90, 300))):
+            queue = self.create_queue()
+            queue.push_many((key, key + offset) for key in keys)
+            queues.append(queue)
+
+        for conflict, expected_offsets in ((KEEP_MIN, (0, 1)), (KEEP_MAX, (1, 2))):
+            self.queue = type(self.queue).union(*queues, conflict=conflict)
+
+            self.assertEqual(len(self.queue), 300)
+            self.assertEqual(self.queue.priority(45), 45 + expected_offsets[0])
+            self.assertEqual(self.queue.priority(95), 95 + expected_offsets[1])
+            self.assertEqual(self.queue.priority(200), 202)
+            self.assert_invariant()
+
+            # Nothing is shared with the copied queue
+            self.assertIsNot(self.queue.queue, queues[2].queue)
+            self.assertEqual([len(queue) for queue in queues], [50, 60, 210])
+
+        with self.assertRaises(KeyError):
+            type(self.queue).union(*queues)
+
+        self.assertEqual(len(type(self.queue).union()), 0)
+
+    def test_union_with_options(self):
+        first = self.create_queue()
+        first.push_many((key, key) for key in range(10))
+        second = IndexedPairingHeap.from_items((key, -key) for key in range(5, 15))
+
+        self.queue = type(self.queue).union(
+            first, second, conflict=KEEP_MAX, order="max", stable=True
+        )
+
+        self.assertEqual(self.queue.pop_many(3), [(9, 9), (8, 8), (7, 7)])
+        self.assertEqual(self.queue.priority(10), -10)
+        self.assertEqual(len(self.queue), 12)
+        self.assert_invariant()
+
+    def test_update_many(self):
+        self.push_example_values()
+
+        for items in ([("Leo", 0)], [("Max", -1), ("Lara", 20), ("Jim", 1)] * 3):
+            self.queue.update_many(items)
+
+            for key, priority in items:
+                self.assertEqual(self.queue.priority(key), priority)
+
+            self.assert_invariant()
+
+        self.assertEqual(self.queue.peek(), ("Max", -1))
+
+    def test_update_many_when_key_does_not_exist(self):
+        self.push_example_values()
+
+        with self.assertRaises(KeyError):
+            self.queue.update_many([("Leo", 0), ("Ann", 1)])
+
+        self.assertEqual(self.queue.priority("Leo"), 8)
+
+    def test_delete_many(self):
+        self.push_example_values()
+
+        keys = [key for _, key in EXAMPLE_ELEMENTS]
+
+        for batch in (keys[:1], keys[1:3], keys[3:]):
+            deleted = self.queue.delete_many(batch)
+
+            self.assertEqual([key for key, _ in deleted], batch)
+
+            for key, priority in deleted:
+                self.assertIn((priority, key), EXAMPLE_ELEMENTS)
+                self.assertNotIn(key, self.queue)
+
+            self.assert_invariant()
+
+        self.assertEqual(len(self.queue), 0)
+
+    def test_delete_many_with_heapify(self):
+        self.push_example_values()
+
+        deleted = self.queue.delete_many(["Lara", "Dan", "Jim", "Tom", "Leo", "Max"])
+
+        self.assertEqual(len(deleted), 6)
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS) - 6)
+        self.assertEqual(len(self.queue.key_index), len(EXAMPLE_ELEMENTS) - 6)
+        self.assertEqual(self.queue.peek(), ("Peter", 2))
+
+        self.assert_invariant()
+
+    def test_delete_many_when_key_does_not_exist(self):
+        self.push_example_values()
+
+        for keys in (["Leo", "Ann"], ["Leo", "Leo"]):
+            with self.assertRaises(KeyError):
+                self.queue.delete_many(keys)
+
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS))
+
+    def save_and_load(self, **kwargs):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "queue.snapshot")
+            self.queue.save(path)
+            return self.queue.load(path, **kwargs)
+
+    def assert_same_queue(self, queue):
+        self.assertEqual(queue.queue, self.queue.queue)
+        self.assertEqual(queue.index_key, self.queue.index_key)
+        self.assertEqual(queue.key_index, self.queue.key_index)
+
+    def test_save_and_load_when_empty(self):
+        queue = self.save_and_load()
+
+        self.assertEqual(len(queue), 0)
+        self.assertIs(type(queue), type(self.queue))
+
+    def test_save_and_load_with_examples(self):
+        for priority, key in EXAMPLE_ELEMENTS:
+            self.queue.push(key, priority)
+
+        queue = self.save_and_load()
+
+        self.assert_same_queue(queue)
+
+        self.queue = queue
+        self.assert_invariant()
+
+        self.assertEqual(queue.pop(), (EXAMPLE_TOP_PRIORITY_KEY, EXAMPLE_TOP_PRIORITY))
+
+    def test_save_and_load_with_int_keys_and_float_priorities(self):
+        for key in range(100):
+            self.queue.push(key, (key * 37 % 101) / 3)
+
+        self.assert_same_queue(self.save_and_load())
+
+    def test_save_and_load_with_other_keys_and_priorities(self):
+        self.queue.push(("tuple", 1), 2**70)
+        self.queue.push(None, -(2**70))
+        self.queue.push(1.5, 3)
+        self.queue.push("key", 2.5)
+
+        self.assert_same_queue(self.save_and_load())
+
+    def test_load_when_it_is_not_a_snapshot(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "queue.snapshot")
+
+            with open(path, "wb") as file:
+                file.write(b"not a snapshot")
+
+            with self.assertRaises(ValueError):
+                self.queue.load(path)
+
+    def test_invalid_order(self):
+        with self.assertRaises(ValueError):
+            self.create_queue(order="middle")
+
+    def test_max_order(self):
+        self.queue = self.create_queue(order="max")
+        self.push_example_values()
+
+        self.assertEqual(self.queue.peek(), ("Jim", 12))
+        self.assertEqual(self.queue.priority("Jim"), 12)
+        self.assertEqual(
+            [priority for _, priority in self.queue.pop_many(len(self.queue))],
+            sorted((priority for priority, _ in EXAMPLE_ELEMENTS), reverse=True),
+        )
+
+    def test_key_function(self):
+        # Priorities that can't be compared on their own
+        self.queue = self.create_queue(key=len)
+
+        self.queue.push("a", {"x": 1, "y": 2})
+        self.queue.push("b", {"x": 1})
+        self.queue.push("c", {})
+        self.queue.update("c", {"x": 1, "y": 2, "z": 3})
+
+        self.assertEqual(self.queue.priority("c"), {"x": 1, "y": 2, "z": 3})
+        self.assertEqual(self.queue.pop(), ("b", {"x": 1}))
+        self.assertEqual(self.queue.delete("c"), ("c", {"x": 1, "y": 2, "z": 3}))
+        self.assertEqual(self.queue.pop(), ("a", {"x": 1, "y": 2}))
+
+    def test_key_function_with_max_order(self):
+        self.queue = self.create_queue(order="max", key=len)
+        self.queue.push_many([("a", "xx"), ("b", "xxx"), ("c", "x")])
+
+        self.assertEqual(self.queue.pop(), ("b", "xxx"))
+        self.assertEqual(self.queue.pop(), ("a", "xx"))
+
+    def test_tuple_key_function_with_max_order(self):
+        self.queue = self.create_queue(
+            order="max", key=lambda job: (job["deadline"], -job["weight"])
+        )
+        self.queue.push_many(
+            [
+                ("a", {"deadline": 2, "weight": 5}),
+                ("b", {"deadline": 3, "weight": 1}),
+                ("c", {"deadline": 2, "weight": 1}),
+            ]
+        )
+
+        self.assertEqual([self.queue.pop()[0] for _ in range(3)], ["b", "c", "a"])
+
+        self.queue = self.create_queue(order="max", key=lambda priority: (priority,))
+
+        with self.assertRaises(TypeError):
+            self.queue.push("a", "x")
+
+    def test_key_function_that_raises(self):
+        def key(priority):
+            if priority < 0:
+                raise ValueError()
+
+            return priority
+
+        for options in ({"key": key}, {"key": key, "order": "max", "stable": True}):
+            self.queue = self.create_queue(**options)
+            self.queue.push_many([("a", 1), ("b", 2)])
+
+            with self.assertRaises(ValueError):
+                self.queue.push("c", -1)
+
+            with self.assertRaises(ValueError):
+                self.queue.update("a", -1)
+
+            with self.assertRaises(ValueError):
+                self.queue.update_many([("a", 3), ("b", -1)])
+
+            self.assertNotIn("c", self.queue)
+            self.assertEqual(sorted(self.queue.items()), [("a", 1), ("b", 2)])
+            self.assertEqual(self.queue.priority("a"), 1)
+            self.assert_invariant()
+
+    def test_stable(self):
+        for order in ("min", "max"):
+            self.queue = self.create_queue(order=order, stable=True)
+
+            for key in range(50):
+                self.queue.push(key, key % 2)
+
+            # Updating a key makes it the newest one with its priority
+            self.queue.update(0, 0)
+
+            evens = list(range(2, 50, 2)) + [0]
+            odds = list(range(1, 50, 2))
+            expected = evens + odds if order == "min" else odds + evens
+
+            self.assertEqual([self.queue.pop()[0] for _ in range(50)], expected)
+
+    def test_options_with_batch_operations(self):
+        random = Random(0)
+
+        for options in ({"order": "max"}, {"key": abs, "stable": True}):
+            self.queue = self.create_queue(**options)
+            expected = {key: random.randrange(-50, 50) for key in range(200)}
+
+            self.queue.push_many(expected.items())
+
+            updated = {key: random.randrange(-50, 50) for key in range(0, 200, 2)}
+            self.queue.update_many(updated.items())
+            expected.update(updated)
+
+            for key, priority in self.queue.delete_many(range(0, 200, 3)):
+                self.assertEqual(expected.pop(key), priority)
+
+            self.assert_invariant()
+
+            if options.get("order") == "max":
+                order = sorted(expected.items(), key=lambda item: -item[1])
+            else:
+                order = sorted(expected.items(), key=lambda item: abs(item[1]))
+
+            popped = self.queue.pop_many(len(expected))
+
+            self.assertEqual(sorted(popped), sorted(expected.items()))
+            self.assertEqual(
+                [options.get("key", int)(priority) for _, priority in popped],
+                [options.get("key", int)(priority) for _, priority in order],
+            )
+
+    def test_save_and_load_with_options(self):
+        self.queue = self.create_queue(order="max")
+        self.push_example_values()
+
+        queue = self.save_and_load(order="max")
+
+        self.assertEqual(queue.peek(), ("Jim", 12))
+        self.assertEqual(queue.priority("Lara"), 1)
+
+    def test_save_and_load_stable(self):
+        random = Random(0)
+
+        for order in ("min", "max"):
+            self.queue = self.create_queue(order=order, stable=True)
+
+            for key in range(100):
+                self.queue.push(key, random.randrange(5))
+
+            # Updated keys are the newest ones with their priority
+            for key in range(0, 100, 7):
+                self.queue.update(key, random.randrange(5))
+
+            self.queue.pop_many(10)
+
+            queue = self.save_and_load(order=order, stable=True)
+            self.assertEqual(dict(queue.items()), dict(self.queue.items()))
+
+            # Ties break the same way, before and after new pushes
+            for key in range(100, 110):
+                self.queue.push(key, key % 5)
+                queue.push(key, key % 5)
+
+            self.assertEqual(list(queue.drain()), list(self.queue.drain()))
+
+    def test_iter_when_empty(self):
+        self.assertEqual(list(self.queue), [])
+        self.assertEqual(list(self.queue.drain()), [])
+        self.assertEqual(list(self.queue.items()), [])
+
+    def test_iter(self):
+        self.push_example_values()
+        queue = list(self.queue.queue)
+
+        expected = [priority for priority, _ in sorted(EXAMPLE_ELEMENTS)]
+
+        self.assertEqual([priority for _, priority in self.queue], expected)
+        self.assertEqual(self.queue.queue, queue)
+
+        peeked = self.queue.peek_many(3)
+
+        self.assertEqual(peeked[0], (EXAMPLE_TOP_PRIORITY_KEY, EXAMPLE_TOP_PRIORITY))
+        self.assertEqual([priority for _, priority in peeked], expected[:3])
+        self.assertEqual(len(self.queue.peek_many(100)), len(EXAMPLE_ELEMENTS))
+
+    def test_iter_with_options(self):
+        random = Random(0)
+
+        for options in ({"order": "max"}, {"key": abs, "stable": True}):
+            self.queue = self.create_queue(**options)
+
+            for key in range(300):
+                self.queue.push(key, random.randrange(-50, 50))
+
+            expected = [self.queue.pop() for _ in range(300)]
+
+            self.queue.push_many(expected)
+
+            if options.get("stable"):
+                self.assertEqual(list(self.queue), expected)
+            else:
+                self.assertEqual(
+                    [priority for _, priority in self.queue],
+                    [priority for _, priority in expected],
+                )
+
+    def test_iter_when_the_queue_changes(self):
+        self.push_example_values()
+
+        iterator = iter(self.queue)
+        next(iterator)
+        self.queue.pop()
+
+        with self.assertRaises(RuntimeError):
+            next(iterator)
+
+    def test_drain(self):
+        self.push_example_values()
+
+        drain = self.queue.drain()
+
+        self.assertEqual(next(drain), (EXAMPLE_TOP_PRIORITY_KEY, EXAMPLE_TOP_PRIORITY))
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS) - 1)
+
+        # Items pushed while draining are drained too
+        self.queue.push("First", 0)
+        self.assertEqual(next(drain), ("First", 0))
+
+        self.assertEqual(len(list(drain)), len(EXAMPLE_ELEMENTS) - 1)
+        self.assertFalse(self.queue)
+
+    def test_items(self):
+        items = self.queue.items()
+        self.push_example_values()
+
+        self.assertEqual(len(items), len(EXAMPLE_ELEMENTS))
+        self.assertEqual(
+            sorted(items), sorted((key, priority) for priority, key in EXAMPLE_ELEMENTS)
+        )
+        self.assertIn(("Dan", 3), items)
+        self.assertNotIn(("Dan", 4), items)
+        self.assertNotIn(("Nobody", 3), items)
+
+    def test_items_with_options(self):
+        self.queue = self.create_queue(order="max", stable=True)
+        self.push_example_values()
+
+        self.assertEqual(
+            sorted(self.queue.items()),
+            sorted((key, priority) for priority, key in EXAMPLE_ELEMENTS),
+        )
+        self.assertIn(("Dan", 3), self.queue.items())
+
+    def test_stats_when_disabled(self):
+        queue_class = type(self.queue)
+
+        with self.assertRaises(ValueError):
+            self.queue.stats()
+
+        self.queue.disable_stats()
+        self.assertIs(type(self.queue), queue_class)
+
+    def test_stats(self):
+        queue_class = type(self.queue)
+        self.queue.enable_stats(sample_every=2)
+
+        self.push_example_values()
+        self.queue.update("Dan", 100)
+        self.queue.pop()
+        self.queue.delete("Dan")
+
+        stats = self.queue.stats()
+        pushes = len(EXAMPLE_ELEMENTS)
+
+        self.assertEqual(stats["calls"]["push"], pushes)
+        self.assertEqual(stats["calls"]["update"], 1)
+        self.assertEqual(stats["calls"]["delete"], 1)
+        self.assertEqual(stats["times"]["push"]["samples"], pushes // 2)
+        self.assertLessEqual(
+            stats["times"]["push"]["mean"], stats["times"]["push"]["max"]
+        )
+        self.assertNotIn("update", stats["times"])
+
+        # Every push sifts up once, and the update and pops sift down
+        self.assertGreaterEqual(sum(stats["levels_up"].values()), pushes)
+        self.assertGreaterEqual(sum(stats["levels_down"].values()), 1)
+        self.assertEqual(stats["size"], len(self.queue))
+        self.assertGreaterEqual(stats["height"], 1)
+
+        self.assert_invariant()
+
+        # Enabling them again starts from scratch
+        self.queue.enable_stats()
+        self.assertEqual(self.queue.stats()["calls"], {})
+
+        self.queue.disable_stats()
+        self.assertIs(type(self.queue), queue_class)
+        self.assertEqual(len(self.queue), pushes - 2)
+
+    def test_stats_with_batch_operations(self):
+        self.queue.enable_stats(sample_every=1)
+
+        self.queue.push_many((key, priority) for priority, key in EXAMPLE_ELEMENTS)
+        self.queue.pop_many(3)
+
+        stats = self.queue.stats()
+
+        # Heapifies are counted too, depending on the sizes
+        stats["calls"].pop("heapify", None)
+
+        self.assertEqual(stats["calls"], {"push_many": 1, "pop_many": 1})
+        self.assertEqual(stats["times"]["pop_many"]["samples"], 1)
+        self.assert_invariant()
+
+    def test_stats_with_merge(self):
+        self.queue.enable_stats(sample_every=1)
+
+        self.queue.push("Ann", 1)
+        self.queue.merge({"Bob": 2, "Cid": 3})
+        self.queue.merge({"Ann": 0, "Dan": 4}, conflict=KEEP_MIN)
+        self.queue.delete_many(["Ann", "Bob"])
+
+        stats = self.queue.stats()
+
+        # Only the outermost calls, not the ones they make
+        stats["calls"].pop("heapify", None)
+
+        self.assertEqual(stats["calls"], {"push": 1, "merge": 2, "delete_many": 1})
+        self.assertEqual(stats["times"]["merge"]["samples"], 2)
+        self.assertEqual(dict(self.queue.items()), {"Cid": 3, "Dan": 4})
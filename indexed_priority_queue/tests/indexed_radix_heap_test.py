@@ -0,0 +1,153 @@
+from random import Random
+from unittest import TestCase
+
+from indexed_priority_queue.benchmarks.traces import discrete_event_trace, replay
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+from indexed_priority_queue.radix import IndexedRadixHeap
+
+
+class IndexedRadixHeapTestCase(TestCase):
+    def setUp(self):
+        self.queue = IndexedRadixHeap()
+
+    def assert_invariant(self):
+        for bucket_index, bucket in enumerate(self.queue.buckets):
+            for key, priority in bucket.items():
+                self.assertEqual(self.queue.key_bucket[key], bucket_index)
+                self.assertEqual(
+                    (priority ^ self.queue.last).bit_length(), bucket_index
+                )
+
+        self.assertEqual(
+            sum(len(bucket) for bucket in self.queue.buckets), len(self.queue)
+        )
+
+    def test_when_empty(self):
+        self.assertFalse(self.queue)
+        self.assertEqual(len(self.queue), 0)
+
+        with self.assertRaises(IndexError):
+            self.queue.pop()
+
+        with self.assertRaises(IndexError):
+            self.queue.peek()
+
+        for method in (self.queue.delete, self.queue.priority):
+            with self.assertRaises(KeyError):
+                method("John")
+
+        with self.assertRaises(KeyError):
+            self.queue.update("John", 1)
+
+    def test_example(self):
+        self.queue.push("a", 7)
+        self.queue.push("b", 3)
+        self.queue.push("c", 5)
+        self.assertEqual(self.queue.peek(), ("b", 3))
+
+        self.queue.update("c", 2)
+        self.assertEqual(self.queue.priority("c"), 2)
+        self.assertEqual(self.queue.pop(), ("c", 2))
+        self.assertEqual(self.queue.last, 2)
+
+        self.assertEqual(self.queue.delete("a"), ("a", 7))
+        self.assertNotIn("a", self.queue)
+        self.assertIn("b", self.queue)
+
+        self.queue.push("d", 2)
+        self.assertEqual(self.queue.pop(), ("d", 2))
+        self.assertEqual(self.queue.pop(), ("b", 3))
+        self.assertFalse(self.queue)
+
+        self.assert_invariant()
+
+    def test_push_with_duplicated_keys(self):
+        self.queue.push("a", 1)
+
+        with self.assertRaises(KeyError):
+            self.queue.push("a", 2)
+
+    def test_monotonicity_is_enforced(self):
+        self.queue = IndexedRadixHeap(minimum=10)
+
+        with self.assertRaises(ValueError):
+            self.queue.push("a", 9)
+
+        self.queue.push("a", 10)
+        self.queue.push("b", 20)
+        self.queue.pop()
+        self.queue.pop()
+
+        for method in (self.queue.push, self.queue.update):
+            with self.assertRaises(ValueError):
+                method("b", 19)
+
+        self.queue.push("c", 20)
+
+        with self.assertRaises(ValueError):
+            self.queue.update("c", 19)
+
+        self.assertEqual(self.queue.priority("c"), 20)
+
+    def test_priorities_must_be_integers(self):
+        with self.assertRaises(TypeError):
+            self.queue.push("a", 1.5)
+
+    def test_drain_and_items(self):
+        for key in range(10):
+            self.queue.push(key, 100 - key)
+
+        self.assertIn((3, 97), self.queue.items())
+        self.assertEqual(len(self.queue.items()), 10)
+        self.assertEqual(
+            [priority for _, priority in self.queue.drain()], list(range(91, 101))
+        )
+
+    def test_random(self):
+        random = Random(0)
+        expected = {}
+
+        for _ in range(5000):
+            operation = random.choice(("push", "push", "pop", "update", "delete"))
+            last = self.queue.last
+
+            if operation == "push" or not expected:
+                key = random.randrange(1000)
+
+                if key not in expected:
+                    expected[key] = last + random.randrange(300)
+                    self.queue.push(key, expected[key])
+
+            elif operation == "pop":
+                key, priority = self.queue.pop()
+                self.assertEqual(priority, min(expected.values()))
+                self.assertEqual(expected.pop(key), priority)
+
+            elif operation == "update":
+                key = random.choice(list(expected))
+                expected[key] = last + random.randrange(300)
+                self.queue.update(key, expected[key])
+
+            else:
+                key = random.choice(list(expected))
+                self.assertEqual(self.queue.delete(key), (key, expected.pop(key)))
+
+            if expected:
+                self.assertEqual(self.queue.peek()[1], min(expected.values()))
+
+        self.assert_invariant()
+
+    def test_discrete_event_trace(self):
+        trace = discrete_event_trace(3000, Random(0), pending=100, max_delay=20)
+
+        heap = IndexedPriorityQueue()
+
+        replay(self.queue, trace)
+        replay(heap, trace)
+
+        # Ties may be popped in another order, but leave the same priorities
+        self.assertEqual(
+            sorted(priority for _, priority in self.queue.items()),
+            sorted(heap.queue),
+        )
+        self.assert_invariant()
@@ -0,0 +1,231 @@
+import os
+from functools import partial
+from random import Random
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from indexed_priority_queue.backend import (
+    DaryIndexedPriorityQueue,
+    IndexedPriorityQueue,
+)
+from indexed_priority_queue.journal import JournaledIndexedPriorityQueue
+
+
+class JournaledIndexedPriorityQueueTestCase(TestCase):
+    def setUp(self):
+        self.temporary_directory = TemporaryDirectory()
+        self.directory = self.temporary_directory.name
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def open(self, **kwargs):
+        return JournaledIndexedPriorityQueue(self.directory, **kwargs)
+
+    def assert_same_items(self, queue, expected):
+        self.assertEqual(len(queue), len(expected))
+
+        for key, priority in expected.items():
+            self.assertEqual(queue.priority(key), priority)
+
+    def test_invalid_fsync_policy(self):
+        with self.assertRaises(ValueError):
+            self.open(fsync="sometimes")
+
+    def test_when_empty(self):
+        with self.open() as queue:
+            self.assertFalse(queue)
+
+        with self.open() as queue:
+            self.assertFalse(queue)
+
+    def test_recovery(self):
+        with self.open() as queue:
+            queue.push("a", 3)
+            queue.push("b", 1)
+            queue.push("c", 2)
+            queue.update("a", 0)
+            queue.delete("c")
+            queue.push("d", 5)
+            self.assertEqual(queue.pop(), ("a", 0))
+
+        with self.open() as queue:
+            self.assert_same_items(queue, {"b": 1, "d": 5})
+            self.assertEqual(queue.pop(), ("b", 1))
+
+    def test_recovery_of_batch_operations(self):
+        with self.open() as queue:
+            queue.push_many((key, -key) for key in range(10))
+            queue.update_many([(0, -20), (1, -30)])
+            queue.delete_many([2, 3])
+            self.assertEqual(queue.pop_many(2), [(1, -30), (0, -20)])
+            self.assertEqual(queue.pop_while(-7), [(9, -9), (8, -8)])
+            self.assertEqual(queue.count_below(-5), 2)
+
+        with self.open() as queue:
+            self.assert_same_items(queue, {key: -key for key in range(4, 8)})
+
+    def test_recovery_without_closing(self):
+        # Nothing is lost when every operation is fsynced
+        queue = self.open(fsync="always")
+        queue.push("a", 1)
+        queue.push("b", 2)
+
+        self.assert_same_items(self.open(), {"a": 1, "b": 2})
+
+        queue.close()
+
+    def test_batch_fsync(self):
+        queue = self.open(batch_size=3, batch_interval=60)
+        queue.push("a", 1)
+        queue.push("b", 2)
+
+        # Written, but not fsynced yet
+        self.assertEqual(queue._unsynced, 2)
+        self.assert_same_items(self.open(), {"a": 1, "b": 2})
+
+        queue.push("c", 3)
+
+        self.assertEqual(queue._unsynced, 0)
+        self.assert_same_items(self.open(), {"a": 1, "b": 2, "c": 3})
+
+        queue.push("d", 4)
+        queue.sync()
+
+        self.assertEqual(queue._unsynced, 0)
+        self.assertEqual(len(self.open()), 4)
+
+        queue.close()
+
+    def test_recovery_with_the_options_of_the_factory(self):
+        factories = (
+            partial(IndexedPriorityQueue, order="max"),
+            partial(IndexedPriorityQueue, key=lambda priority: -priority, stable=True),
+            partial(DaryIndexedPriorityQueue, arity=8),
+        )
+
+        for factory in factories:
+            with TemporaryDirectory() as directory:
+                with JournaledIndexedPriorityQueue(
+                    directory, queue_factory=factory
+                ) as queue:
+                    queue.push_many((key, key - 20) for key in range(40))
+                    queue.checkpoint()
+                    queue.push(40, 2)
+                    expected = list(queue.queue)
+
+                with JournaledIndexedPriorityQueue(
+                    directory, queue_factory=factory
+                ) as queue:
+                    self.assertEqual(type(queue.queue), type(factory()))
+                    self.assertEqual(queue.queue.arity, factory().arity)
+                    self.assertEqual(list(queue.queue), expected)
+
+    def test_recovery_of_a_stable_queue(self):
+        factory = partial(IndexedPriorityQueue, stable=True)
+
+        for seed in range(10):
+            random = Random(seed)
+
+            with TemporaryDirectory() as directory:
+                with JournaledIndexedPriorityQueue(
+                    directory, queue_factory=factory
+                ) as queue:
+                    queue.push_many((key, random.randrange(3)) for key in range(50))
+                    queue.update(7, 0)
+                    queue.pop_many(5)
+                    queue.checkpoint()
+                    queue.push(50, 1)
+
+                    expected = list(queue.queue.drain())
+
+                with JournaledIndexedPriorityQueue(
+                    directory, queue_factory=factory
+                ) as queue:
+                    self.assertEqual(list(queue.queue.drain()), expected)
+
+    def test_torn_write(self):
+        with self.open() as queue:
+            queue.push("a", 1)
+            queue.push("b", 2)
+
+        path = os.path.join(self.directory, "journal.0")
+        size = os.path.getsize(path)
+
+        with open(path, "r+b") as file:
+            file.truncate(size - 1)
+
+        with self.open() as queue:
+            self.assert_same_items(queue, {"a": 1})
+            queue.push("c", 3)
+
+        with self.open() as queue:
+            self.assert_same_items(queue, {"a": 1, "c": 3})
+
+    def test_checkpoints(self):
+        with self.open(checkpoint_every=10) as queue:
+            for key in range(25):
+                queue.push(key, key)
+
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), ["checkpoint.2", "journal.2"]
+        )
+
+        with self.open(checkpoint_every=10) as queue:
+            self.assert_same_items(queue, {key: key for key in range(25)})
+
+            queue.checkpoint()
+
+            self.assertEqual(
+                sorted(os.listdir(self.directory)), ["checkpoint.3", "journal.3"]
+            )
+
+    def test_interrupted_checkpoint(self):
+        with self.open() as queue:
+            queue.push("a", 1)
+            queue.checkpoint()
+            queue.push("b", 2)
+
+        # A checkpoint that was being written when the process crashed
+        with open(os.path.join(self.directory, "checkpoint.2.tmp"), "wb") as file:
+            file.write(b"partial")
+
+        with self.open() as queue:
+            self.assert_same_items(queue, {"a": 1, "b": 2})
+
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), ["checkpoint.1", "journal.1"]
+        )
+
+    def test_random(self):
+        random = Random(0)
+        expected = {}
+
+        for _ in range(20):
+            with self.open(checkpoint_every=random.randrange(1, 50)) as queue:
+                self.assert_same_items(queue, expected)
+
+                for _ in range(random.randrange(100)):
+                    operation = random.choice(("push", "pop", "update", "delete"))
+
+                    if operation == "push" or not expected:
+                        key = random.randrange(1000)
+
+                        if key not in expected:
+                            expected[key] = random.random()
+                            queue.push(key, expected[key])
+
+                    elif operation == "pop":
+                        key, priority = queue.pop()
+                        self.assertEqual(priority, min(expected.values()))
+                        self.assertEqual(expected.pop(key), priority)
+
+                    elif operation == "update":
+                        key = random.choice(list(expected))
+                        expected[key] = random.random()
+                        queue.update(key, expected[key])
+
+                    else:
+                        key = random.choice(list(expected))
+                        queue.delete(key)
+                        del expected[key]
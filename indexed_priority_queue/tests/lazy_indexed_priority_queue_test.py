@@ -0,0 +1,282 @@
+import os
+from random import Random, choice, randrange, sample
+from tempfile import TemporaryDirectory
+
+from indexed_priority_queue.ipq import IndexedPriorityQueue
+from indexed_priority_queue.lazy import LazyIndexedPriorityQueue
+from indexed_priority_queue.pairing import IndexedPairingHeap
+from indexed_priority_queue.tests import (
+    indexed_priority_queue_test,
+    random_indexed_priority_queue_test,
+)
+from indexed_priority_queue.tests.indexed_priority_queue_test import EXAMPLE_ELEMENTS
+
+
+class LazyInvariantMixin:
+    def create_queue(self, **kwargs):
+        return LazyIndexedPriorityQueue(**kwargs)
+
+    def assert_invariant(self):
+        # Over the whole heap, dead keys included
+        queue = self.queue.queue
+
+        for index in range(len(queue)):
+            self.assertEqual(self.queue.key_index[self.queue.key(index)], index)
+
+            if index > 0:
+                self.assertLessEqual(queue[(index - 1) // 2], queue[index])
+
+        self.assertLessEqual(self.queue.dead, set(self.queue.key_index))
+        self.assertEqual(len(self.queue), len(queue) - len(self.queue.dead))
+
+
+class LazyIndexedPriorityQueueTestCase(
+    LazyInvariantMixin, indexed_priority_queue_test.IndexedPriorityQueueTestCase
+):
+    def test_delete_from_the_middle(self):
+        self.push_example_values()
+
+        length = len(self.queue)
+        middle_index = length // 2
+        middle_priority = self.queue.queue[middle_index]
+        middle_key = self.queue.key(middle_index)
+
+        deleted_key, deleted_priority = self.queue.delete(middle_key)
+
+        self.assertIs(deleted_priority, middle_priority)
+        self.assertIs(deleted_key, middle_key)
+
+        self.assertEqual(len(self.queue), length - 1)
+        self.assertNotIn(middle_key, self.queue)
+
+        # Still in its slot
+        self.assertEqual(self.queue.key(middle_index), middle_key)
+
+        self.assert_invariant()
+
+    def test_delete_many_with_heapify(self):
+        self.push_example_values()
+
+        deleted = self.queue.delete_many(["Lara", "Dan", "Jim", "Tom", "Leo", "Max"])
+
+        self.assertEqual(len(deleted), 6)
+        self.assertEqual(len(self.queue), len(EXAMPLE_ELEMENTS) - 6)
+
+        self.assertEqual(len(self.queue.dead), 6)
+
+        self.queue.compact()
+
+        self.assertFalse(self.queue.dead)
+        self.assertEqual(len(self.queue.key_index), len(EXAMPLE_ELEMENTS) - 6)
+        self.assertEqual(self.queue.peek(), ("Peter", 2))
+
+        self.assert_invariant()
+
+    def test_invalid_max_dead(self):
+        for max_dead in (-0.1, 1):
+            with self.assertRaises(ValueError):
+                LazyIndexedPriorityQueue(max_dead=max_dead)
+
+    def test_delete_only_marks_the_key(self):
+        self.push_example_values()
+        size = len(self.queue)
+
+        key = self.queue.key(1)
+        priority = self.queue.priority(key)
+
+        self.assertEqual(self.queue.delete(key), (key, priority))
+
+        self.assertIn(key, self.queue.dead)
+        self.assertEqual(len(self.queue.queue), size)
+        self.assertEqual(len(self.queue), size - 1)
+        self.assertNotIn(key, self.queue)
+        self.assertNotIn((key, priority), self.queue.items())
+        self.assertNotIn(key, [item_key for item_key, _ in self.queue])
+
+        for method in (self.queue.priority, self.queue.index, self.queue.delete):
+            with self.assertRaises(KeyError):
+                method(key)
+
+        with self.assertRaises(KeyError):
+            self.queue.update(key, 1)
+
+        self.assert_invariant()
+
+    def test_pop_and_peek_skip_dead_keys(self):
+        self.push_example_values()
+        expected = sorted(EXAMPLE_ELEMENTS)
+
+        # Deleting the first two doesn't reach the threshold
+        self.queue.delete(expected[0][1])
+        self.queue.delete(expected[1][1])
+        self.assertEqual(len(self.queue.dead), 2)
+
+        self.assertEqual(self.queue.peek(), (expected[2][1], expected[2][0]))
+        self.assertFalse(self.queue.dead)
+        self.assertEqual(self.queue.pop(), (expected[2][1], expected[2][0]))
+
+        self.assert_invariant()
+
+    def test_push_a_dead_key_again(self):
+        self.push_example_values()
+        key = self.queue.key(1)
+        self.queue.delete(key)
+
+        self.queue.push(key, -100)
+
+        self.assertNotIn(key, self.queue.dead)
+        self.assertEqual(self.queue.peek(), (key, -100))
+        self.assert_invariant()
+
+        self.queue.delete(key)
+        self.queue.push_many([(key, 100)])
+
+        self.assertEqual(self.queue.priority(key), 100)
+        self.assertFalse(self.queue.dead)
+        self.assert_invariant()
+
+    def test_compaction(self):
+        self.queue = LazyIndexedPriorityQueue(max_dead=0.25)
+
+        for key in range(100):
+            self.queue.push(key, key)
+
+        for key in range(1, 26):
+            self.queue.delete(key)
+
+        self.assertEqual(len(self.queue.dead), 25)
+        self.assertEqual(len(self.queue.queue), 100)
+
+        self.queue.delete(26)
+
+        self.assertFalse(self.queue.dead)
+        self.assertEqual(len(self.queue.queue), 74)
+        self.assertEqual(len(self.queue), 74)
+        self.assertNotIn(26, self.queue.key_index)
+        self.assert_invariant()
+
+    def test_compaction_with_options(self):
+        self.queue = LazyIndexedPriorityQueue(order="max", stable=True)
+
+        for key in range(10):
+            self.queue.push(key, key % 3)
+
+        for key in range(6):
+            self.queue.delete(key)
+
+        self.assertFalse(self.queue.dead)
+        self.assertEqual(sorted(self.queue.key_priority), [6, 7, 8, 9])
+        self.assertEqual(list(self.queue.drain()), [(8, 2), (7, 1), (6, 0), (9, 0)])
+
+    def test_batch_operations_with_dead_keys(self):
+        for key in range(20):
+            self.queue.push(key, key)
+
+        self.queue.delete(5)
+
+        with self.assertRaises(KeyError):
+            self.queue.update_many([(4, 1), (5, 1)])
+
+        with self.assertRaises(KeyError):
+            self.queue.delete_many([4, 5])
+
+        self.assertEqual(self.queue.priority(4), 4)
+
+        self.assertEqual(self.queue.delete_many([0, 1]), [(0, 0), (1, 1)])
+        self.assertEqual(self.queue.pop_many(3), [(2, 2), (3, 3), (4, 4)])
+        self.assertEqual(len(self.queue), 14)
+        self.assert_invariant()
+
+    def test_merge_and_union_with_dead_keys(self):
+        for key in range(20):
+            self.queue.push(key, key)
+
+        self.queue.delete(5)
+        self.queue.merge(IndexedPairingHeap.from_items([(5, 50), (6, 60)]), "max")
+
+        self.assertEqual(self.queue.priority(5), 50)
+        self.assertEqual(self.queue.priority(6), 60)
+        self.assertFalse(self.queue.dead)
+
+        self.queue.delete(7)
+        other = LazyIndexedPriorityQueue()
+        other.push(30, 30)
+
+        queue = LazyIndexedPriorityQueue.union(self.queue, other)
+
+        self.assertEqual(queue.dead, {7})
+        self.assertIsNot(queue.dead, self.queue.dead)
+        self.assertNotIn(7, queue)
+        self.assertEqual(len(queue), 20)
+
+        other.push(7, 70)
+        queue = LazyIndexedPriorityQueue.union(self.queue, other)
+
+        self.assertEqual(queue.priority(7), 70)
+        self.assertEqual(len(queue), 21)
+
+    def test_save_compacts(self):
+        for key in range(20):
+            self.queue.push(key, key)
+
+        self.queue.delete(5)
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "queue.snapshot")
+            self.queue.save(path)
+
+            queue = IndexedPriorityQueue.load(path)
+
+        self.assertNotIn(5, queue)
+        self.assertEqual(len(queue), 19)
+
+    def test_cancellation_heavy_random(self):
+        random = Random(0)
+        expected = {}
+
+        for key in range(3000):
+            expected[key] = random.random()
+            self.queue.push(key, expected[key])
+
+            # Most keys are cancelled before they reach the top
+            if random.random() < 0.8:
+                cancelled = random.choice(list(expected))
+                self.queue.delete(cancelled)
+                del expected[cancelled]
+
+            if random.random() < 0.1 and expected:
+                key, priority = self.queue.pop()
+                self.assertEqual(priority, min(expected.values()))
+                self.assertEqual(expected.pop(key), priority)
+
+        self.assertEqual(len(self.queue), len(expected))
+        self.assert_invariant()
+        self.assertEqual(
+            list(self.queue.drain()), sorted(expected.items(), key=lambda i: i[1])
+        )
+
+
+class RandomLazyIndexedPriorityQueueTestCase(
+    LazyInvariantMixin,
+    random_indexed_priority_queue_test.RandomBatchIndexedPriorityQueueTestCase,
+):
+    def delete(self):
+        self.queue.delete(choice(self.live_keys()))
+
+    def update(self):
+        key = choice(self.live_keys())
+        self.queue.update(key, self.queue.priority(key) + randrange(-20, 20))
+
+    def delete_many(self):
+        keys = self.live_keys()
+        self.queue.delete_many(sample(keys, randrange(len(keys) + 1)))
+
+    def update_many(self):
+        keys = self.live_keys()
+        self.queue.update_many(
+            (key, self.queue.priority(key) + randrange(-20, 20))
+            for key in sample(keys, randrange(len(keys) + 1))
+        )
+
+    def live_keys(self):
+        return [key for key in self.queue.key_index if key not in self.queue.dead]
@@ -0,0 +1,128 @@
+from random import Random
+
+from indexed_priority_queue.minmax import MinMaxIndexedPriorityQueue
+from indexed_priority_queue.tests import (
+    indexed_priority_queue_test,
+    random_indexed_priority_queue_test,
+)
+
+
+class MinMaxInvariantMixin:
+    def create_queue(self, **kwargs):
+        return MinMaxIndexedPriorityQueue(**kwargs)
+
+    def assert_invariant(self):
+        queue = self.queue.queue
+
+        for index in range(len(queue)):
+            self.assertEqual(self.queue.index(self.queue.key(index)), index)
+
+            is_min_level = (index + 1).bit_length() % 2 == 1
+            descendants = [index]
+
+            while descendants:
+                children = [
+                    child
+                    for descendant in descendants
+                    for child in (2 * descendant + 1, 2 * descendant + 2)
+                    if child < len(queue)
+                ]
+
+                for child in children:
+                    if is_min_level:
+                        self.assertLessEqual(queue[index], queue[child])
+                    else:
+                        self.assertGreaterEqual(queue[index], queue[child])
+
+                descendants = children
+
+
+class MinMaxIndexedPriorityQueueTestCase(
+    MinMaxInvariantMixin, indexed_priority_queue_test.IndexedPriorityQueueTestCase
+):
+    def test_update_when_lowering_priority_of_last_leaf(self):
+        self.push_example_values()
+
+        last_key = self.queue.key(len(self.queue) - 1)
+        last_priority = self.queue.priority(last_key)
+
+        self.queue.update(last_key, last_priority + 3)
+
+        # A bigger leaf may move up through the max levels
+        self.assertEqual(self.queue.priority(last_key), last_priority + 3)
+        self.assert_invariant()
+
+    def test_update_when_lowering_priority_at_the_middle(self):
+        self.push_example_values()
+
+        # Index 1 is on a max level: a bigger priority keeps it there
+        middle_key = self.queue.key(1)
+        middle_priority = self.queue.priority(middle_key)
+
+        self.queue.update(middle_key, middle_priority + 10)
+
+        self.assertEqual(self.queue.peek_max(), (middle_key, middle_priority + 10))
+        self.assert_invariant()
+
+    def test_peek_max_and_pop_max_when_empty(self):
+        with self.assertRaises(IndexError):
+            self.queue.peek_max()
+
+        with self.assertRaises(IndexError):
+            self.queue.pop_max()
+
+    def test_pop_max(self):
+        for priority, key in indexed_priority_queue_test.EXAMPLE_ELEMENTS:
+            self.queue.push(key, priority)
+
+        expected = sorted(indexed_priority_queue_test.EXAMPLE_ELEMENTS, reverse=True)
+
+        for priority, _ in expected:
+            self.assertEqual(self.queue.peek_max()[1], priority)
+            self.assertEqual(self.queue.pop_max()[1], priority)
+            self.assert_invariant()
+
+        self.assertFalse(self.queue)
+
+    def test_both_ends_with_random_operations(self):
+        random = Random(0)
+        expected = {}
+
+        for _ in range(3000):
+            operation = random.choice(("push", "pop", "pop_max", "update", "delete"))
+
+            if operation == "push" or not expected:
+                key = random.randrange(500)
+
+                if key not in expected:
+                    expected[key] = random.randrange(100)
+                    self.queue.push(key, expected[key])
+
+            elif operation == "pop":
+                key, priority = self.queue.pop()
+                self.assertEqual(priority, min(expected.values()))
+                self.assertEqual(expected.pop(key), priority)
+
+            elif operation == "pop_max":
+                key, priority = self.queue.pop_max()
+                self.assertEqual(priority, max(expected.values()))
+                self.assertEqual(expected.pop(key), priority)
+
+            elif operation == "update":
+                key = random.choice(list(expected))
+                expected[key] = random.randrange(100)
+                self.queue.update(key, expected[key])
+
+            else:
+                key = random.choice(list(expected))
+                self.queue.delete(key)
+                del expected[key]
+
+            self.assert_invariant()
+
+
+class RandomMinMaxIndexedPriorityQueueTestCase(
+    MinMaxInvariantMixin,
+    random_indexed_priority_queue_test.RandomBatchIndexedPriorityQueueTestCase,
+):
+    pass
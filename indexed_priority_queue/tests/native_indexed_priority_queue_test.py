@@ -0,0 +1,147 @@
+from unittest import TestCase, skipUnless
+
+from indexed_priority_queue.tests import (
+    dary_indexed_priority_queue_test,
+    indexed_priority_queue_test,
+    random_indexed_priority_queue_test,
+)
+
+try:
+    from indexed_priority_queue import _speedups
+    from indexed_priority_queue.native import (
+        NativeDaryIndexedPriorityQueue,
+        NativeIndexedPriorityQueue,
+    )
+except ImportError:  # pragma: no cover
+    _speedups = None
+
+
+requires_speedups = skipUnless(_speedups, "The C extension has not been built")
+
+
+@requires_speedups
+class NativeIndexedPriorityQueueTestCase(
+    indexed_priority_queue_test.IndexedPriorityQueueTestCase
+):
+    def create_queue(self, **kwargs):
+        return NativeIndexedPriorityQueue(**kwargs)
+
+    def test_with_mixed_numbers(self):
+        priorities = [3, 2.5, 2**70, -(2**70), 1.0, 0, -1.5, True, 10**18]
+
+        for key, priority in enumerate(priorities):
+            self.queue.push(key, priority)
+
+        self.assert_invariant()
+
+        popped = [self.queue.pop()[1] for _ in priorities]
+        self.assertEqual(popped, sorted(priorities))
+
+    def test_with_comparable_objects(self):
+        priorities = [(2, "b"), (1, "z"), (2, "a"), (0, "c")]
+
+        for key, priority in enumerate(priorities):
+            self.queue.push(key, priority)
+
+        popped = [self.queue.pop()[1] for _ in priorities]
+        self.assertEqual(popped, sorted(priorities))
+
+    def test_with_non_comparable_priorities(self):
+        self.queue.push("a", 1)
+
+        with self.assertRaises(TypeError):
+            self.queue.push("b", "1")
+
+        # The queue is still consistent
+        self.assertEqual(len(self.queue), 2)
+        self.assertEqual(self.queue.index("a"), 0)
+        self.assertEqual(self.queue.index("b"), 1)
+
+
+@requires_speedups
+class RandomNativeIndexedPriorityQueueTestCase(
+    random_indexed_priority_queue_test.RandomBatchIndexedPriorityQueueTestCase
+):
+    def create_queue(self, **kwargs):
+        return NativeIndexedPriorityQueue(**kwargs)
+
+
+@requires_speedups
+class NativeDaryIndexedPriorityQueueTestCase(
+    dary_indexed_priority_queue_test.DaryIndexedPriorityQueueTestCase
+):
+    def create_queue(self, **kwargs):
+        return NativeDaryIndexedPriorityQueue(**kwargs)
+
+
+@requires_speedups
+class RandomNativeOctonaryIndexedPriorityQueueTestCase(
+    random_indexed_priority_queue_test.RandomBatchIndexedPriorityQueueTestCase
+):
+    def create_queue(self, **kwargs):
+        return NativeDaryIndexedPriorityQueue(arity=8, **kwargs)
+
+
+@requires_speedups
+class SpeedupsTestCase(TestCase):
+    def test_arguments_are_validated(self):
+        with self.assertRaises(TypeError):
+            _speedups.move_up((1,), ["a"], {"a": 0}, 0)
+
+        with self.assertRaises(ValueError):
+            _speedups.move_up([1, 2], ["a"], {"a": 0}, 0)
+
+        with self.assertRaises(IndexError):
+            _speedups.move_down([1], ["a"], {"a": 0}, 1)
+
+        with self.assertRaises(ValueError):
+            _speedups.heapify([1], ["a"], {"a": 0}, 1)
+
+    def test_resizing_the_queue_while_comparing(self):
+        queue = []
+
+        class Priority:
+            def __lt__(self, other):
+                queue.append(Priority())
+                return True
+
+        queue.extend([Priority(), Priority()])
+
+        with self.assertRaises(RuntimeError):
+            _speedups.move_up(queue, ["a", "b"], {"a": 0, "b": 1}, 1)
+
+    def test_shrinking_the_queue_while_comparing(self):
+        for arity in (2, 4):
+            for sift, index in ((_speedups.move_up, 4), (_speedups.move_down, 0)):
+                queue = []
+                index_key = ["a", "b", "c", "d", "e"]
+
+                class Priority:
+                    def __lt__(self, other):
+                        del queue[:]
+                        del index_key[:]
+                        return True
+
+                queue.extend(Priority() for _ in index_key)
+                key_index = {key: index for index, key in enumerate(index_key)}
+
+                with self.assertRaises(RuntimeError):
+                    sift(queue, index_key, key_index, index, arity)
+
+                self.assertEqual(queue, [])
+                self.assertEqual(index_key, [])
+
+    def test_shrinking_the_queue_of_a_push(self):
+        for queue_class in (NativeIndexedPriorityQueue, NativeDaryIndexedPriorityQueue):
+            native_queue = queue_class()
+
+            class Priority:
+                def __lt__(self, other):
+                    native_queue.queue.clear()
+                    native_queue.index_key.clear()
+                    return True
+
+            native_queue.push("a", Priority())
+
+            with self.assertRaises(RuntimeError):
+                native_queue.push("b", Priority())
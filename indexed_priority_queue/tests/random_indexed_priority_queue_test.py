@@ -1,6 +1,6 @@
 from collections import defaultdict
 from operator import add, sub
-from random import choice, randrange
+from random import choice, randrange, sample
 
 from indexed_priority_queue.tests.base_indexed_priority_queue_test_case import (
     BaseIndexedPriorityQueueTestCase,
@@ -38,8 +38,8 @@ class RandomIndexedPriorityQueueTestCase(BaseIndexedPriorityQueueTestCase):
         while right_half and self.queue:
             operation = choice(self.operations)
 
-            if operation == self.push:
-                self.push(right_half)
+            if operation in (self.push, self.push_many):
+                operation(right_half)
             else:
                 operation()
 
@@ -62,6 +62,36 @@ class RandomIndexedPriorityQueueTestCase(BaseIndexedPriorityQueueTestCase):
         op = choice([add, sub])
         self.queue.update(key, op(priority, randrange(20)))
 
+    def push_many(self, remnant_values):
+        count = randrange(1, len(remnant_values) + 1)
+        self.queue.push_many([remnant_values.pop() for _ in range(count)])
+
+    def pop_many(self):
+        self.queue.pop_many(randrange(len(self.queue) + 1))
+
+    def delete_many(self):
+        keys = list(self.queue.key_index.keys())
+        self.queue.delete_many(sample(keys, randrange(len(keys) + 1)))
+
+    def update_many(self):
+        keys = list(self.queue.key_index.keys())
+        self.queue.update_many(
+            (key, self.queue.priority(key) + randrange(-20, 20))
+            for key in sample(keys, randrange(len(keys) + 1))
+        )
+
+    def pop_while(self):
+        _, threshold = choice(list(self.queue))
+        inclusive = choice([False, True])
+
+        keys = self.queue.keys_below(threshold, inclusive)
+        self.assertEqual(self.queue.count_below(threshold, inclusive), len(keys))
+
+        popped = self.queue.pop_while(threshold, inclusive)
+
+        self.assertEqual(sorted(key for key, _ in popped), sorted(keys))
+        self.assertEqual(self.queue.count_below(threshold, inclusive), 0)
+
     def push_elements(self, elements):
         for key, priority in elements:
             self.queue.push(key, priority)
@@ -81,3 +111,22 @@ class RandomIndexedPriorityQueueTestCase(BaseIndexedPriorityQueueTestCase):
             counts[priority] += 1
 
         return list(elements.items())
+
+
+class RandomBatchIndexedPriorityQueueTestCase(RandomIndexedPriorityQueueTestCase):
+    @property
+    def operations(self):
+        return super().operations + [
+            self.push_many,
+            self.pop_many,
+            self.delete_many,
+            self.update_many,
+            self.pop_while,
+        ]
+
+
+class RandomStableMaxIndexedPriorityQueueTestCase(
+    RandomBatchIndexedPriorityQueueTestCase
+):
+    def create_queue(self, **kwargs):
+        return super().create_queue(order="max", stable=True, **kwargs)
@@ -0,0 +1,196 @@
+import os
+import subprocess
+import sys
+from multiprocessing import get_context
+from tempfile import TemporaryDirectory
+
+import indexed_priority_queue
+from indexed_priority_queue.shared import SharedIndexedPriorityQueue
+from indexed_priority_queue.tests.dense_indexed_priority_queue_test import (
+    CAPACITY,
+    DenseIndexedPriorityQueueTestCase,
+)
+
+PROCESSES = 4
+KEYS_PER_PROCESS = 50
+
+ROOT = os.path.dirname(os.path.dirname(indexed_priority_queue.__file__))
+
+# Run as another program, with the name of the memory as argument
+ATTACH_AND_PUSH = f"""
+import sys
+
+from indexed_priority_queue.shared import SharedIndexedPriorityQueue
+
+queue = SharedIndexedPriorityQueue({CAPACITY}, name=sys.argv[1])
+queue.push(4, 0.5)
+queue.close()
+"""
+
+
+def push_keys(queue, process):
+    start = process * KEYS_PER_PROCESS
+
+    for key in range(start, start + KEYS_PER_PROCESS):
+        queue.push(key, float(key % 7))
+
+    queue.close()
+
+
+def pop_keys(queue, popped):
+    while True:
+        try:
+            key, _ = queue.pop()
+        except IndexError:
+            break
+
+        popped.put(key)
+
+    popped.put(None)
+    queue.close()
+
+
+def drain_keys(queue, popped):
+    for key, _ in queue.drain():
+        popped.put(key)
+
+    popped.put(None)
+    queue.close()
+
+
+class SharedIndexedPriorityQueueTestCase(DenseIndexedPriorityQueueTestCase):
+    def setUp(self):
+        self.queue = SharedIndexedPriorityQueue(CAPACITY)
+        self.addCleanup(self.queue.close)
+
+    def test_iteration(self):
+        for key in range(10):
+            self.queue.push(key, float(-key))
+
+        expected = [(key, float(-key)) for key in reversed(range(10))]
+
+        self.assertEqual(self.queue.peek_many(3), expected[:3])
+        self.assertEqual(sorted(self.queue.items()), sorted(expected))
+
+        # Iterates over a copy: other processes may change the queue meanwhile
+        iterator = iter(self.queue)
+        self.queue.pop()
+
+        self.assertEqual(list(iterator), expected)
+        self.assertEqual(list(self.queue.drain()), expected[1:])
+
+    def test_load_into_shared_memory(self):
+        for key in range(0, CAPACITY, 2):
+            self.queue.push(key, float(-key))
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "queue.snapshot")
+            self.queue.save(path)
+
+            with SharedIndexedPriorityQueue.load(path) as queue:
+                self.assertEqual(list(queue), list(self.queue))
+                self.assertEqual(queue.pop(), (CAPACITY - 2, 2.0 - CAPACITY))
+
+    def test_attach_by_name(self):
+        self.queue.push(3, 1.5)
+
+        with SharedIndexedPriorityQueue(
+            CAPACITY, lock=self.queue.lock, name=self.queue.memory.name
+        ) as queue:
+            self.assertEqual(queue.peek(), (3, 1.5))
+            queue.push(4, 0.5)
+
+        # Only the owner frees the memory
+        self.assertEqual(self.queue.pop(), (4, 0.5))
+
+    def test_attach_from_another_program(self):
+        self.queue.push(3, 1.5)
+
+        # Not started by multiprocessing, so it has a resource tracker of its
+        # own, which must not free the memory when it exits
+        result = subprocess.run(
+            [sys.executable, "-c", ATTACH_AND_PUSH, self.queue.memory.name],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        self.assertEqual(result.stderr, "")
+        self.assertEqual(self.queue.pop(), (4, 0.5))
+
+        with SharedIndexedPriorityQueue(
+            CAPACITY, lock=self.queue.lock, name=self.queue.memory.name
+        ) as queue:
+            self.assertEqual(queue.peek(), (3, 1.5))
+
+    def test_processes_share_the_queue(self):
+        for start_method in ("fork", "spawn"):
+            context = get_context(start_method)
+
+            with SharedIndexedPriorityQueue(
+                PROCESSES * KEYS_PER_PROCESS, lock=context.RLock()
+            ) as queue:
+                self.run_processes(context, push_keys, queue, range(PROCESSES))
+
+                self.assertEqual(len(queue), PROCESSES * KEYS_PER_PROCESS)
+                self.queue, original = queue, self.queue
+                self.assert_invariant()
+                self.queue = original
+
+                popped = context.Queue()
+                self.run_processes(context, pop_keys, queue, [popped] * PROCESSES)
+
+                keys = []
+                finished = 0
+
+                while finished < PROCESSES:
+                    key = popped.get()
+
+                    if key is None:
+                        finished += 1
+                    else:
+                        keys.append(key)
+
+                self.assertEqual(sorted(keys), list(range(len(keys))))
+                self.assertFalse(queue)
+
+    def test_processes_drain_the_queue(self):
+        context = get_context("fork")
+        count = PROCESSES * KEYS_PER_PROCESS
+
+        with SharedIndexedPriorityQueue(count, lock=context.RLock()) as queue:
+            for key in range(count):
+                queue.push(key, float(key % 7))
+
+            # Each item is popped by exactly one of them, and none of them
+            # pops from an empty queue
+            popped = context.Queue()
+            self.run_processes(context, drain_keys, queue, [popped] * PROCESSES)
+
+            keys = []
+            finished = 0
+
+            while finished < PROCESSES:
+                key = popped.get()
+
+                if key is None:
+                    finished += 1
+                else:
+                    keys.append(key)
+
+            self.assertEqual(sorted(keys), list(range(count)))
+            self.assertFalse(queue)
+
+    def run_processes(self, context, target, queue, arguments):
+        processes = [
+            context.Process(target=target, args=(queue, argument))
+            for argument in arguments
+        ]
+
+        for process in processes:
+            process.start()
+
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
@@ -0,0 +1,162 @@
+from random import Random
+from unittest import TestCase
+
+from indexed_priority_queue.wheel import OVERFLOW, TimerWheel
+
+
+class TimerWheelTestCase(TestCase):
+    def setUp(self):
+        self.wheel = TimerWheel()
+
+    def assert_invariant(self):
+        wheel = self.wheel
+        slots = len(wheel.slots) // wheel.levels
+
+        for level in range(wheel.levels):
+            start = level * slots
+            end = start + slots
+            level_slots = wheel.slots[start:end]
+            self.assertEqual(
+                sum(len(slot) for slot in level_slots), wheel.counts[level]
+            )
+
+        for slot_index, slot in enumerate(wheel.slots):
+            for key, when in slot.items():
+                self.assertEqual(wheel.key_slot[key], slot_index)
+                self.assertGreaterEqual(wheel._ticks(when), wheel.tick)
+
+        for key in wheel.overflow.key_index:
+            self.assertEqual(wheel.key_slot[key], OVERFLOW)
+
+        self.assertEqual(sum(wheel.counts) + len(wheel.overflow), len(wheel))
+
+    def test_invalid_arguments(self):
+        for kwargs in ({"resolution": 0}, {"slots": 6}, {"slots": 1}, {"levels": 0}):
+            with self.assertRaises(ValueError):
+                TimerWheel(**kwargs)
+
+    def test_when_empty(self):
+        self.assertFalse(self.wheel)
+        self.assertEqual(len(self.wheel), 0)
+        self.assertEqual(self.wheel.expire(1000), [])
+
+        for method in (self.wheel.cancel, self.wheel.deadline):
+            with self.assertRaises(KeyError):
+                method("John")
+
+        with self.assertRaises(KeyError):
+            self.wheel.reschedule("John", 1)
+
+    def test_example(self):
+        self.wheel.schedule("a", 10)
+        self.wheel.schedule("b", 5)
+        self.wheel.schedule("c", 300)
+
+        self.assertEqual(len(self.wheel), 3)
+        self.assertIn("a", self.wheel)
+        self.assertEqual(self.wheel.deadline("c"), 300)
+
+        self.assertEqual(self.wheel.expire(4), [])
+        self.assertEqual(self.wheel.expire(10), ["b", "a"])
+
+        self.wheel.reschedule("c", 20)
+        self.assertEqual(self.wheel.cancel("c"), ("c", 20))
+
+        self.assertEqual(self.wheel.expire(500), [])
+        self.assertFalse(self.wheel)
+
+    def test_schedule_with_duplicated_keys(self):
+        self.wheel.schedule("a", 1)
+
+        with self.assertRaises(KeyError):
+            self.wheel.schedule("a", 2)
+
+    def test_deadlines_never_expire_early(self):
+        self.wheel = TimerWheel(resolution=0.5)
+        self.wheel.schedule("a", 1.2)
+
+        self.assertEqual(self.wheel.expire(1.4), [])
+        self.assertEqual(self.wheel.expire(1.5), ["a"])
+
+    def test_deadlines_in_the_past(self):
+        self.wheel.expire(100)
+        self.wheel.schedule("a", 50)
+
+        self.assertEqual(self.wheel.deadline("a"), 50)
+        self.assertEqual(self.wheel.expire(100), ["a"])
+
+    def test_reschedule_to_a_later_deadline(self):
+        self.wheel.schedule("a", 10)
+        slot_index = self.wheel.key_slot["a"]
+
+        self.wheel.reschedule("a", 1000)
+
+        # Stays in its slot until it is reached
+        self.assertEqual(self.wheel.key_slot["a"], slot_index)
+        self.assertEqual(self.wheel.deadline("a"), 1000)
+
+        self.assertEqual(self.wheel.expire(999), [])
+        self.assertIn("a", self.wheel)
+        self.assertEqual(self.wheel.expire(1000), ["a"])
+
+    def test_far_deadlines_use_the_overflow_queue(self):
+        self.wheel = TimerWheel(slots=4, levels=2, start=3)
+
+        self.wheel.schedule("far", 1000)
+        self.wheel.schedule("near", 10)
+
+        self.assertIn("far", self.wheel.overflow)
+        self.assertEqual(self.wheel.deadline("far"), 1000)
+
+        self.assertEqual(self.wheel.expire(999), ["near"])
+        self.assertNotIn("far", self.wheel.overflow)
+        self.assertEqual(self.wheel.expire(1000), ["far"])
+
+    def test_random(self):
+        random = Random(0)
+
+        for slots, levels in ((2, 1), (4, 2), (4, 3), (256, 4)):
+            self.wheel = TimerWheel(slots=slots, levels=levels)
+            expected = {}
+            now = 0
+
+            for _ in range(3000):
+                operation = random.random()
+                when = now + random.choice((0, 1, 5, 50, 500)) * random.random()
+
+                if operation < 0.3 or not expected:
+                    key = random.randrange(1000)
+
+                    if key not in expected:
+                        expected[key] = when
+                        self.wheel.schedule(key, when)
+
+                elif operation < 0.6:
+                    key = random.choice(list(expected))
+                    expected[key] = when
+                    self.wheel.reschedule(key, when)
+
+                elif operation < 0.8:
+                    key = random.choice(list(expected))
+                    self.assertEqual(self.wheel.cancel(key), (key, expected.pop(key)))
+
+                else:
+                    now += random.choice((0, 1, 10, 1000)) * random.random()
+                    ticks = {
+                        key: self.wheel._ticks(when) for key, when in expected.items()
+                    }
+                    due = self.wheel.expire(now)
+
+                    # Due once their tick, rounded up, is reached
+                    self.assertEqual(
+                        sorted(due),
+                        sorted(key for key, tick in ticks.items() if tick <= now // 1),
+                    )
+                    self.assertEqual(
+                        [ticks[key] for key in due], sorted(ticks[key] for key in due)
+                    )
+
+                    for key in due:
+                        del expected[key]
+
+                self.assert_invariant()
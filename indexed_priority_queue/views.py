@@ -0,0 +1,31 @@
+from numbers import Number
+from typing import Any, Callable, Hashable, Iterator, Tuple
+
+
+class ItemsView:
+    """
+    A view of the (key, priority) pairs of a queue, in no particular order,
+    like dict.items(). Nothing is copied: it reflects the queue as it
+    changes, but the queue must not change while iterating over it.
+    """
+
+    __slots__ = ("_queue", "_iterate")
+
+    def __init__(
+        self, queue: Any, iterate: Callable[[], Iterator[Tuple[Hashable, Number]]]
+    ):
+        self._queue = queue
+        self._iterate = iterate
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def __iter__(self) -> Iterator[Tuple[Hashable, Number]]:
+        return self._iterate()
+
+    def __contains__(self, item: Tuple[Hashable, Number]) -> bool:
+        key, priority = item
+        return key in self._queue and self._queue.priority(key) == priority
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
@@ -0,0 +1,230 @@
+from numbers import Number
+from typing import Dict, Hashable, List, Tuple
+
+from indexed_priority_queue.backend import IndexedPriorityQueue
+
+DEFAULT_SLOTS = 256
+DEFAULT_LEVELS = 4
+
+OVERFLOW = -1  # The slot index of the keys in the overflow queue
+
+
+class TimerWheel:
+    """
+    A deadline scheduler for timeouts that are mostly rescheduled or
+    cancelled before they fire. It is a hierarchical timing wheel: time is
+    divided in ticks of "resolution", and each level has "slots" slots, each
+    one covering "slots" times more ticks than a slot of the level below.
+    Deadlines that don't fit in the wheel ("slots" ** "levels" ticks ahead)
+    wait in an IndexedPriorityQueue until they get close.
+
+    A deadline is placed by the highest digit (in base "slots") in which its
+    tick differs from the current one, so schedule, reschedule and cancel
+    just move a key between dicts, in O(1), except for the far ones. A
+    deadline pushed back is only updated in place, and moved when its old
+    slot is reached. expire moves the current tick forward, cascading the
+    slots it reaches into the lower levels, and skips the ranges of ticks
+    with no deadlines.
+
+    Deadlines are rounded up to the next tick, so they never expire early,
+    but may expire up to one tick late.
+    """
+
+    def __init__(
+        self,
+        resolution: Number = 1,
+        start: Number = 0,
+        slots: int = DEFAULT_SLOTS,
+        levels: int = DEFAULT_LEVELS,
+    ):
+        if resolution <= 0:
+            raise ValueError("The resolution must be positive")
+
+        if slots < 2 or slots & (slots - 1):
+            raise ValueError("The number of slots must be a power of two")
+
+        if levels < 1:
+            raise ValueError("There must be at least one level")
+
+        self.resolution = resolution
+        self.bits = slots.bit_length() - 1  # Bits of a tick per level
+        self.mask = slots - 1
+        self.levels = levels
+        self.tick = int(start // resolution)  # The current tick
+
+        # The slots of all the levels, one after the other. Each one maps its
+        # keys to their deadlines
+        self.slots: List[Dict[Hashable, Number]] = [{} for _ in range(slots * levels)]
+        self.counts = [0] * levels  # Keys per level
+        self.overflow = IndexedPriorityQueue()  # Far deadlines, by deadline
+        self.key_slot: Dict[Hashable, int] = {}  # key -> index of its slot
+
+        # The level of a deadline by the bit length of its tick XOR the
+        # current one, longer ones go to the overflow queue
+        self._bit_length_level = [0] + [
+            bit_length // self.bits for bit_length in range(levels * self.bits)
+        ]
+
+    def __bool__(self) -> bool:
+        return bool(self.key_slot)
+
+    def __len__(self) -> int:
+        return len(self.key_slot)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.key_slot
+
+    def deadline(self, key: Hashable) -> Number:
+        slot_index = self.key_slot[key]
+
+        if slot_index == OVERFLOW:
+            return self.overflow.priority(key)
+
+        return self.slots[slot_index][key]
+
+    def schedule(self, key: Hashable, when: Number) -> None:
+        if key in self.key_slot:
+            raise KeyError("Key already exists")
+
+        self._insert(key, when, self._slot_index(when))
+
+    def reschedule(self, key: Hashable, when: Number) -> None:
+        slot_index = self.key_slot[key]
+
+        if slot_index != OVERFLOW:
+            slot = self.slots[slot_index]
+
+            # A deadline pushed back stays in its slot, and is placed again
+            # when that slot is reached
+            if when >= slot[key]:
+                slot[key] = when
+                return
+
+        self._remove(key)
+        self._insert(key, when, self._slot_index(when))
+
+    def cancel(self, key: Hashable) -> Tuple[Hashable, Number]:
+        return key, self._remove(key)
+
+    def expire(self, now: Number) -> List[Hashable]:
+        """
+        Moves the wheel forward to "now", and returns the keys whose deadline
+        is due, earliest tick first. They are no longer scheduled.
+        """
+        target = int(now // self.resolution)
+        slots = self.slots
+        due = []
+
+        while True:
+            # The first level slot of the current tick holds the due keys
+            slot = slots[self.tick & self.mask]
+
+            if slot:
+                self.counts[0] -= len(slot)
+                items = list(slot.items())
+                slot.clear()
+
+                for key, when in items:
+                    if int(-(-when // self.resolution)) > self.tick:
+                        self._insert(key, when, self._slot_index(when))
+                    else:
+                        due.append(key)
+
+            if self.tick >= target:
+                break
+
+            self._advance(self._next_tick(target))
+
+        key_slot = self.key_slot
+
+        for key in due:
+            del key_slot[key]
+
+        return due
+
+    def _ticks(self, when: Number) -> int:
+        # Rounded up, so deadlines never expire early. The ones in the past
+        # are due at the current tick
+        return max(int(-(-when // self.resolution)), self.tick)
+
+    def _slot_index(self, when: Number) -> int:
+        tick = int(-(-when // self.resolution))
+        current = self.tick
+
+        if tick <= current:
+            return current & self.mask
+
+        bit_length = (tick ^ current).bit_length()
+
+        if bit_length >= len(self._bit_length_level):
+            return OVERFLOW
+
+        level = self._bit_length_level[bit_length]
+        return (level << self.bits) | ((tick >> (level * self.bits)) & self.mask)
+
+    def _insert(self, key: Hashable, when: Number, slot_index: int) -> None:
+        if slot_index == OVERFLOW:
+            self.overflow.push(key, when)
+        else:
+            self.slots[slot_index][key] = when
+            self.counts[slot_index >> self.bits] += 1
+
+        self.key_slot[key] = slot_index
+
+    def _remove(self, key: Hashable) -> Number:
+        slot_index = self.key_slot.pop(key)
+
+        if slot_index == OVERFLOW:
+            return self.overflow.delete(key)[1]
+
+        self.counts[slot_index >> self.bits] -= 1
+        return self.slots[slot_index].pop(key)
+
+    def _next_tick(self, target: int) -> int:
+        # The next tick that may have something due, without going past the
+        # target: the next one if the first level has deadlines, the start
+        # of the next slot of the lowest level with deadlines otherwise
+        for level, count in enumerate(self.counts):
+            if count:
+                if level == 0:
+                    return self.tick + 1
+
+                shift = level * self.bits
+                return min(((self.tick >> shift) + 1) << shift, target)
+
+        if self.overflow:
+            return min(self._ticks(self.overflow.peek()[1]), target)
+
+        return target
+
+    def _advance(self, tick: int) -> None:
+        # Deadlines in the slots reached by the new tick are placed again,
+        # which moves them to lower levels
+        highest_level = ((tick ^ self.tick).bit_length() - 1) // self.bits
+        self.tick = tick
+
+        if highest_level >= self.levels:
+            self._pull_overflow()
+            highest_level = self.levels - 1
+
+        for level in range(highest_level, 0, -1):
+            shift = level * self.bits
+            slot = self.slots[(level << self.bits) | ((tick >> shift) & self.mask)]
+
+            if slot:
+                self.counts[level] -= len(slot)
+                items = list(slot.items())
+                slot.clear()
+
+                for key, when in items:
+                    self._insert(key, when, self._slot_index(when))
+
+    def _pull_overflow(self) -> None:
+        # Moves the deadlines that now fit in the wheel out of the queue
+        overflow = self.overflow
+        shift = self.levels * self.bits
+        end = ((self.tick >> shift) + 1) << shift
+
+        while overflow and self._ticks(overflow.peek()[1]) < end:
+            key, when = overflow.pop()
+            self._insert(key, when, self._slot_index(when))
@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from setuptools import setup
+from setuptools import Extension, setup
 
 ROOT_PATH = Path(__file__).parent
 
@@ -16,6 +16,13 @@ REQUIREMENTS_FILE = "requirements.txt"
 
 README_FILENAME = "README.md"
 
+# Optional: if it can't be compiled, the pure Python implementation is used
+SPEEDUPS_EXTENSION = Extension(
+    f"{PACKAGE_NAME}._speedups",
+    sources=[f"{PACKAGE_NAME}/_speedups.c"],
+    optional=True,
+)
+
 
 DESCRIPTION = "A Python implementation of an Indexed Priority Queue (IPQ)."
 
@@ -51,8 +58,14 @@ setup(
     author="Gabriel Bazan",
     author_email="gbazan@outlook.com",
     license="MIT",
-    packages=[PACKAGE_NAME],
+    packages=[PACKAGE_NAME, f"{PACKAGE_NAME}.benchmarks"],
+    ext_modules=[SPEEDUPS_EXTENSION],
     zip_safe=False,
     python_requires=">=3.6.2",
     install_requires=get_requirements(),
+    entry_points={
+        "console_scripts": [
+            f"ipq-benchmark={PACKAGE_NAME}.benchmarks.suite:main",
+        ],
+    },
 )